@@ -4,6 +4,9 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, Optional
 
+from fastapi import HTTPException
+from sqlalchemy.orm import load_only
+
 
 def orm_to_dict(obj: Any, exclude_none: bool = True) -> Optional[dict[str, Any]]:
     """Convert SQLAlchemy model instance to dict, optionally excluding None values."""
@@ -22,3 +25,40 @@ def orm_to_dict(obj: Any, exclude_none: bool = True) -> Optional[dict[str, Any]]
         else:
             result[key] = value
     return result
+
+
+def parse_fields(fields: Optional[str], available: list[str]) -> list[str]:
+    """Parse comma-separated ``fields=`` into column names, keeping the order of ``available``."""
+    if not fields:
+        return list(available)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        return list(available)
+    unknown = requested - set(available)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    return [name for name in available if name in requested]
+
+
+def load_fields(model: Any, fields: list[str], *extra_columns: Any):
+    """load_only() option for ``fields`` plus the columns the route itself reads."""
+    names = dict.fromkeys([*fields, *(column.key for column in extra_columns)])
+    return load_only(*(getattr(model, name) for name in names))
+
+
+def model_columns(model: Any, fields: Optional[list[str]] = None) -> list:
+    """Table columns of ``model`` for a core select(), in ``fields`` order (all by default)."""
+    table = model.__table__
+    if fields is None:
+        return list(table.columns)
+    return [table.c[name] for name in fields]
+
+
+def escape_like(value: Any) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def ilike_contains(column: Any, value: Any):
+    """``column ILIKE '%value%'`` with escaped input; served by the column's pg_trgm GIN index."""
+    return column.ilike(f"%{escape_like(value)}%", escape="\\")
@@ -0,0 +1,123 @@
+"""HTTP-кэширование GET /api/v1 по версиям наборов данных.
+
+ETag ответа - хэш пути, строки запроса, текущей даты и версий таблиц,
+которые читает роутер (ROUTE_TABLES). Пока версии не изменились, тот
+же запрос дает тот же ответ, поэтому If-None-Match с совпавшим ETag
+получает 304 без обращения к данным. Дата входит в ключ, потому что
+часть роутов считает периоды от сегодняшнего дня.
+
+Версии читаются из dataset_versions не чаще раза в
+DATASET_VERSION_REFRESH_SECONDS и хранятся в процессе, так что после
+загрузки новые ETag появляются с этой задержкой.
+
+/export не кэшируется: порядок строк выгрузки не гарантирован, а
+сильный ETag обещает побайтово одинаковое тело.
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import date
+
+from fastapi import Request, Response
+from sqlalchemy.exc import DBAPIError
+
+from app.config import settings
+from app.database.connection import AsyncSessionLocal
+from app.database.dataset_versions import read_dataset_versions
+
+LOOKUP_TABLES = ["lkp_areas", "lkp_market_types", "lkp_transaction_groups", "lkp_transaction_procedures"]
+
+# Префикс роутера -> таблицы, от которых зависят его ответы
+ROUTE_TABLES = {
+    "/api/v1/lkp-areas": ["lkp_areas"],
+    "/api/v1/lkp-market-types": ["lkp_market_types"],
+    "/api/v1/lkp-transaction-groups": ["lkp_transaction_groups"],
+    "/api/v1/lkp-transaction-procedures": ["lkp_transaction_procedures"],
+    "/api/v1/valuation": ["valuation"],
+    "/api/v1/units": ["units", "transactions", "valuation", "projects", "lkp_areas"],
+    "/api/v1/buildings": ["buildings"],
+    "/api/v1/projects": ["projects", "lkp_areas"],
+    "/api/v1/transactions": ["transactions", "units"],
+}
+
+
+class DatasetVersions:
+    """Версии таблиц в памяти процесса, перечитываются раз в refresh_seconds"""
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self.versions = {}
+        self.loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self):
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.refresh_seconds
+
+    async def get(self):
+        if self._fresh():
+            return self.versions
+        async with self._lock:
+            # Пока ждали блокировку, версии мог перечитать другой запрос
+            if not self._fresh():
+                try:
+                    async with AsyncSessionLocal() as db:
+                        self.versions = await read_dataset_versions(db)
+                except DBAPIError:
+                    # Таблицы еще нет (ни одной загрузки) или БД недоступна -
+                    # остаются прежние версии, до первой загрузки все нулевые
+                    pass
+                self.loaded_at = time.monotonic()
+        return self.versions
+
+
+dataset_versions = DatasetVersions(settings.DATASET_VERSION_REFRESH_SECONDS)
+
+
+def route_tables(path):
+    for prefix, tables in ROUTE_TABLES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return tables
+    return None
+
+
+def make_etag(request, tables, versions):
+    key = "|".join([
+        request.url.path,
+        request.url.query,
+        date.today().isoformat(),
+        *(f"{table}={versions.get(table, 0)}" for table in tables),
+    ])
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match: список ETag через запятую, "*" или слабые W/"..." """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def cache_control(tables):
+    if all(table in LOOKUP_TABLES for table in tables):
+        # Справочники меняются редко - CDN и браузер могут отдавать их без перепроверки
+        return f"public, max-age={settings.HTTP_CACHE_LOOKUP_MAX_AGE}"
+    return f"public, max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate"
+
+
+async def http_cache_middleware(request: Request, call_next):
+    """ETag, Cache-Control и 304 Not Modified для GET /api/v1"""
+    tables = route_tables(request.url.path)
+    if request.method != "GET" or tables is None or request.url.path.endswith("/export"):
+        return await call_next(request)
+
+    etag = make_etag(request, tables, await dataset_versions.get())
+    headers = {"ETag": etag, "Cache-Control": cache_control(tables)}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
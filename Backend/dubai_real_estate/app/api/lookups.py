@@ -0,0 +1,87 @@
+"""Справочники lkp_* в памяти процесса.
+
+Справочники маленькие и меняются только загрузкой, поэтому читаются
+целиком при старте приложения и перечитываются, когда меняется их
+версия в dataset_versions (app.api.http_cache.dataset_versions).
+Роуты справочников отдают данные из памяти, остальные роутеры берут
+названия районов, групп и процедур отсюда вместо JOIN со справочником.
+"""
+
+import asyncio
+
+from sqlalchemy import select
+
+from app.api.http_cache import dataset_versions
+from app.api.serializers import rows_to_dicts
+from app.database.connection import AsyncSessionLocal
+from app.database.models import LkpArea, LkpMarketType, LkpTransactionGroup, LkpTransactionProcedure
+
+
+class LookupTable:
+    """Строки справочника (словари) по возрастанию первичного ключа и индекс по ключу"""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model.__tablename__
+        self.fields = [column.key for column in model.__table__.columns]
+        self.key_fields = [column.key for column in model.__table__.primary_key.columns]
+        self.rows = []
+        self.by_key = {}
+        self.loaded = False
+
+    def key(self, row):
+        if len(self.key_fields) == 1:
+            return row[self.key_fields[0]]
+        return tuple(row[field] for field in self.key_fields)
+
+    async def load(self, db):
+        result = await db.execute(select(*self.model.__table__.columns))
+        rows = sorted(rows_to_dicts(result.all(), self.fields), key=self.key)
+        self.rows = rows
+        self.by_key = {self.key(row): row for row in rows}
+        self.loaded = True
+
+    def get(self, key):
+        return self.by_key.get(key)
+
+    def latest(self, limit):
+        """limit строк с наибольшими ключами (как ORDER BY ключ DESC LIMIT)"""
+        return self.rows[::-1][:limit]
+
+    def name_of(self, key, lang="en"):
+        row = self.by_key.get(key)
+        return row.get(f"name_{lang}") if row else None
+
+
+class LookupRegistry:
+    def __init__(self, models):
+        self.tables = {model.__tablename__: LookupTable(model) for model in models}
+        self.versions = {}
+        self._lock = asyncio.Lock()
+
+    def _stale(self, versions):
+        return [
+            table for name, table in self.tables.items()
+            if not table.loaded or self.versions.get(name) != versions.get(name, 0)
+        ]
+
+    async def refresh(self):
+        """Перечитать справочники, которые еще не загружены или сменили версию"""
+        versions = await dataset_versions.get()
+        if not self._stale(versions):
+            return
+        async with self._lock:
+            stale = self._stale(versions)
+            if not stale:
+                return
+            async with AsyncSessionLocal() as db:
+                for table in stale:
+                    await table.load(db)
+                    self.versions[table.name] = versions.get(table.name, 0)
+
+    async def get(self, name):
+        await self.refresh()
+        return self.tables[name]
+
+
+lookups = LookupRegistry([LkpArea, LkpMarketType, LkpTransactionGroup, LkpTransactionProcedure])
@@ -0,0 +1,187 @@
+"""Keyset (курсорная) пагинация для списков API.
+
+Вместо OFFSET следующая страница выбирается условием "после последней
+строки предыдущей страницы" по колонкам сортировки, поэтому стоимость
+страницы не растет с глубиной. Курсор - непрозрачная base64-строка с
+значениями ключа последней строки.
+
+Порядок задается Keyset: необязательная сортировочная колонка (может
+содержать NULL) и уникальный NOT NULL ключ, разрешающий равенства.
+NULL стоят там же, где их ставит PostgreSQL по умолчанию: в конце при
+ASC и в начале при DESC.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, tuple_
+
+# Режимы подсчета общего числа строк (параметр count списков)
+CountMode = Literal["none", "estimate", "exact"]
+
+
+def _encode_value(v):
+    if isinstance(v, datetime):
+        return {"dt": v.isoformat()}
+    if isinstance(v, date):
+        return {"d": v.isoformat()}
+    if isinstance(v, Decimal):
+        return {"n": str(v)}
+    return v
+
+
+_DECODERS = {"dt": datetime.fromisoformat, "d": date.fromisoformat, "n": Decimal}
+
+
+def _decode_value(v):
+    if isinstance(v, dict):
+        if len(v) != 1 or next(iter(v)) not in _DECODERS:
+            raise ValueError(v)
+        tag, value = next(iter(v.items()))
+        if not isinstance(value, str):
+            raise TypeError(value)
+        return _DECODERS[tag](value)
+    return v
+
+
+def _check_type(value, column):
+    """Значение курсора должно быть того же типа, что и колонка keyset"""
+    if value is None:
+        return
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return
+    # bool - подкласс int, а int допустим там, где колонка float
+    if isinstance(value, bool) and python_type is not bool:
+        raise TypeError(value)
+    if python_type is float and isinstance(value, int):
+        return
+    if not isinstance(value, python_type):
+        raise TypeError(value)
+
+
+def encode_cursor(values) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    """Значения колонок columns из курсора; подделанный курсор - 400, а не ошибка в БД"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        decoded = [_decode_value(v) for v in values]
+        for value, column in zip(decoded, columns):
+            _check_type(value, column)
+        return decoded
+    # ArithmeticError: decimal.InvalidOperation для {"n": "x"}
+    except (ValueError, TypeError, KeyError, ArithmeticError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Некорректный cursor")
+
+
+class Keyset:
+    """Порядок выдачи страницы: sort_column (может быть None) + уникальный ключ.
+
+    key_column - колонка или кортеж колонок (составной первичный ключ).
+    """
+
+    def __init__(self, key_column, sort_column=None, descending=False):
+        self.key_columns = list(key_column) if isinstance(key_column, (tuple, list)) else [key_column]
+        self.sort_column = sort_column
+        self.descending = descending
+
+    @property
+    def columns(self):
+        if self.sort_column is None:
+            return list(self.key_columns)
+        return [self.sort_column, *self.key_columns]
+
+    def order_by(self):
+        # NULLS FIRST/LAST явно - совпадает с умолчанием PostgreSQL и его индексами
+        if self.descending:
+            return [column.desc().nulls_first() for column in self.columns]
+        return [column.asc().nulls_last() for column in self.columns]
+
+    def values(self, row):
+        return [getattr(row, column.key) for column in self.columns]
+
+    def _key_after(self, key_values):
+        if len(self.key_columns) == 1:
+            key, values = self.key_columns[0], key_values[0]
+        else:
+            key, values = tuple_(*self.key_columns), tuple_(*key_values)
+        return key < values if self.descending else key > values
+
+    def after(self, values):
+        """Условие "строка идет после строки с values" в порядке order_by()"""
+        if self.sort_column is None:
+            return self._key_after(values)
+
+        column = self.sort_column
+        sort_value, key_values = values[0], values[1:]
+        row = tuple_(column, *self.key_columns)
+        if self.descending:
+            # DESC: сначала NULL, затем значения по убыванию
+            if sort_value is None:
+                return or_(and_(column.is_(None), self._key_after(key_values)), column.isnot(None))
+            return row < tuple_(sort_value, *key_values)
+        # ASC: значения по возрастанию, NULL в конце
+        if sort_value is None:
+            return and_(column.is_(None), self._key_after(key_values))
+        return or_(row > tuple_(sort_value, *key_values), column.is_(None))
+
+
+async def paginate(db, query, keyset, limit, cursor=None, scalars=True):
+    """Страница ORM-объектов по query и курсор следующей страницы (или None).
+
+    scalars=False - для select() по колонкам: строки Row, в query должны
+    быть выбраны все колонки keyset.
+    """
+    if cursor:
+        query = query.filter(keyset.after(decode_cursor(cursor, keyset.columns)))
+    result = await db.execute(query.order_by(*keyset.order_by()).limit(limit + 1))
+    rows = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(keyset.values(rows[-1]))
+    return rows, next_cursor
+
+
+def estimate_sql(query, dialect):
+    """EXPLAIN (FORMAT JSON) для query с подставленными литералами.
+
+    dialect - диалект подключения: после подключения он знает
+    standard_conforming_strings сервера, а отвязанный postgresql.dialect()
+    удваивает обратную косую черту, и ESCAPE '\\' из ilike_contains
+    превращается в недопустимую двухсимвольную строку.
+    """
+    compiled = query.order_by(None).compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return f"EXPLAIN (FORMAT JSON) {compiled}"
+
+
+async def count_rows(db, query, mode="none"):
+    """Общее число строк query: None, оценка планировщика или точный COUNT.
+
+    "estimate" берет Plan Rows из EXPLAIN - это не сканирует таблицу,
+    но точность зависит от свежести статистики (ANALYZE).
+    """
+    if mode == "exact":
+        return await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    if mode == "estimate":
+        conn = await db.connection()
+        # exec_driver_sql: SQL с подставленными литералами не разбирается заново на :params
+        plan = (await conn.exec_driver_sql(estimate_sql(query, conn.dialect))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return None
@@ -0,0 +1,196 @@
+"""Кэш ответов тяжелых аналитических роутов.
+
+Роут оборачивается декоратором analytics_cache.cached("table", ...):
+ответ (JSON-байты) хранится в LRU в памяти процесса с TTL и
+ограничением по числу записей, а при заданном ANALYTICS_CACHE_REDIS_URL -
+еще и в общем Redis-совместимом хранилище (нужен пакет redis), чтобы
+кэш разделяли все воркеры.
+
+Ключ - имя роута, нормализованные параметры запроса (None отброшены,
+порядок не важен), текущая дата и версии перечисленных таблиц из
+dataset_versions. После загрузки версия таблицы растет, и старые записи
+больше не находятся - они вытесняются LRU или истекают по TTL.
+
+Сессия БД роута (параметр db) открывается только при промахе: попадание
+в кэш не занимает соединение пула и слот аналитических запросов.
+Одновременные промахи с одним ключом объединяются (app.api.single_flight):
+запрос к БД выполняет первый, остальные получают его результат.
+"""
+
+import functools
+import inspect
+import time
+from collections import OrderedDict
+from datetime import date
+from urllib.parse import urlencode
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from app.api.http_cache import dataset_versions
+from app.api.serializers import dumps
+from app.api.single_flight import SingleFlight
+from app.config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+
+class MemoryBackend:
+    """LRU с TTL: не больше max_entries записей, каждая живет ttl секунд"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+
+    async def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class RedisBackend:
+    """Общий кэш в Redis (или совместимом сервере): SET с EX ttl"""
+
+    def __init__(self, url, ttl, prefix="analytics:"):
+        if redis is None:
+            raise RuntimeError("ANALYTICS_CACHE_REDIS_URL задан, но пакет redis не установлен")
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.errors = 0
+
+    async def get(self, key):
+        try:
+            return await self.client.get(self.prefix + key)
+        except redis.RedisError:
+            # Недоступный общий кэш - это промах, а не ошибка запроса
+            self.errors += 1
+            return None
+
+    async def set(self, key, value):
+        try:
+            await self.client.set(self.prefix + key, value, ex=self.ttl)
+        except redis.RedisError:
+            self.errors += 1
+
+
+class ResponseCache:
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "entries": len(self.local.entries),
+            "max_entries": self.local.max_entries,
+            "ttl": self.local.ttl,
+            "shared": self.shared is not None,
+            "shared_errors": self.shared.errors if self.shared is not None else 0,
+            **self.flights.stats(),
+        }
+
+    async def get(self, key):
+        value = await self.local.get(key)
+        if value is None and self.shared is not None:
+            value = await self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                await self.local.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key, value):
+        await self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(key, value)
+
+    async def make_key(self, name, params, tables):
+        versions = await dataset_versions.get()
+        query = urlencode(sorted((key, str(value)) for key, value in params.items() if value is not None))
+        stamp = ",".join(f"{table}={versions.get(table, 0)}" for table in tables)
+        return f"{name}?{query}|{date.today().isoformat()}|{stamp}"
+
+    def cached(self, *tables):
+        """Декоратор роута: ответ кэшируется, пока не изменились версии tables"""
+
+        def decorator(func):
+            signature = inspect.signature(func)
+            db_dependency = signature.parameters["db"].default.dependency
+            name = f"{func.__module__}.{func.__name__}"
+
+            @functools.wraps(func)
+            async def wrapper(**params):
+                key = await self.make_key(name, params, tables)
+                body = await self.get(key)
+                if body is not None:
+                    return Response(content=body, media_type="application/json")
+
+                async def compute():
+                    # Сессия открывается так же, как это сделал бы FastAPI, но только при промахе
+                    session = db_dependency()
+                    try:
+                        result = await func(**params, db=await session.__anext__())
+                    finally:
+                        await session.aclose()
+
+                    if isinstance(result, Response):
+                        if result.status_code != 200:
+                            return result
+                        body = result.body
+                    else:
+                        body = dumps(jsonable_encoder(result))
+                    await self.set(key, body)
+                    return body
+
+                # Одинаковые одновременные промахи ждут один запрос к БД
+                body = await self.flights.do(key, compute)
+                if isinstance(body, Response):
+                    return body
+                return Response(content=body, media_type="application/json")
+
+            # FastAPI не должен сам открывать сессию для обертки
+            wrapper.__signature__ = signature.replace(
+                parameters=[p for p in signature.parameters.values() if p.name != "db"]
+            )
+            return wrapper
+
+        return decorator
+
+
+def build_analytics_cache():
+    local = MemoryBackend(settings.ANALYTICS_CACHE_MAX_ENTRIES, settings.ANALYTICS_CACHE_TTL_SECONDS)
+    shared = None
+    if settings.ANALYTICS_CACHE_REDIS_URL:
+        shared = RedisBackend(settings.ANALYTICS_CACHE_REDIS_URL, settings.ANALYTICS_CACHE_TTL_SECONDS)
+    return ResponseCache(local, shared)
+
+
+analytics_cache = build_analytics_cache()
@@ -0,0 +1,80 @@
+"""Быстрая сериализация строк ответа через orjson.
+
+Строки собираются как есть - значения колонок без поэлементных
+преобразований, а date/datetime/Decimal кодирует уже orjson при записи
+тела ответа: даты - нативно в ISO 8601, Decimal - через _default как
+float (как раньше делал _serialize_value).
+
+Роуты возвращают FastJSONResponse напрямую: ответ, уже являющийся
+Response, FastAPI отдает без прохода jsonable_encoder по всему дереву.
+Роуты со схемами из app.schemas объявляют их в response_model (контракт
+в OpenAPI), а отдают SchemaJSONResponse: построчная валидация pydantic
+пропускается, Decimal кодируется так же, как это делал бы
+jsonable_encoder для полей int/float схемы.
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Iterable, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(v):
+    if isinstance(v, Decimal):
+        return float(v)
+    raise TypeError(f"Не сериализуется в JSON: {type(v).__name__}")
+
+
+def _default_exact(v):
+    # Как decimal_encoder в FastAPI: NUMERIC(p, 0) -> int, с дробной частью -> float
+    if isinstance(v, Decimal):
+        return int(v) if v.as_tuple().exponent >= 0 else float(v)
+    raise TypeError(f"Не сериализуется в JSON: {type(v).__name__}")
+
+
+def dumps(content: Any, default=_default) -> bytes:
+    """JSON-байты для content (dict/list/строки, Decimal, date, datetime)"""
+    return orjson.dumps(content, default=default, option=ORJSON_OPTIONS)
+
+
+@lru_cache(maxsize=256)
+def _getter(fields: tuple):
+    return attrgetter(*fields)
+
+
+def row_to_dict(row: Any, fields: Sequence[str]) -> dict:
+    """Словарь {поле: значение} для ORM-объекта или строки select() - только поля fields"""
+    fields = tuple(fields)
+    values = _getter(fields)(row)
+    if len(fields) == 1:
+        values = (values,)
+    return dict(zip(fields, values))
+
+
+def rows_to_dicts(rows: Iterable[Any], fields: Sequence[str]) -> list:
+    """row_to_dict для списка строк с одним attrgetter на весь список"""
+    fields = tuple(fields)
+    getter = _getter(fields)
+    if len(fields) == 1:
+        name = fields[0]
+        return [{name: getter(row)} for row in rows]
+    return [dict(zip(fields, getter(row))) for row in rows]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse с телом от orjson (Decimal -> float, даты -> ISO 8601)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class SchemaJSONResponse(JSONResponse):
+    """Ответ по response_model из app.schemas: orjson, целые Decimal -> int"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content, default=_default_exact)
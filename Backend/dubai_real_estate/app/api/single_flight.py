@@ -0,0 +1,41 @@
+"""Объединение одинаковых одновременных вычислений (single-flight).
+
+Пока вычисление с ключом key выполняется, остальные запросы с тем же
+ключом не запускают свое, а ждут его результат (или его исключение).
+Вычисление идет в отдельной задаче: отключение клиента, который его
+запустил, не отменяет его для остальных ожидающих.
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self.inflight = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def stats(self):
+        return {
+            "inflight": len(self.inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
+
+    def _finish(self, key, task):
+        self.inflight.pop(key, None)
+        if not task.cancelled():
+            # Исключение получат ожидающие; если их не осталось - не логировать его как потерянное
+            task.exception()
+
+    async def do(self, key, compute):
+        """Результат compute() - общий для всех одновременных вызовов с key"""
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self.inflight[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
@@ -1,28 +1,61 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 
-from app.database.connection import get_db
+from app.api.dependencies import model_columns, parse_fields
+from app.api.export import EXPORT_FORMATS, ExportFormat, export_response
+from app.api.serializers import SchemaJSONResponse, row_to_dict, rows_to_dicts
+from app.database.connection import get_async_db
 from app.database.models import Building
+from app.schemas.buildings import BuildingListResponse, BuildingResponse
 
 router = APIRouter()
 
-@router.get("/latest")
-def get_latest_buildings(
+BUILDING_FIELDS = list(BuildingResponse.__fields__)
+
+@router.get("/latest", response_model=BuildingListResponse, response_model_exclude_unset=True)
+async def get_latest_buildings(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,building_number,floors"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Вернуть N последних записей"""
-    buildings = db.query(Building).order_by(desc(Building.property_id)).limit(limit).all()
-    return {"total": len(buildings), "buildings": buildings}
+    field_list = parse_fields(fields, BUILDING_FIELDS)
+    columns = model_columns(Building, field_list)
+    result = await db.execute(select(*columns).order_by(desc(Building.property_id)).limit(limit))
+    buildings = rows_to_dicts(result.all(), field_list)
+    return SchemaJSONResponse({"total": len(buildings), "buildings": buildings})
+
+@router.get("/export")
+async def export_buildings(
+    format: ExportFormat = Query("ndjson", description=f"Формат выгрузки: {', '.join(EXPORT_FORMATS)}"),
+    area_id: Optional[int] = Query(None, description="ID района"),
+    project_id: Optional[int] = Query(None, description="ID проекта"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,building_number,floors"),
+):
+    """Потоковая выгрузка зданий по району и проекту"""
+    conditions = []
+    if area_id is not None:
+        conditions.append(Building.area_id == area_id)
+    if project_id is not None:
+        conditions.append(Building.project_id == project_id)
+    return export_response(
+        model_columns(Building, parse_fields(fields, BUILDING_FIELDS)), conditions, format, "buildings"
+    )
 
-@router.get("/{property_id}")
-def get_building_by_id(
+@router.get("/{property_id}", response_model=BuildingResponse, response_model_exclude_unset=True)
+async def get_building_by_id(
     property_id: int,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,building_number,floors"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Вернуть запись по ID"""
-    building = db.query(Building).filter(Building.property_id == property_id).first()
+    field_list = parse_fields(fields, BUILDING_FIELDS)
+    columns = model_columns(Building, field_list)
+    result = await db.execute(select(*columns).where(Building.property_id == property_id))
+    building = result.first()
     if not building:
         raise HTTPException(status_code=404, detail="Building not found")
-    return building
+    return SchemaJSONResponse(row_to_dict(building, field_list))
@@ -1,49 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
-from sqlalchemy import desc
 
-from app.database.connection import get_db
-from app.database.models import LkpArea
+from app.api.lookups import lookups
+from app.api.serializers import SchemaJSONResponse
+from app.schemas.lkp_areas import LkpAreaListResponse, LkpAreaResponse
 
 router = APIRouter()
 
-@router.get("/latest")
-def get_latest_areas(
+# Справочник районов читается из памяти (app.api.lookups), без запросов к БД
+
+@router.get("/latest", response_model=LkpAreaListResponse)
+async def get_latest_areas(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db)
 ):
     """Вернуть N последних записей"""
-    areas = db.query(LkpArea).order_by(desc(LkpArea.area_id)).limit(limit).all()
-    return {"total": len(areas), "areas": areas}
+    areas = (await lookups.get("lkp_areas")).latest(limit)
+    return SchemaJSONResponse({"total": len(areas), "areas": areas})
 
-@router.get("/{area_id}")
-def get_area_by_id(
+@router.get("/{area_id}", response_model=LkpAreaResponse)
+async def get_area_by_id(
     area_id: int,
-    db: Session = Depends(get_db)
 ):
     """Вернуть запись по ID"""
-    area = db.query(LkpArea).filter(LkpArea.area_id == area_id).first()
+    area = (await lookups.get("lkp_areas")).get(area_id)
     if not area:
         raise HTTPException(status_code=404, detail="Area not found")
-    return area
+    return SchemaJSONResponse(area)
 
 
-@router.get("/all")
-def get_all_areas(
-    db: Session = Depends(get_db)
-):
+@router.get("/all", response_model=LkpAreaListResponse)
+async def get_all_areas():
     """Получить список всех районов"""
-    areas = db.query(LkpArea).all()
-    return {
+    areas = (await lookups.get("lkp_areas")).rows
+    return SchemaJSONResponse({
         "total": len(areas),
-        "areas": [
-            {
-                "area_id": area.area_id,
-                "name_en": area.name_en,
-                "name_ar": area.name_ar,
-                "municipality_number": area.municipality_number
-            }
-            for area in areas
-        ]
-    }
+        "areas": areas
+    })
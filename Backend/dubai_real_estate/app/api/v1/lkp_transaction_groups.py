@@ -1,28 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, HTTPException, Query
 
-from app.database.connection import get_db
-from app.database.models import LkpTransactionGroup
+from app.api.lookups import lookups
+from app.api.serializers import FastJSONResponse
 
 router = APIRouter()
 
+# Справочник групп транзакций читается из памяти (app.api.lookups), без запросов к БД
+
 @router.get("/latest")
-def get_latest_transaction_groups(
+async def get_latest_transaction_groups(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db)
 ):
     """Вернуть N последних записей"""
-    groups = db.query(LkpTransactionGroup).order_by(desc(LkpTransactionGroup.group_id)).limit(limit).all()
-    return {"total": len(groups), "transaction_groups": groups}
+    groups = (await lookups.get("lkp_transaction_groups")).latest(limit)
+    return FastJSONResponse({"total": len(groups), "transaction_groups": groups})
 
 @router.get("/{group_id}")
-def get_transaction_group_by_id(
+async def get_transaction_group_by_id(
     group_id: int,
-    db: Session = Depends(get_db)
 ):
     """Вернуть запись по ID"""
-    group = db.query(LkpTransactionGroup).filter(LkpTransactionGroup.group_id == group_id).first()
+    group = (await lookups.get("lkp_transaction_groups")).get(group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Transaction group not found")
-    return group
+    return FastJSONResponse(group)
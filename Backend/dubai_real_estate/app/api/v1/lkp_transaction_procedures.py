@@ -1,35 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, HTTPException, Query
 
-from app.database.connection import get_db
-from app.database.models import LkpTransactionProcedure
+from app.api.lookups import lookups
+from app.api.serializers import SchemaJSONResponse
+from app.schemas.lkp_transaction_procedures import (
+    LkpTransactionProcedureListResponse,
+    LkpTransactionProcedureResponse,
+)
 
 router = APIRouter()
 
-@router.get("/latest")
-def get_latest_transaction_procedures(
+# Справочник процедур читается из памяти (app.api.lookups), без запросов к БД
+
+@router.get("/latest", response_model=LkpTransactionProcedureListResponse)
+async def get_latest_transaction_procedures(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db)
 ):
     """Вернуть N последних записей"""
-    procedures = db.query(LkpTransactionProcedure).order_by(
-        desc(LkpTransactionProcedure.group_id), 
-        desc(LkpTransactionProcedure.procedure_id)
-    ).limit(limit).all()
-    return {"total": len(procedures), "transaction_procedures": procedures}
+    # По убыванию (group_id, procedure_id)
+    procedures = (await lookups.get("lkp_transaction_procedures")).latest(limit)
+    return SchemaJSONResponse({"total": len(procedures), "transaction_procedures": procedures})
 
-@router.get("/{group_id}/{procedure_id}")
-def get_transaction_procedure_by_id(
+@router.get("/{group_id}/{procedure_id}", response_model=LkpTransactionProcedureResponse)
+async def get_transaction_procedure_by_id(
     group_id: int,
     procedure_id: int,
-    db: Session = Depends(get_db)
 ):
     """Вернуть запись по ID"""
-    procedure = db.query(LkpTransactionProcedure).filter(
-        LkpTransactionProcedure.group_id == group_id,
-        LkpTransactionProcedure.procedure_id == procedure_id
-    ).first()
+    procedure = (await lookups.get("lkp_transaction_procedures")).get((group_id, procedure_id))
     if not procedure:
         raise HTTPException(status_code=404, detail="Transaction procedure not found")
-    return procedure
+    return SchemaJSONResponse(procedure)
@@ -1,15 +1,25 @@
 from datetime import date, datetime, timedelta
 from decimal import Decimal
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func, distinct
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, and_, func, distinct, select
 
-from app.database.connection import get_db
-from app.database.models import Project, LkpArea
+from app.api.dependencies import ilike_contains, load_fields, model_columns, parse_fields
+from app.api.export import EXPORT_FORMATS, ExportFormat, export_response
+from app.api.lookups import lookups
+from app.api.pagination import CountMode, Keyset, count_rows, paginate
+from app.api.response_cache import analytics_cache
+from app.api.serializers import FastJSONResponse, row_to_dict, rows_to_dicts
+from app.database.connection import get_async_db, get_analytics_db
+from app.database.models import Project
 
 router = APIRouter()
 
+# Порядок выдачи списков проектов: новые (больший project_id) сверху
+PROJECTS_KEYSET = Keyset(Project.project_id, descending=True)
+
 # Порядок полей как в таблице PROJECTS
 PROJECT_FIELDS = [
     "project_id",
@@ -43,42 +53,67 @@ PROJECT_FIELDS = [
 ]
 
 
-def _serialize_value(v):
-    """Сериализация значений для JSON"""
-    if v is None:
-        return None
-    if isinstance(v, (date, datetime)):
-        return v.isoformat()
-    if isinstance(v, Decimal):
-        return float(v)
-    return v
+def project_to_dict(p: Project, fields: List[str] = PROJECT_FIELDS) -> dict:
+    """Преобразовать Project в словарь (только поля fields)"""
+    return row_to_dict(p, fields)
 
 
-def project_to_dict(p: Project) -> dict:
-    """Преобразовать Project в словарь"""
-    return {key: _serialize_value(getattr(p, key, None)) for key in PROJECT_FIELDS if hasattr(p, key)}
+def project_filters(q=None, status=None, min_completion=None, max_completion=None) -> list:
+    """Условия поиска проектов (общие для /search и /export)"""
+    conditions = []
+    
+    # Поиск по тексту
+    if q:
+        conditions.append(
+            ilike_contains(Project.project_name, q) |
+            ilike_contains(Project.developer_name, q) |
+            ilike_contains(Project.master_developer_name, q)
+        )
+    
+    # Фильтр по статусу
+    if status:
+        conditions.append(Project.project_status == status)
+    
+    # Фильтр по проценту завершения
+    if min_completion is not None:
+        conditions.append(Project.percent_completed >= Decimal(str(min_completion)))
+    
+    if max_completion is not None:
+        conditions.append(Project.percent_completed <= Decimal(str(max_completion)))
+    
+    return conditions
 
 
 @router.get("/latest")
-def get_latest_projects(
+async def get_latest_projects(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить последние N проектов"""
-    projects = db.query(Project).order_by(desc(Project.project_id)).limit(limit).all()
-    return {
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    query = select(Project)
+    projects, next_cursor = await paginate(
+        db, query.options(load_fields(Project, field_list)), PROJECTS_KEYSET, limit, cursor
+    )
+    return FastJSONResponse({
         "total": len(projects),
-        "projects": [project_to_dict(p) for p in projects],
-    }
+        "total_count": await count_rows(db, query, count),
+        "next_cursor": next_cursor,
+        "projects": rows_to_dicts(projects, field_list),
+    })
 
 
 @router.get("/upcoming-completions")
-def get_upcoming_completion_projects(
+async def get_upcoming_completion_projects(
     months_ahead: int = Query(6, ge=1, le=24, description="Количество месяцев вперед"),
     area_id: int = Query(None, description="Фильтр по району"),
     developer_id: int = Query(None, description="Фильтр по застройщику"),
     status: str = Query(None, description="Фильтр по статусу проекта"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Получить проекты с ожидаемой датой завершения в указанном диапазоне.
@@ -96,7 +131,10 @@ def get_upcoming_completion_projects(
         else_=Project.project_end_date
     )
     
-    query = db.query(Project).add_columns(completion_date_expr.label('effective_completion_date'))
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    query = select(Project, completion_date_expr.label('effective_completion_date')).options(
+        load_fields(Project, field_list)
+    )
     
     # Фильтр по дате завершения
     query = query.filter(
@@ -117,15 +155,16 @@ def get_upcoming_completion_projects(
         query = query.filter(Project.project_status == status)
     
     # Выполняем запрос
-    results = query.order_by(completion_date_expr).all()
+    result = await db.execute(query.order_by(completion_date_expr))
+    results = result.all()
     
     projects = []
     for project, effective_date in results:
-        project_dict = project_to_dict(project)
+        project_dict = project_to_dict(project, field_list)
         project_dict['effective_completion_date'] = effective_date.isoformat() if effective_date else None
         projects.append(project_dict)
     
-    return {
+    return FastJSONResponse({
         "total": len(projects),
         "from_date": today.isoformat(),
         "to_date": end_date.isoformat(),
@@ -136,22 +175,23 @@ def get_upcoming_completion_projects(
             "status": status
         },
         "projects": projects
-    }
+    })
 
 
 @router.get("/status-summary")
-def get_projects_status_summary(
-    db: Session = Depends(get_db),
+async def get_projects_status_summary(
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Получить сводку по статусам проектов"""
     # Группировка по статусу
-    status_summary = db.query(
+    result = await db.execute(select(
         Project.project_status,
         func.count(Project.project_id).label('count')
-    ).group_by(Project.project_status).all()
+    ).group_by(Project.project_status))
+    status_summary = result.all()
     
     # Общее количество проектов
-    total_count = db.query(func.count(Project.project_id)).scalar()
+    total_count = await db.scalar(select(func.count(Project.project_id)))
     
     return {
         "total_projects": total_count,
@@ -163,133 +203,129 @@ def get_projects_status_summary(
 
 
 @router.get("/by-developer/{developer_id}")
-def get_projects_by_developer(
+async def get_projects_by_developer(
     developer_id: int,
     status: str = Query(None, description="Фильтр по статусу"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить все проекты указанного застройщика"""
-    query = db.query(Project).filter(Project.developer_id == developer_id)
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    query = select(Project).options(load_fields(Project, field_list)).filter(Project.developer_id == developer_id)
     
     if status:
         query = query.filter(Project.project_status == status)
     
-    projects = query.order_by(Project.project_id).all()
+    result = await db.execute(query.order_by(Project.project_id))
+    projects = result.scalars().all()
     
-    return {
+    return FastJSONResponse({
         "developer_id": developer_id,
         "total": len(projects),
-        "projects": [project_to_dict(p) for p in projects]
-    }
+        "projects": rows_to_dicts(projects, field_list)
+    })
 
 
 @router.get("/by-area/{area_id}")
-def get_projects_by_area(
+async def get_projects_by_area(
     area_id: int,
     status: str = Query(None, description="Фильтр по статусу"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить все проекты в указанном районе"""
-    query = db.query(Project).filter(Project.area_id == area_id)
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    query = select(Project).options(load_fields(Project, field_list)).filter(Project.area_id == area_id)
     
     if status:
         query = query.filter(Project.project_status == status)
     
-    projects = query.order_by(Project.project_id).all()
+    result = await db.execute(query.order_by(Project.project_id))
+    projects = result.scalars().all()
     
-    return {
+    return FastJSONResponse({
         "area_id": area_id,
         "total": len(projects),
-        "projects": [project_to_dict(p) for p in projects]
-    }
+        "projects": rows_to_dicts(projects, field_list)
+    })
 
 
 @router.get("/search")
-def search_projects(
+async def search_projects(
     q: str = Query(None, description="Поиск по названию проекта или застройщика"),
     status: str = Query(None, description="Фильтр по статусу"),
     min_completion: float = Query(None, ge=0, le=100, description="Минимальный процент завершения"),
     max_completion: float = Query(None, ge=0, le=100, description="Максимальный процент завершения"),
     limit: int = Query(50, ge=1, le=500, description="Лимит результатов"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Поиск проектов по различным критериям"""
-    query = db.query(Project)
-    
-    # Поиск по тексту
-    if q:
-        search_pattern = f"%{q}%"
-        query = query.filter(
-            (Project.project_name.ilike(search_pattern)) |
-            (Project.developer_name.ilike(search_pattern)) |
-            (Project.master_developer_name.ilike(search_pattern))
-        )
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    query = select(Project).where(*project_filters(q, status, min_completion, max_completion))
     
-    # Фильтр по статусу
-    if status:
-        query = query.filter(Project.project_status == status)
-    
-    # Фильтр по проценту завершения
-    if min_completion is not None:
-        query = query.filter(Project.percent_completed >= Decimal(str(min_completion)))
-    
-    if max_completion is not None:
-        query = query.filter(Project.percent_completed <= Decimal(str(max_completion)))
-    
-    projects = query.order_by(desc(Project.project_id)).limit(limit).all()
+    projects, next_cursor = await paginate(
+        db, query.options(load_fields(Project, field_list)), PROJECTS_KEYSET, limit, cursor
+    )
     
-    return {
+    return FastJSONResponse({
         "total_found": len(projects),
+        "total_count": await count_rows(db, query, count),
+        "next_cursor": next_cursor,
         "search_params": {
             "query": q,
             "status": status,
             "min_completion": min_completion,
             "max_completion": max_completion
         },
-        "projects": [project_to_dict(p) for p in projects]
-    }
+        "projects": rows_to_dicts(projects, field_list)
+    })
 
 
 @router.get("/areas/with-projects")
-def get_areas_with_projects(
-    db: Session = Depends(get_db),
+async def get_areas_with_projects(
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Получить список районов с количеством проектов в каждом"""
-    # Используем LkpArea для получения полного списка районов
-    areas_with_counts = db.query(
-        LkpArea.area_id,
-        LkpArea.name_en,
-        LkpArea.name_ar,
+    # Полный список районов - из справочника в памяти, из БД только число проектов по area_id
+    areas = await lookups.get("lkp_areas")
+    result = await db.execute(select(
+        Project.area_id,
         func.count(Project.project_id).label('project_count')
-    ).outerjoin(
-        Project, LkpArea.area_id == Project.area_id
+    ).filter(
+        Project.area_id.isnot(None)
     ).group_by(
-        LkpArea.area_id, LkpArea.name_en, LkpArea.name_ar
-    ).order_by(
-        LkpArea.name_en
-    ).all()
+        Project.area_id
+    ))
+    project_counts = {int(area_id): project_count for area_id, project_count in result.all()}
     
-    return {
-        "total_areas": len(areas_with_counts),
+    # Как ORDER BY name_en в PostgreSQL: районы без названия в конце
+    rows = sorted(areas.rows, key=lambda area: (area["name_en"] is None, area["name_en"] or ""))
+    
+    return FastJSONResponse({
+        "total_areas": len(rows),
         "areas": [
             {
-                "area_id": area_id,
-                "name_en": name_en,
-                "name_ar": name_ar,
-                "project_count": project_count
+                "area_id": area["area_id"],
+                "name_en": area["name_en"],
+                "name_ar": area["name_ar"],
+                "project_count": project_counts.get(area["area_id"], 0)
             }
-            for area_id, name_en, name_ar, project_count in areas_with_counts
+            for area in rows
         ]
-    }
+    })
 
 
 @router.get("/developers/with-projects")
-def get_developers_with_projects(
+@analytics_cache.cached("projects")
+async def get_developers_with_projects(
     limit: int = Query(20, ge=1, le=100, description="Лимит застройщиков"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Получить список застройщиков с количеством проектов"""
-    developers = db.query(
+    result = await db.execute(select(
         Project.developer_id,
         Project.developer_name,
         func.count(Project.project_id).label('project_count')
@@ -299,7 +335,8 @@ def get_developers_with_projects(
         Project.developer_id, Project.developer_name
     ).order_by(
         desc('project_count')
-    ).limit(limit).all()
+    ).limit(limit))
+    developers = result.all()
     
     return {
         "total": len(developers),
@@ -314,32 +351,54 @@ def get_developers_with_projects(
     }
 
 
+@router.get("/export")
+async def export_projects(
+    format: ExportFormat = Query("ndjson", description=f"Формат выгрузки: {', '.join(EXPORT_FORMATS)}"),
+    q: str = Query(None, description="Поиск по названию проекта или застройщика"),
+    status: str = Query(None, description="Фильтр по статусу"),
+    min_completion: float = Query(None, ge=0, le=100, description="Минимальный процент завершения"),
+    max_completion: float = Query(None, ge=0, le=100, description="Максимальный процент завершения"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+):
+    """Потоковая выгрузка всех проектов по фильтрам /search (без лимита)"""
+    return export_response(
+        model_columns(Project, parse_fields(fields, PROJECT_FIELDS)),
+        project_filters(q, status, min_completion, max_completion),
+        format,
+        "projects",
+    )
+
+
 @router.get("/{project_id}")
-def get_project_by_id(
+async def get_project_by_id(
     project_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить проект по ID"""
-    project = db.query(Project).filter(Project.project_id == project_id).first()
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    project = await db.get(Project, project_id, options=[load_fields(Project, field_list)])
     if not project:
         raise HTTPException(status_code=404, detail="Проект не найден")
-    return project_to_dict(project)
+    return FastJSONResponse(project_to_dict(project, field_list))
 
 
 @router.get("/{project_id}/similar")
-def get_similar_projects(
+async def get_similar_projects(
     project_id: int,
     limit: int = Query(5, ge=1, le=20, description="Количество похожих проектов"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: project_id,project_name,project_status"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить похожие проекты (по району и застройщику)"""
     # Сначала находим текущий проект
-    current_project = db.query(Project).filter(Project.project_id == project_id).first()
+    current_project = await db.get(Project, project_id)
     if not current_project:
         raise HTTPException(status_code=404, detail="Проект не найден")
     
     # Ищем похожие проекты
-    query = db.query(Project).filter(
+    field_list = parse_fields(fields, PROJECT_FIELDS)
+    query = select(Project).options(load_fields(Project, field_list)).filter(
         Project.project_id != project_id,
         Project.project_status == current_project.project_status
     )
@@ -351,10 +410,11 @@ def get_similar_projects(
     if current_project.developer_id:
         query = query.filter(Project.developer_id == current_project.developer_id)
     
-    similar_projects = query.order_by(desc(Project.project_id)).limit(limit).all()
+    result = await db.execute(query.order_by(desc(Project.project_id)).limit(limit))
+    similar_projects = result.scalars().all()
     
-    return {
+    return FastJSONResponse({
         "current_project_id": project_id,
         "similar_projects_found": len(similar_projects),
-        "similar_projects": [project_to_dict(p) for p in similar_projects]
-    }
\ No newline at end of file
+        "similar_projects": rows_to_dicts(similar_projects, field_list)
+    })
\ No newline at end of file
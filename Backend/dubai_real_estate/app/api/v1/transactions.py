@@ -3,14 +3,22 @@ from decimal import Decimal
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_, or_, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, and_, or_, case, select
 
-from app.database.connection import get_db
+from app.api.dependencies import ilike_contains, load_fields, model_columns, parse_fields
+from app.api.export import EXPORT_FORMATS, ExportFormat, export_response
+from app.api.pagination import CountMode, Keyset, count_rows, paginate
+from app.api.response_cache import analytics_cache
+from app.api.serializers import FastJSONResponse, row_to_dict, rows_to_dicts
+from app.database.connection import get_async_db, get_analytics_db
 from app.database.models import Transaction, Unit
 
 router = APIRouter()
 
+# Порядок выдачи списков транзакций: новые сверху, равные даты - по transaction_id
+TRANSACTIONS_KEYSET = Keyset(Transaction.transaction_id, sort_column=Transaction.instance_date, descending=True)
+
 TRANSACTION_FIELDS = [
     "transaction_id",
     "instance_date",
@@ -71,77 +79,110 @@ TRANSACTION_FIELDS = [
 ]
 
 
-def _serialize_value(v):
-    """Сериализация значений для JSON"""
-    if v is None:
-        return None
-    if isinstance(v, (date, datetime)):
-        return v.isoformat()
-    if isinstance(v, Decimal):
-        return float(v)
-    return v
+def transaction_to_dict(t: Transaction, fields: List[str] = TRANSACTION_FIELDS) -> dict:
+    """Преобразовать Transaction в словарь (только поля fields)"""
+    return row_to_dict(t, fields)
 
 
-def transaction_to_dict(t: Transaction) -> dict:
-    """Преобразовать Transaction в словарь"""
-    return {key: _serialize_value(getattr(t, key, None)) for key in TRANSACTION_FIELDS if hasattr(t, key)}
+def transaction_filters(
+    area_id=None,
+    building_name=None,
+    project_number=None,
+    min_price=None,
+    max_price=None,
+    transaction_type=None,
+    date_from=None,
+    date_to=None,
+) -> list:
+    """Условия поиска транзакций (общие для /by-property и /export)"""
+    conditions = []
+    
+    if area_id:
+        conditions.append(Transaction.area_id == area_id)
+    
+    if building_name:
+        conditions.append(
+            or_(
+                ilike_contains(Transaction.building_name_en, building_name),
+                ilike_contains(Transaction.building_name_ar, building_name),
+            )
+        )
+    
+    if project_number:
+        conditions.append(Transaction.project_number == project_number)
+    
+    if min_price is not None:
+        conditions.append(Transaction.trans_value >= Decimal(str(min_price)))
+    
+    if max_price is not None:
+        conditions.append(Transaction.trans_value <= Decimal(str(max_price)))
+    
+    if transaction_type:
+        conditions.append(Transaction.trans_group_en == transaction_type)
+    
+    if date_from:
+        conditions.append(Transaction.instance_date >= date_from)
+    
+    if date_to:
+        conditions.append(Transaction.instance_date <= date_to)
+    
+    return conditions
 
 
 @router.get("/latest")
-def get_latest_transactions(
+async def get_latest_transactions(
     limit: int = Query(50, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: transaction_id,instance_date,trans_value"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить последние транзакции"""
-    transactions = db.query(Transaction).order_by(desc(Transaction.instance_date)).limit(limit).all()
-    return {
+    field_list = parse_fields(fields, TRANSACTION_FIELDS)
+    query = select(Transaction)
+    transactions, next_cursor = await paginate(
+        db, query.options(load_fields(Transaction, field_list, *TRANSACTIONS_KEYSET.columns)),
+        TRANSACTIONS_KEYSET, limit, cursor
+    )
+    return FastJSONResponse({
         "total": len(transactions),
-        "transactions": [transaction_to_dict(t) for t in transactions],
-    }
+        "total_count": await count_rows(db, query, count),
+        "next_cursor": next_cursor,
+        "transactions": rows_to_dicts(transactions, field_list),
+    })
 
 
 @router.get("/by-property")
-def get_transactions_by_property_info(
+async def get_transactions_by_property_info(
     area_id: Optional[int] = Query(None, description="ID района"),
     building_name: Optional[str] = Query(None, description="Название здания"),
     project_number: Optional[int] = Query(None, description="Номер проекта"),
     min_price: Optional[float] = Query(None, ge=0, description="Минимальная цена"),
     max_price: Optional[float] = Query(None, ge=0, description="Максимальная цена"),
     transaction_type: Optional[str] = Query(None, description="Тип транзакции (Sales, Mortgages, Gifts)"),
+    date_from: Optional[date] = Query(None, description="Дата транзакции с (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Дата транзакции по (YYYY-MM-DD)"),
     limit: int = Query(100, ge=1, le=500, description="Лимит результатов"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: transaction_id,instance_date,trans_value"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Поиск транзакций по характеристикам недвижимости"""
-    query = db.query(Transaction)
-    
-    # Фильтры
-    if area_id:
-        query = query.filter(Transaction.area_id == area_id)
+    field_list = parse_fields(fields, TRANSACTION_FIELDS)
+    query = select(Transaction).where(*transaction_filters(
+        area_id, building_name, project_number, min_price, max_price, transaction_type, date_from, date_to
+    ))
     
-    if building_name:
-        query = query.filter(
-            or_(
-                Transaction.building_name_en.ilike(f"%{building_name}%"),
-                Transaction.building_name_ar.ilike(f"%{building_name}%"),
-            )
-        )
-    
-    if project_number:
-        query = query.filter(Transaction.project_number == project_number)
-    
-    if min_price is not None:
-        query = query.filter(Transaction.trans_value >= Decimal(str(min_price)))
-    
-    if max_price is not None:
-        query = query.filter(Transaction.trans_value <= Decimal(str(max_price)))
-    
-    if transaction_type:
-        query = query.filter(Transaction.trans_group_en == transaction_type)
-    
-    transactions = query.order_by(desc(Transaction.instance_date)).limit(limit).all()
+    transactions, next_cursor = await paginate(
+        db, query.options(load_fields(Transaction, field_list, *TRANSACTIONS_KEYSET.columns)),
+        TRANSACTIONS_KEYSET, limit, cursor
+    )
     
-    return {
+    return FastJSONResponse({
         "total_found": len(transactions),
+        "total_count": await count_rows(db, query, count),
+        "next_cursor": next_cursor,
         "filters": {
             "area_id": area_id,
             "building_name": building_name,
@@ -149,23 +190,50 @@ def get_transactions_by_property_info(
             "min_price": min_price,
             "max_price": max_price,
             "transaction_type": transaction_type,
+            "date_from": date_from,
+            "date_to": date_to,
         },
-        "transactions": [transaction_to_dict(t) for t in transactions],
-    }
+        "transactions": rows_to_dicts(transactions, field_list),
+    })
+
+
+@router.get("/export")
+async def export_transactions(
+    format: ExportFormat = Query("ndjson", description=f"Формат выгрузки: {', '.join(EXPORT_FORMATS)}"),
+    area_id: Optional[int] = Query(None, description="ID района"),
+    building_name: Optional[str] = Query(None, description="Название здания"),
+    project_number: Optional[int] = Query(None, description="Номер проекта"),
+    min_price: Optional[float] = Query(None, ge=0, description="Минимальная цена"),
+    max_price: Optional[float] = Query(None, ge=0, description="Максимальная цена"),
+    transaction_type: Optional[str] = Query(None, description="Тип транзакции (Sales, Mortgages, Gifts)"),
+    date_from: Optional[date] = Query(None, description="Дата транзакции с (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Дата транзакции по (YYYY-MM-DD)"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: transaction_id,instance_date,trans_value"),
+):
+    """Потоковая выгрузка всех транзакций по фильтрам /by-property (без лимита)"""
+    return export_response(
+        model_columns(Transaction, parse_fields(fields, TRANSACTION_FIELDS)),
+        transaction_filters(
+            area_id, building_name, project_number, min_price, max_price, transaction_type, date_from, date_to
+        ),
+        format,
+        "transactions",
+    )
 
 
 @router.get("/price-trends")
-def get_price_trends(
+@analytics_cache.cached("transactions")
+async def get_price_trends(
     area_id: Optional[int] = Query(None, description="ID района"),
     property_type: Optional[str] = Query(None, description="Тип недвижимости"),
     months_back: int = Query(12, ge=1, le=60, description="Количество месяцев назад"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Получить тренды цен по месяцам"""
     today = date.today()
     start_date = today - timedelta(days=months_back * 30)
     
-    query = db.query(
+    query = select(
         func.date_trunc('month', Transaction.instance_date).label('month'),
         func.avg(Transaction.meter_sale_price).label('avg_price_per_sqm'),
         func.count(Transaction.transaction_id).label('transaction_count'),
@@ -183,11 +251,12 @@ def get_price_trends(
     if property_type:
         query = query.filter(Transaction.property_type_en == property_type)
     
-    trends = query.group_by(
+    result = await db.execute(query.group_by(
         func.date_trunc('month', Transaction.instance_date)
     ).order_by(
         func.date_trunc('month', Transaction.instance_date)
-    ).all()
+    ))
+    trends = result.all()
     
     return {
         "period": {
@@ -212,12 +281,14 @@ def get_price_trends(
 
 
 @router.get("/{transaction_id}")
-def get_transaction_by_id(
+async def get_transaction_by_id(
     transaction_id: str,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: transaction_id,instance_date,trans_value"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить транзакцию по ID"""
-    transaction = db.query(Transaction).filter(Transaction.transaction_id == transaction_id).first()
+    field_list = parse_fields(fields, TRANSACTION_FIELDS)
+    transaction = await db.get(Transaction, transaction_id, options=[load_fields(Transaction, field_list)])
     if not transaction:
         raise HTTPException(status_code=404, detail="Транзакция не найдена")
-    return transaction_to_dict(transaction)
\ No newline at end of file
+    return FastJSONResponse(transaction_to_dict(transaction, field_list))
\ No newline at end of file
@@ -4,15 +4,58 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from app.api.v1.transactions import transaction_to_dict
-from sqlalchemy.orm import Session, aliased
-from sqlalchemy import desc, func, and_, or_, case, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy import desc, func, and_, or_, case, text, select
 from sqlalchemy.sql import exists
 
-from app.database.connection import get_db
-from app.database.models import Unit, Transaction, Valuation, Project
+from app.api.dependencies import ilike_contains, load_fields, model_columns, parse_fields
+from app.api.export import EXPORT_FORMATS, ExportFormat, export_response
+from app.api.lookups import lookups
+from app.api.pagination import CountMode, Keyset, count_rows, paginate
+from app.api.response_cache import analytics_cache
+from app.api.serializers import FastJSONResponse, row_to_dict, rows_to_dicts
+from app.database.connection import get_async_db, get_analytics_db
+from app.database.models import (
+    DIM_PROPERTY_TYPES,
+    DIM_TRANSACTION_GROUPS,
+    TRANSACTION_STORAGE,
+    Project,
+    Transaction,
+    Unit,
+    Valuation,
+)
 
 router = APIRouter()
 
+# Колонки, которые читает статистика /by-project помимо запрошенных fields
+UNIT_STATISTICS_COLUMNS = [
+    Unit.property_type_en,
+    Unit.property_sub_type_en,
+    Unit.building_number,
+    Unit.rooms,
+    Unit.actual_area,
+    Unit.floor,
+    Unit.unit_parking_number,
+    Unit.is_free_hold,
+    Unit.is_lease_hold,
+    Unit.is_registered,
+]
+
+# Сравнимые продажи /price-estimate читаются из таблицы фактов по кодам измерений,
+# а не через представление transactions: все колонки есть в idx_transactions_comparables
+COMPARABLES_FACT = TRANSACTION_STORAGE.table
+COMPARABLES_COLUMNS = [
+    COMPARABLES_FACT.c.transaction_id,
+    COMPARABLES_FACT.c.instance_date,
+    COMPARABLES_FACT.c.meter_sale_price,
+    COMPARABLES_FACT.c.trans_value,
+    COMPARABLES_FACT.c.actual_area_sqm,
+]
+
+# Порядок выдачи списков юнитов по умолчанию: больший property_id сверху
+UNITS_KEYSET = Keyset(Unit.property_id, descending=True)
+
 # Поля юнита в правильном порядке
 UNIT_FIELDS = [
     "property_id",
@@ -64,49 +107,107 @@ UNIT_FIELDS = [
 ]
 
 
-def _serialize_value(v):
-    """Сериализация значений для JSON"""
-    if v is None:
-        return None
-    if isinstance(v, (date, datetime)):
-        return v.isoformat()
-    if isinstance(v, Decimal):
-        return float(v)
-    return v
+def unit_to_dict(u: Unit, fields: List[str] = UNIT_FIELDS) -> dict:
+    """Преобразовать Unit в словарь (только поля fields)"""
+    return row_to_dict(u, fields)
 
 
-def unit_to_dict(u: Unit) -> dict:
-    """Преобразовать Unit в словарь"""
-    return {key: _serialize_value(getattr(u, key, None)) for key in UNIT_FIELDS if hasattr(u, key)}
+def unit_filters(
+    area_id=None,
+    min_area=None,
+    max_area=None,
+    min_rooms=None,
+    max_rooms=None,
+    property_type=None,
+    project_id=None,
+    has_parking=None,
+    is_freehold=None,
+) -> list:
+    """Условия поиска юнитов (общие для /search и /export)"""
+    conditions = []
+    
+    if area_id:
+        conditions.append(Unit.area_id == area_id)
+    
+    if min_area is not None:
+        conditions.append(Unit.actual_area >= Decimal(str(min_area)))
+    
+    if max_area is not None:
+        conditions.append(Unit.actual_area <= Decimal(str(max_area)))
+    
+    if min_rooms is not None:
+        conditions.append(Unit.rooms >= min_rooms)
+    
+    if max_rooms is not None:
+        conditions.append(Unit.rooms <= max_rooms)
+    
+    if property_type:
+        conditions.append(
+            or_(
+                Unit.property_type_en == property_type,
+                Unit.property_sub_type_en == property_type
+            )
+        )
+    
+    if project_id:
+        conditions.append(Unit.project_id == project_id)
+    
+    if has_parking is not None:
+        if has_parking:
+            conditions.append(
+                and_(
+                    Unit.unit_parking_number.isnot(None),
+                    Unit.unit_parking_number != '',
+                    Unit.unit_parking_number != '0'
+                )
+            )
+        else:
+            conditions.append(
+                or_(
+                    Unit.unit_parking_number.is_(None),
+                    Unit.unit_parking_number == '',
+                    Unit.unit_parking_number == '0'
+                )
+            )
+    
+    if is_freehold is not None:
+        conditions.append(Unit.is_free_hold == (1 if is_freehold else 0))
+    
+    return conditions
 
 
 @router.get("/latest")
-def get_latest_units(
+async def get_latest_units(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
     include_transactions: bool = Query(False, description="Включить последние транзакции"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,unit_number,actual_area,rooms"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить последние N юнитов"""
-    units = db.query(Unit).order_by(desc(Unit.property_id)).limit(limit).all()
+    field_list = parse_fields(fields, UNIT_FIELDS)
+    extra_columns = [Unit.area_id, Unit.building_number, Unit.rooms_en] if include_transactions else []
+    query = select(Unit).options(load_fields(Unit, field_list, *UNITS_KEYSET.columns, *extra_columns))
+    units, next_cursor = await paginate(db, query, UNITS_KEYSET, limit, cursor)
     
     result = []
     for unit in units:
-        unit_data = unit_to_dict(unit)
+        unit_data = unit_to_dict(unit, field_list)
         
         if include_transactions and unit.area_id and unit.building_number:
             # Ищем похожие транзакции
-            similar_transactions = db.query(Transaction).filter(
+            similar_transactions = (await db.execute(select(Transaction).filter(
                 and_(
                     Transaction.area_id == unit.area_id,
                     or_(
-                        Transaction.building_name_en.ilike(f"%{unit.building_number}%"),
+                        ilike_contains(Transaction.building_name_en, unit.building_number),
                         and_(
                             Transaction.rooms_en.isnot(None),
                             Transaction.rooms_en == unit.rooms_en
                         )
                     )
                 )
-            ).order_by(desc(Transaction.instance_date)).limit(5).all()
+            ).order_by(desc(Transaction.instance_date)).limit(5))).scalars().all()
             
             unit_data["recent_transactions"] = [
                 {
@@ -121,28 +222,56 @@ def get_latest_units(
         
         result.append(unit_data)
     
-    return {"total": len(result), "units": result}
+    return FastJSONResponse({"total": len(result), "next_cursor": next_cursor, "units": result})
+
+
+@router.get("/export")
+async def export_units(
+    format: ExportFormat = Query("ndjson", description=f"Формат выгрузки: {', '.join(EXPORT_FORMATS)}"),
+    area_id: Optional[int] = Query(None, description="ID района"),
+    min_area: Optional[float] = Query(None, ge=0, description="Минимальная площадь"),
+    max_area: Optional[float] = Query(None, ge=0, description="Максимальная площадь"),
+    min_rooms: Optional[int] = Query(None, ge=0, description="Минимальное количество комнат"),
+    max_rooms: Optional[int] = Query(None, ge=0, description="Максимальное количество комнат"),
+    property_type: Optional[str] = Query(None, description="Тип недвижимости"),
+    project_id: Optional[int] = Query(None, description="ID проекта"),
+    has_parking: Optional[bool] = Query(None, description="Наличие парковки"),
+    is_freehold: Optional[bool] = Query(None, description="Freehold собственность"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,unit_number,actual_area,rooms"),
+):
+    """Потоковая выгрузка всех юнитов по фильтрам /search (без лимита)"""
+    return export_response(
+        model_columns(Unit, parse_fields(fields, UNIT_FIELDS)),
+        unit_filters(
+            area_id, min_area, max_area, min_rooms, max_rooms, property_type, project_id, has_parking, is_freehold
+        ),
+        format,
+        "units",
+    )
 
 
 @router.get("/{property_id}")
-def get_unit_by_id(
+async def get_unit_by_id(
     property_id: int,
     include_details: bool = Query(True, description="Включить подробную информацию"),
     include_transactions: bool = Query(False, description="Включить историю транзакций"),
     include_valuation: bool = Query(False, description="Включить данные оценки"),
     include_project: bool = Query(False, description="Включить информацию о проекте"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,unit_number,actual_area,rooms"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить юнит по ID с дополнительной информацией"""
-    unit = db.query(Unit).filter(Unit.property_id == property_id).first()
+    field_list = parse_fields(fields, UNIT_FIELDS)
+    # Одна строка, а расчеты ниже читают много колонок - юнит грузится целиком
+    unit = await db.get(Unit, property_id)
     if not unit:
         raise HTTPException(status_code=404, detail="Юнит не найден")
     
-    result = unit_to_dict(unit)
+    result = unit_to_dict(unit, field_list)
     
     # Дополнительная информация о проекте
     if include_project and unit.project_id:
-        project = db.query(Project).filter(Project.project_id == unit.project_id).first()
+        project = await db.get(Project, unit.project_id)
         if project:
             result["project_details"] = {
                 "project_name": project.project_name,
@@ -160,12 +289,12 @@ def get_unit_by_id(
         # Поиск транзакций по различным критериям
         if unit.building_number and unit.area_id:
             # 1. По зданию и району
-            building_transactions = db.query(Transaction).filter(
+            building_transactions = (await db.execute(select(Transaction).filter(
                 and_(
                     Transaction.area_id == unit.area_id,
-                    Transaction.building_name_en.ilike(f"%{unit.building_number}%")
+                    ilike_contains(Transaction.building_name_en, unit.building_number)
                 )
-            ).order_by(desc(Transaction.instance_date)).limit(20).all()
+            ).order_by(desc(Transaction.instance_date)).limit(20))).scalars().all()
             
             for t in building_transactions:
                 transactions.append({
@@ -180,9 +309,9 @@ def get_unit_by_id(
         
         if unit.project_id:
             # 2. По проекту
-            project_transactions = db.query(Transaction).filter(
+            project_transactions = (await db.execute(select(Transaction).filter(
                 Transaction.project_number == unit.project_id
-            ).order_by(desc(Transaction.instance_date)).limit(10).all()
+            ).order_by(desc(Transaction.instance_date)).limit(10))).scalars().all()
             
             for t in project_transactions:
                 if t.transaction_id not in [tr["transaction_id"] for tr in transactions]:
@@ -198,7 +327,7 @@ def get_unit_by_id(
         
         if unit.actual_area and unit.rooms:
             # 3. По площади и количеству комнат (примерные совпадения)
-            area_transactions = db.query(Transaction).filter(
+            area_transactions = (await db.execute(select(Transaction).filter(
                 and_(
                     Transaction.actual_area_sqm.between(
                         float(unit.actual_area) * 0.8, 
@@ -206,7 +335,7 @@ def get_unit_by_id(
                     ) if unit.actual_area else True,
                     Transaction.rooms_en == unit.rooms_en if unit.rooms_en else True
                 )
-            ).order_by(desc(Transaction.instance_date)).limit(5).all()
+            ).order_by(desc(Transaction.instance_date)).limit(5))).scalars().all()
             
             for t in area_transactions:
                 if t.transaction_id not in [tr["transaction_id"] for tr in transactions]:
@@ -227,7 +356,7 @@ def get_unit_by_id(
     # Данные оценки
     if include_valuation and unit.area_id and unit.actual_area:
         # Ищем оценки для похожих объектов в том же районе
-        valuations = db.query(Valuation).filter(
+        valuations = (await db.execute(select(Valuation).filter(
             and_(
                 Valuation.area_id == unit.area_id,
                 Valuation.property_type_en == unit.property_type_en,
@@ -236,7 +365,7 @@ def get_unit_by_id(
                     float(unit.actual_area) * 1.3
                 ) if unit.actual_area else True
             )
-        ).order_by(desc(Valuation.instance_date)).limit(5).all()
+        ).order_by(desc(Valuation.instance_date)).limit(5))).scalars().all()
         
         result["valuation_comparables"] = [
             {
@@ -266,11 +395,11 @@ def get_unit_by_id(
                     "confidence": "medium" if len(sale_transactions) >= 3 else "low"
                 }
     
-    return result
+    return FastJSONResponse(result)
 
 
 @router.get("/by-project/{project_id}")
-def get_units_by_project(
+async def get_units_by_project(
     project_id: int,
     building_number: Optional[str] = Query(None, description="Фильтр по номеру здания в проекте"),
     property_type: Optional[str] = Query(None, description="Тип недвижимости (apartment, office, shop и т.д.)"),
@@ -287,31 +416,33 @@ def get_units_by_project(
     include_transactions: bool = Query(False, description="Включить последние транзакции по проекту"),
     sort_by: str = Query("unit_number", description="Сортировка: unit_number, actual_area, rooms, floor, building_number"),
     sort_order: str = Query("asc", description="Порядок сортировки: asc, desc"),
-    page: int = Query(1, ge=1, description="Номер страницы"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("estimate", description="Общее количество юнитов: none, estimate, exact"),
     limit: int = Query(50, ge=1, le=200, description="Количество записей на странице"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,unit_number,actual_area,rooms"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Получить все юниты в проекте с расширенной фильтрацией"""
     
     # Сначала проверяем существование проекта
-    project = db.query(Project).filter(Project.project_id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Проект не найден")
     
     # Начинаем с базового запроса по project_id
-    query = db.query(Unit).filter(Unit.project_id == project_id)
+    query = select(Unit).filter(Unit.project_id == project_id)
     
     # Дополнительные фильтры
     if building_number:
-        query = query.filter(Unit.building_number.ilike(f"%{building_number}%"))
+        query = query.filter(ilike_contains(Unit.building_number, building_number))
     
     if property_type:
         query = query.filter(
             or_(
-                Unit.property_type_en.ilike(f"%{property_type}%"),
-                Unit.property_sub_type_en.ilike(f"%{property_type}%"),
-                Unit.property_type_ar.ilike(f"%{property_type}%"),
-                Unit.property_sub_type_ar.ilike(f"%{property_type}%")
+                ilike_contains(Unit.property_type_en, property_type),
+                ilike_contains(Unit.property_sub_type_en, property_type),
+                ilike_contains(Unit.property_type_ar, property_type),
+                ilike_contains(Unit.property_sub_type_ar, property_type)
             )
         )
     
@@ -362,29 +493,29 @@ def get_units_by_project(
             query = query.filter(Unit.floor == floor)
     
     if unit_number:
-        query = query.filter(Unit.unit_number.ilike(f"%{unit_number}%"))
+        query = query.filter(ilike_contains(Unit.unit_number, unit_number))
     
-    # Подсчет общего количества
-    total_count = query.count()
+    # Подсчет общего количества (по умолчанию - оценка планировщика, без COUNT)
+    total_count = await count_rows(db, query, count)
     
-    # Сортировка
+    # Сортировка: выбранная колонка + property_id для однозначного порядка
     sort_column = {
         "unit_number": Unit.unit_number,
         "actual_area": Unit.actual_area,
         "rooms": Unit.rooms,
         "floor": Unit.floor,
         "building_number": Unit.building_number,
-        "property_id": Unit.property_id
+        "property_id": None
     }.get(sort_by, Unit.unit_number)
+    keyset = Keyset(Unit.property_id, sort_column=sort_column, descending=sort_order.lower() == "desc")
     
-    if sort_order.lower() == "desc":
-        query = query.order_by(desc(sort_column))
-    else:
-        query = query.order_by(sort_column)
+    # Загружаем только запрошенные поля и то, что нужно для курсора и статистики
+    field_list = parse_fields(fields, UNIT_FIELDS)
+    extra_columns = UNIT_STATISTICS_COLUMNS if include_statistics else []
+    page_query = query.options(load_fields(Unit, field_list, *keyset.columns, *extra_columns))
     
-    # Пагинация
-    offset = (page - 1) * limit
-    units = query.offset(offset).limit(limit).all()
+    # Пагинация по курсору: стоимость страницы не зависит от ее глубины
+    units, next_cursor = await paginate(db, page_query, keyset, limit, cursor)
     
     # Основной результат
     result = {
@@ -395,14 +526,13 @@ def get_units_by_project(
             "total_units_in_project": total_count,
             "units_on_page": len(units),
             "pagination": {
-                "page": page,
                 "limit": limit,
-                "total_pages": (total_count + limit - 1) // limit if limit > 0 else 0,
-                "has_previous": page > 1,
-                "has_next": page * limit < total_count
+                "count_mode": count,
+                "next_cursor": next_cursor,
+                "has_next": next_cursor is not None
             }
         },
-        "units": [unit_to_dict(u) for u in units]
+        "units": rows_to_dicts(units, field_list)
     }
     
     # Информация о проекте
@@ -478,9 +608,9 @@ def get_units_by_project(
     # Информация о транзакциях по проекту
     if include_transactions:
         # Получаем транзакции связанные с этим проектом
-        transactions = db.query(Transaction).filter(
+        transactions = (await db.execute(select(Transaction).filter(
             Transaction.project_number == project_id
-        ).order_by(desc(Transaction.instance_date)).limit(20).all()
+        ).order_by(desc(Transaction.instance_date)).limit(20))).scalars().all()
         
         result["project_transactions"] = {
             "total_transactions": len(transactions),
@@ -510,10 +640,10 @@ def get_units_by_project(
             }
         }
     
-    return result
+    return FastJSONResponse(result)
 
 @router.get("/search")
-def search_units(
+async def search_units(
     area_id: Optional[int] = Query(None, description="ID района"),
     min_area: Optional[float] = Query(None, ge=0, description="Минимальная площадь"),
     max_area: Optional[float] = Query(None, ge=0, description="Максимальная площадь"),
@@ -524,63 +654,25 @@ def search_units(
     has_parking: Optional[bool] = Query(None, description="Наличие парковки"),
     is_freehold: Optional[bool] = Query(None, description="Freehold собственность"),
     limit: int = Query(50, ge=1, le=500, description="Лимит результатов"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: property_id,unit_number,actual_area,rooms"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Расширенный поиск юнитов"""
-    query = db.query(Unit)
-    
-    # Применяем фильтры
-    if area_id:
-        query = query.filter(Unit.area_id == area_id)
-    
-    if min_area is not None:
-        query = query.filter(Unit.actual_area >= Decimal(str(min_area)))
+    field_list = parse_fields(fields, UNIT_FIELDS)
+    query = select(Unit).where(*unit_filters(
+        area_id, min_area, max_area, min_rooms, max_rooms, property_type, project_id, has_parking, is_freehold
+    ))
     
-    if max_area is not None:
-        query = query.filter(Unit.actual_area <= Decimal(str(max_area)))
-    
-    if min_rooms is not None:
-        query = query.filter(Unit.rooms >= min_rooms)
-    
-    if max_rooms is not None:
-        query = query.filter(Unit.rooms <= max_rooms)
-    
-    if property_type:
-        query = query.filter(
-            or_(
-                Unit.property_type_en == property_type,
-                Unit.property_sub_type_en == property_type
-            )
-        )
-    
-    if project_id:
-        query = query.filter(Unit.project_id == project_id)
-    
-    if has_parking is not None:
-        if has_parking:
-            query = query.filter(
-                and_(
-                    Unit.unit_parking_number.isnot(None),
-                    Unit.unit_parking_number != '',
-                    Unit.unit_parking_number != '0'
-                )
-            )
-        else:
-            query = query.filter(
-                or_(
-                    Unit.unit_parking_number.is_(None),
-                    Unit.unit_parking_number == '',
-                    Unit.unit_parking_number == '0'
-                )
-            )
-    
-    if is_freehold is not None:
-        query = query.filter(Unit.is_free_hold == (1 if is_freehold else 0))
-    
-    units = query.order_by(desc(Unit.property_id)).limit(limit).all()
+    units, next_cursor = await paginate(
+        db, query.options(load_fields(Unit, field_list, *UNITS_KEYSET.columns)), UNITS_KEYSET, limit, cursor
+    )
     
-    return {
+    return FastJSONResponse({
         "total_found": len(units),
+        "total_count": await count_rows(db, query, count),
+        "next_cursor": next_cursor,
         "filters_applied": {
             "area_id": area_id,
             "min_area": min_area,
@@ -592,19 +684,52 @@ def search_units(
             "has_parking": has_parking,
             "is_freehold": is_freehold
         },
-        "units": [unit_to_dict(u) for u in units]
-    }
+        "units": rows_to_dicts(units, field_list)
+    })
+
+
+async def dimension_codes(db, dimension, name_en):
+    """Коды измерения с английской подписью name_en (арабских вариантов может быть несколько)"""
+    column = dimension.table.c.name_en
+    condition = column.is_(None) if name_en is None else column == name_en
+    return (await db.execute(select(dimension.table.c.code).where(condition))).scalars().all()
+
+
+def code_condition(column, codes, name_en):
+    """column среди codes; для пустой подписи - и строки без кода (как name_en IS NULL в представлении)"""
+    if name_en is None:
+        return or_(column.is_(None), column.in_(codes))
+    return column.in_(codes)
+
+
+def comparables_query(start_date, end_date, min_area, max_area, area_id, sales_codes):
+    """Сравнимые продажи района за период, новые первыми.
+
+    Условие включает COMPARABLES_WHERE частичных индексов, а группа сделки
+    сравнивается по кодам (sales_codes из dim_transaction_groups) - ключевой
+    колонке индекса, без соединения с измерением.
+    """
+    fact = COMPARABLES_FACT.c
+    return select(*COMPARABLES_COLUMNS).where(
+        fact.trans_group_code.in_(sales_codes),
+        fact.meter_sale_price.isnot(None),
+        fact.actual_area_sqm.isnot(None),
+        fact.area_id == area_id,
+        fact.instance_date.between(start_date, end_date),
+        fact.actual_area_sqm.between(min_area, max_area),
+    ).order_by(desc(fact.instance_date))
 
 
 @router.get("/price-estimate/{property_id}")
-def get_price_estimate(
+@analytics_cache.cached("units", "transactions")
+async def get_price_estimate(
     property_id: int,
     comparable_range: float = Query(0.2, ge=0.05, le=0.5, description="Диапазон сравнения (±20% по умолчанию)"),
     months_back: int = Query(12, ge=1, le=60, description="Период анализа в месяцах"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Получить оценку стоимости юнита на основе сравнимых продаж"""
-    unit = db.query(Unit).filter(Unit.property_id == property_id).first()
+    unit = await db.get(Unit, property_id)
     if not unit:
         raise HTTPException(status_code=404, detail="Юнит не найден")
     
@@ -620,33 +745,22 @@ def get_price_estimate(
     end_date = date.today()
     start_date = end_date - timedelta(days=months_back * 30)
     
-    # Ищем сравнимые транзакции
-    comparable_transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.instance_date >= start_date,
-            Transaction.instance_date <= end_date,
-            Transaction.trans_group_en == 'Sales',
-            Transaction.meter_sale_price.isnot(None),
-            Transaction.actual_area_sqm.isnot(None),
-            Transaction.actual_area_sqm.between(min_area, max_area),
-            Transaction.area_id == unit.area_id,
-            Transaction.property_type_en == unit.property_type_en
-        )
-    ).order_by(desc(Transaction.instance_date)).all()
+    # Коды подписей - один раз, дальше запросы идут только по таблице фактов
+    sales_codes = await dimension_codes(db, DIM_TRANSACTION_GROUPS, 'Sales')
+    property_type_codes = await dimension_codes(db, DIM_PROPERTY_TYPES, unit.property_type_en)
+
+    # Ищем сравнимые транзакции: только колонки idx_transactions_comparables (index-only scan)
+    comparable_transactions = (await db.execute(
+        comparables_query(start_date, end_date, min_area, max_area, unit.area_id, sales_codes)
+        .where(code_condition(COMPARABLES_FACT.c.property_type_code, property_type_codes, unit.property_type_en))
+    )).all()
     
     if not comparable_transactions:
-        # Расширяем поиск
-        comparable_transactions = db.query(Transaction).filter(
-            and_(
-                Transaction.instance_date >= start_date,
-                Transaction.instance_date <= end_date,
-                Transaction.trans_group_en == 'Sales',
-                Transaction.meter_sale_price.isnot(None),
-                Transaction.actual_area_sqm.isnot(None),
-                Transaction.actual_area_sqm.between(min_area * 0.8, max_area * 1.2),
-                Transaction.area_id == unit.area_id
-            )
-        ).order_by(desc(Transaction.instance_date)).limit(10).all()
+        # Расширяем поиск (idx_transactions_comparables_area)
+        comparable_transactions = (await db.execute(
+            comparables_query(start_date, end_date, min_area * 0.8, max_area * 1.2, unit.area_id, sales_codes)
+            .limit(10)
+        )).all()
     
     # Анализируем данные
     if comparable_transactions:
@@ -735,16 +849,16 @@ def get_price_estimate(
 
 
 @router.get("/{property_id}/transaction-history")
-def get_unit_transaction_history(
+async def get_unit_transaction_history(
     property_id: int,
     include_related: bool = Query(True, description="Включить связанные транзакции (по тому же зданию)"),
     include_similar: bool = Query(False, description="Включить транзакции похожих юнитов"),
     min_score: int = Query(3, ge=0, le=10, description="Минимальный балл соответствия (0-10)"),
     limit: int = Query(20, ge=1, le=100, description="Лимит результатов"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Получить историю транзакций для конкретного юнита"""
-    unit = db.query(Unit).filter(Unit.property_id == property_id).first()
+    unit = await db.get(Unit, property_id)
     if not unit:
         raise HTTPException(status_code=404, detail="Юнит не найден")
     
@@ -769,12 +883,12 @@ def get_unit_transaction_history(
     # 1. Попробуем найти прямые соответствия по различным критериям
     if unit.building_number and unit.area_id:
         # Ищем транзакции в том же здании и районе
-        building_query = db.query(Transaction).filter(
+        building_query = select(Transaction).filter(
             and_(
                 Transaction.area_id == unit.area_id,
                 or_(
-                    Transaction.building_name_en.ilike(f"%{unit.building_number}%"),
-                    Transaction.building_name_ar.ilike(f"%{unit.building_number}%")
+                    ilike_contains(Transaction.building_name_en, unit.building_number),
+                    ilike_contains(Transaction.building_name_ar, unit.building_number)
                 )
             )
         )
@@ -782,11 +896,12 @@ def get_unit_transaction_history(
         # Фильтруем по этажу (если указан этаж юнита)
         if unit.floor and unit.floor.isdigit():
             building_query = building_query.filter(
-                Transaction.building_name_en.ilike(f"%{unit.floor}%") |
-                Transaction.building_name_ar.ilike(f"%{unit.floor}%")
+                ilike_contains(Transaction.building_name_en, unit.floor) |
+                ilike_contains(Transaction.building_name_ar, unit.floor)
             )
         
-        building_tx = building_query.order_by(desc(Transaction.instance_date)).limit(50).all()
+        result = await db.execute(building_query.order_by(desc(Transaction.instance_date)).limit(50))
+        building_tx = result.scalars().all()
         
         for tx in building_tx:
             score = 0
@@ -859,7 +974,7 @@ def get_unit_transaction_history(
     if include_similar and unit.area_id and unit.actual_area:
         # Ищем транзакции юнитов с похожей площадью в том же районе
         unit_area = float(unit.actual_area)
-        similar_query = db.query(Transaction).filter(
+        similar_query = (await db.execute(select(Transaction).filter(
             and_(
                 Transaction.area_id == unit.area_id,
                 Transaction.property_type_en == "Unit",  # Только юниты
@@ -867,7 +982,7 @@ def get_unit_transaction_history(
                 Transaction.actual_area_sqm.between(unit_area * 0.7, unit_area * 1.3),
                 Transaction.property_sub_type_en == unit.property_sub_type_en
             )
-        ).order_by(desc(Transaction.instance_date)).limit(20).all()
+        ).order_by(desc(Transaction.instance_date)).limit(20))).scalars().all()
         
         for tx in similar_query:
             score = 0
@@ -913,7 +1028,7 @@ def get_unit_transaction_history(
     # Сортируем по дате и баллу соответствия
     unique_transactions.sort(
         key=lambda x: (
-            x.get("instance_date") or "", 
+            x.get("instance_date") or date.min, 
             x.get("match_score", 0)
         ), 
         reverse=True
@@ -922,7 +1037,7 @@ def get_unit_transaction_history(
     # Ограничиваем результат
     unique_transactions = unique_transactions[:limit]
     
-    return {
+    return FastJSONResponse({
         "unit_info": unit_info,
         "search_parameters": {
             "include_related": include_related,
@@ -937,25 +1052,27 @@ def get_unit_transaction_history(
             "unique_transactions": len(unique_transactions)
         },
         "transactions": unique_transactions
-    }
+    })
 
 
 @router.get("/market-analysis/{area_id}")
-def get_market_analysis_by_area(
+@analytics_cache.cached("units", "transactions", "lkp_areas")
+async def get_market_analysis_by_area(
     area_id: int,
     property_type: Optional[str] = Query(None, description="Тип недвижимости"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_analytics_db),
 ):
     """Анализ рынка для юнитов в районе"""
     # Статистика по юнитам в районе
-    units_query = db.query(Unit).filter(Unit.area_id == area_id)
+    units_query = select(Unit).filter(Unit.area_id == area_id)
     if property_type:
         units_query = units_query.filter(Unit.property_type_en == property_type)
     
-    units = units_query.all()
+    result = await db.execute(units_query)
+    units = result.scalars().all()
     
     # Статистика по транзакциям в районе
-    transactions_query = db.query(Transaction).filter(
+    transactions_query = select(Transaction).filter(
         and_(
             Transaction.area_id == area_id,
             Transaction.trans_group_en == 'Sales',
@@ -966,7 +1083,8 @@ def get_market_analysis_by_area(
     if property_type:
         transactions_query = transactions_query.filter(Transaction.property_type_en == property_type)
     
-    transactions = transactions_query.order_by(desc(Transaction.instance_date)).limit(100).all()
+    result = await db.execute(transactions_query.order_by(desc(Transaction.instance_date)).limit(100))
+    transactions = result.scalars().all()
     
     # Анализ данных
     unit_types = {}
@@ -989,8 +1107,12 @@ def get_market_analysis_by_area(
     avg_area = sum(area_stats) / len(area_stats) if area_stats else None
     avg_price = sum(price_stats) / len(price_stats) if price_stats else None
     
+    areas = await lookups.get("lkp_areas")
+    
     return {
         "area_id": area_id,
+        "area_name_en": areas.name_of(area_id, "en"),
+        "area_name_ar": areas.name_of(area_id, "ar"),
         "property_type": property_type,
         "units_analysis": {
             "total_units": len(units),
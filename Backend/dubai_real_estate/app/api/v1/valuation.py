@@ -1,76 +1,223 @@
+from datetime import date
+from typing import Literal, Optional, Union
+
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Float, cast, desc, and_, func, select
 
-from app.database.connection import get_db
+from app.api.dependencies import model_columns, parse_fields
+from app.api.export import EXPORT_FORMATS, ExportFormat, export_response
+from app.api.pagination import CountMode, Keyset, count_rows, paginate
+from app.api.serializers import SchemaJSONResponse, row_to_dict, rows_to_dicts
+from app.database.connection import get_async_db, get_analytics_db
 from app.database.models import Valuation
+from app.schemas.valuation import (
+    ValuationAggregateResponse,
+    ValuationListResponse,
+    ValuationResponse,
+    ValuationsByAreaResponse,
+    ValuationsByProjectResponse,
+    ValuationsByPropertyTypeResponse,
+)
 
 router = APIRouter()
 
-@router.get("/latest")
-def get_latest_valuations(
+VALUATION_FIELDS = list(ValuationResponse.__fields__)
+
+# Списки оценок: новые сверху, равные даты - по первичному ключу
+VALUATIONS_KEYSET = Keyset(
+    (Valuation.procedure_id, Valuation.procedure_year, Valuation.procedure_number),
+    sort_column=Valuation.instance_date,
+    descending=True,
+)
+
+# Цена за кв.м для агрегатов; percentile_cont в PostgreSQL принимает double precision
+PRICE_PER_SQM = cast(Valuation.property_total_value / Valuation.actual_area, Float)
+
+
+async def valuations_page(db, condition, field_list, limit, cursor=None, count="none"):
+    """Страница оценок по условию: (строки с полями field_list, next_cursor, total_count)"""
+    keyset_columns = [column for column in VALUATIONS_KEYSET.columns if column.key not in field_list]
+    query = select(*model_columns(Valuation, field_list), *keyset_columns).where(condition)
+    rows, next_cursor = await paginate(db, query, VALUATIONS_KEYSET, limit, cursor, scalars=False)
+    return rows_to_dicts(rows, field_list), next_cursor, await count_rows(db, query, count)
+
+
+ValuationAggregate = Literal["month", "property_type"]
+
+
+async def valuation_aggregates(db, condition, aggregate):
+    """Число оценок, медиана, p10 и p90 цены за кв.м по месяцам или типам собственности - считает БД"""
+    if aggregate == "month":
+        group_by = [func.date_trunc("month", Valuation.instance_date)]
+    else:
+        group_by = [Valuation.property_type_id, Valuation.property_type_en]
+    
+    result = await db.execute(select(
+        *group_by,
+        func.count().label("count"),
+        func.percentile_cont(0.5).within_group(PRICE_PER_SQM).label("median_price_per_sqm"),
+        func.percentile_cont(0.1).within_group(PRICE_PER_SQM).label("p10_price_per_sqm"),
+        func.percentile_cont(0.9).within_group(PRICE_PER_SQM).label("p90_price_per_sqm"),
+    ).where(
+        condition,
+        Valuation.property_total_value.isnot(None),
+        Valuation.actual_area > 0,
+    ).group_by(*group_by).order_by(*group_by))
+    
+    buckets = []
+    for row in result.all():
+        if aggregate == "month":
+            bucket = {"month": row[0].strftime("%Y-%m") if row[0] else None}
+        else:
+            bucket = {"property_type_id": row[0], "property_type_en": row[1]}
+        bucket.update({
+            "count": row.count,
+            "median_price_per_sqm": row.median_price_per_sqm,
+            "p10_price_per_sqm": row.p10_price_per_sqm,
+            "p90_price_per_sqm": row.p90_price_per_sqm,
+        })
+        buckets.append(bucket)
+    return buckets
+
+
+@router.get("/latest", response_model=ValuationListResponse, response_model_exclude_unset=True)
+async def get_latest_valuations(
     limit: int = Query(10, ge=1, le=1000, description="Количество записей"),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: procedure_number,instance_date,property_total_value,actual_area"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Вернуть N последних записей"""
-    valuations = db.query(Valuation).order_by(desc(Valuation.procedure_id)).limit(limit).all()
-    return {"total": len(valuations), "valuations": valuations}
+    field_list = parse_fields(fields, VALUATION_FIELDS)
+    columns = model_columns(Valuation, field_list)
+    result = await db.execute(select(*columns).order_by(desc(Valuation.procedure_id)).limit(limit))
+    valuations = rows_to_dicts(result.all(), field_list)
+    return SchemaJSONResponse({"total": len(valuations), "valuations": valuations})
 
-@router.get("/{valuation_id}")
-def get_valuation_by_id(
+@router.get("/export")
+async def export_valuations(
+    format: ExportFormat = Query("ndjson", description=f"Формат выгрузки: {', '.join(EXPORT_FORMATS)}"),
+    area_id: Optional[int] = Query(None, description="ID района"),
+    property_type_id: Optional[int] = Query(None, description="ID типа собственности"),
+    date_from: Optional[date] = Query(None, description="Дата оценки с (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, description="Дата оценки по (YYYY-MM-DD)"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: procedure_number,instance_date,property_total_value,actual_area"),
+):
+    """Потоковая выгрузка оценок по району, типу собственности и периоду"""
+    conditions = []
+    if area_id is not None:
+        conditions.append(Valuation.area_id == area_id)
+    if property_type_id is not None:
+        conditions.append(Valuation.property_type_id == property_type_id)
+    if date_from:
+        conditions.append(Valuation.instance_date >= date_from)
+    if date_to:
+        conditions.append(Valuation.instance_date <= date_to)
+    return export_response(
+        model_columns(Valuation, parse_fields(fields, VALUATION_FIELDS)), conditions, format, "valuation"
+    )
+
+@router.get("/{valuation_id}", response_model=ValuationResponse, response_model_exclude_unset=True)
+async def get_valuation_by_id(
     valuation_id: int,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: procedure_number,instance_date,property_total_value,actual_area"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Вернуть запись по ID"""
-    valuation = db.query(Valuation).filter(Valuation.id == valuation_id).first()
+    field_list = parse_fields(fields, VALUATION_FIELDS)
+    columns = model_columns(Valuation, field_list)
+    result = await db.execute(select(*columns).where(Valuation.id == valuation_id))
+    valuation = result.first()
     if not valuation:
         raise HTTPException(status_code=404, detail="Valuation not found")
-    return valuation
+    return SchemaJSONResponse(row_to_dict(valuation, field_list))
 
-@router.get("/by-project/{project_id}")
-def get_valuations_by_project_id(
+@router.get("/by-project/{project_id}", response_model=Union[ValuationsByProjectResponse, ValuationAggregateResponse], response_model_exclude_unset=True)
+async def get_valuations_by_project_id(
     project_id: int,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000, description="Лимит результатов"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    aggregate: Optional[ValuationAggregate] = Query(None, description="Вместо строк - медиана и перцентили цены за кв.м по month или property_type"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: procedure_number,instance_date,property_total_value,actual_area"),
+    db: AsyncSession = Depends(get_analytics_db)
 ):
-    """Получить все оценки по ID проекта"""
-    valuations = db.query(Valuation).filter(
-        Valuation.area_id == project_id
-    ).all()
+    """Получить оценки по ID проекта"""
+    if aggregate:
+        return SchemaJSONResponse({
+            "aggregate": aggregate,
+            "project_id": project_id,
+            "buckets": await valuation_aggregates(db, Valuation.area_id == project_id, aggregate),
+        })
+    
+    valuations, next_cursor, total_count = await valuations_page(
+        db, Valuation.area_id == project_id, parse_fields(fields, VALUATION_FIELDS), limit, cursor, count
+    )
     
-    return {
+    return SchemaJSONResponse({
         "total": len(valuations),
+        "total_count": total_count,
+        "next_cursor": next_cursor,
         "project_id": project_id,
         "valuations": valuations
-    }
+    })
 
-@router.get("/by-area/{area_id}")
-def get_valuations_by_area(
+@router.get("/by-area/{area_id}", response_model=Union[ValuationsByAreaResponse, ValuationAggregateResponse], response_model_exclude_unset=True)
+async def get_valuations_by_area(
     area_id: int,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000, description="Лимит результатов"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    aggregate: Optional[ValuationAggregate] = Query(None, description="Вместо строк - медиана и перцентили цены за кв.м по month или property_type"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: procedure_number,instance_date,property_total_value,actual_area"),
+    db: AsyncSession = Depends(get_analytics_db)
 ):
-    """Получить все оценки по району"""
-    valuations = db.query(Valuation).filter(
-        Valuation.area_id == area_id
-    ).all()
+    """Получить оценки по району"""
+    if aggregate:
+        return SchemaJSONResponse({
+            "aggregate": aggregate,
+            "area_id": area_id,
+            "buckets": await valuation_aggregates(db, Valuation.area_id == area_id, aggregate),
+        })
     
-    return {
+    valuations, next_cursor, total_count = await valuations_page(
+        db, Valuation.area_id == area_id, parse_fields(fields, VALUATION_FIELDS), limit, cursor, count
+    )
+    
+    return SchemaJSONResponse({
         "total": len(valuations),
+        "total_count": total_count,
+        "next_cursor": next_cursor,
         "area_id": area_id,
         "valuations": valuations
-    }
+    })
 
-@router.get("/by-property-type/{property_type_id}")
-def get_valuations_by_property_type(
+@router.get("/by-property-type/{property_type_id}", response_model=Union[ValuationsByPropertyTypeResponse, ValuationAggregateResponse], response_model_exclude_unset=True)
+async def get_valuations_by_property_type(
     property_type_id: int,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=1000, description="Лимит результатов"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из предыдущего ответа)"),
+    count: CountMode = Query("none", description="Общее количество: none, estimate, exact"),
+    aggregate: Optional[ValuationAggregate] = Query(None, description="Вместо строк - медиана и перцентили цены за кв.м по month или property_type"),
+    fields: Optional[str] = Query(None, description="Поля ответа через запятую (по умолчанию все), например: procedure_number,instance_date,property_total_value,actual_area"),
+    db: AsyncSession = Depends(get_analytics_db)
 ):
-    """Получить все оценки по типу собственности"""
-    valuations = db.query(Valuation).filter(
-        Valuation.property_type_id == property_type_id
-    ).all()
+    """Получить оценки по типу собственности"""
+    if aggregate:
+        return SchemaJSONResponse({
+            "aggregate": aggregate,
+            "property_type_id": property_type_id,
+            "buckets": await valuation_aggregates(db, Valuation.property_type_id == property_type_id, aggregate),
+        })
+    
+    valuations, next_cursor, total_count = await valuations_page(
+        db, Valuation.property_type_id == property_type_id, parse_fields(fields, VALUATION_FIELDS), limit, cursor, count
+    )
     
-    return {
+    return SchemaJSONResponse({
         "total": len(valuations),
+        "total_count": total_count,
+        "next_cursor": next_cursor,
         "property_type_id": property_type_id,
         "valuations": valuations
-    }
+    })
@@ -9,6 +9,30 @@ class Settings(BaseSettings):
     DB_USER: str = "user"
     DB_PASS: str = "password"
     
+    # Пул соединений
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # сек, пересоздавать соединения старше
+    DB_POOL_TIMEOUT: int = 10  # сек ожидания свободного соединения
+    
+    # Таймауты запросов (statement_timeout на стороне PostgreSQL), мс
+    DB_STATEMENT_TIMEOUT_MS: int = 5000
+    DB_ANALYTICS_STATEMENT_TIMEOUT_MS: int = 30000
+    DB_EXPORT_STATEMENT_TIMEOUT_MS: int = 600000
+    # Сколько тяжелых аналитических запросов могут одновременно держать соединения
+    DB_ANALYTICS_MAX_CONNECTIONS: int = 5
+    
+    # HTTP-кэш: как часто перечитывать dataset_versions (сек) и max-age ответов
+    DATASET_VERSION_REFRESH_SECONDS: int = 5
+    HTTP_CACHE_MAX_AGE: int = 0
+    HTTP_CACHE_LOOKUP_MAX_AGE: int = 3600
+    
+    # Кэш аналитических роутов: TTL (сек), размер LRU в памяти процесса и
+    # необязательный общий Redis-совместимый кэш (redis://host:6379/0, нужен пакет redis)
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 1024
+    ANALYTICS_CACHE_REDIS_URL: Optional[str] = None
+    
     # API
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "Dubai Real Estate API"
@@ -21,6 +45,11 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        # Та же база через asyncpg - для асинхронных роутов API
+        return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
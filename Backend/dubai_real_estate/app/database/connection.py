@@ -1,18 +1,53 @@
-from sqlalchemy import create_engine
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from app.config import settings
 
-# Создаем движок
+# Общие настройки пула для обоих движков
+POOL_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+}
+
+# Создаем движок (синхронный - для create_all, миграций и скриптов)
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False
+    echo=False,
+    **POOL_OPTIONS
 )
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок (asyncpg) для роутов API: запрос не занимает поток
+# threadpool на время обращения к БД, параллелизм ограничен пулом соединений.
+# statement_timeout задается на уровне соединения: зависший запрос
+# отменяется сервером и возвращает соединение в пул
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    echo=False,
+    connect_args={
+        "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    },
+    **POOL_OPTIONS
+)
+
+# Фабрика асинхронных сессий. expire_on_commit=False - объекты остаются
+# доступными после commit без повторной (ленивой) загрузки атрибутов
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Базовый класс для моделей
 Base = declarative_base()
 
@@ -22,4 +57,65 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Зависимость для получения асинхронной сессии БД
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def async_db_with_timeout(timeout_ms: int, max_connections: int = None):
+    """Зависимость с собственным statement_timeout для отдельных роутов.
+
+    SET LOCAL действует до конца транзакции сессии, поэтому соединение
+    возвращается в пул с таймаутом по умолчанию. max_connections
+    ограничивает, сколько соединений пула одновременно занимают такие
+    роуты: остальные запросы ждут не дольше DB_POOL_TIMEOUT и получают 503.
+    """
+    limiter = asyncio.Semaphore(max_connections) if max_connections else None
+
+    async def dependency():
+        if limiter is not None:
+            try:
+                await asyncio.wait_for(limiter.acquire(), timeout=settings.DB_POOL_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=503, detail="Сервер перегружен аналитическими запросами")
+        dependency.in_use += 1
+        try:
+            async with AsyncSessionLocal() as db:
+                # SET не принимает bind-параметры, значение - проверенный int
+                await db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+                yield db
+        finally:
+            dependency.in_use -= 1
+            if limiter is not None:
+                limiter.release()
+
+    dependency.in_use = 0
+    return dependency
+
+
+# Сессия для тяжелых аналитических роутов: больший таймаут, но не больше
+# DB_ANALYTICS_MAX_CONNECTIONS соединений, чтобы не вытеснить остальные роуты
+get_analytics_db = async_db_with_timeout(
+    settings.DB_ANALYTICS_STATEMENT_TIMEOUT_MS,
+    max_connections=settings.DB_ANALYTICS_MAX_CONNECTIONS
+)
+
+
+def pool_stats() -> dict:
+    """Заполненность пула асинхронного движка"""
+    pool = async_engine.pool
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+        "analytics_in_use": get_analytics_db.in_use,
+        "analytics_limit": settings.DB_ANALYTICS_MAX_CONNECTIONS,
+    }
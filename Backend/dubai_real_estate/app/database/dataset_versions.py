@@ -0,0 +1,38 @@
+"""Версии наборов данных: счетчик на таблицу, который поднимает загрузка.
+
+Данные меняются только миграциями (app.etl), поэтому после успешной
+загрузки таблицы ее версия увеличивается на 1. API строит по версиям
+ETag ответов (app.api.http_cache) и не обращается к самим данным, пока
+версия не изменилась.
+"""
+
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, TIMESTAMP, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+metadata = MetaData()
+
+dataset_versions = Table(
+    "dataset_versions",
+    metadata,
+    Column("table_name", String(100), primary_key=True),
+    Column("version", BigInteger, nullable=False),
+    Column("updated_at", TIMESTAMP, server_default=func.now(), onupdate=func.now()),
+)
+
+
+def bump_dataset_version(engine, table_name):
+    """Увеличить версию таблицы table_name (первая загрузка - версия 1)"""
+    dataset_versions.create(engine, checkfirst=True)
+    stmt = insert(dataset_versions).values(table_name=table_name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["table_name"],
+        set_={"version": dataset_versions.c.version + 1, "updated_at": func.now()},
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt)
+
+
+async def read_dataset_versions(db):
+    """{таблица: версия} для всех загруженных таблиц"""
+    result = await db.execute(select(dataset_versions.c.table_name, dataset_versions.c.version))
+    return dict(result.all())
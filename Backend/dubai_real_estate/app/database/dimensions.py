@@ -0,0 +1,194 @@
+"""Словарное кодирование повторяющихся двуязычных подписей.
+
+Пары подписей *_en / *_ar, которые повторяются на каждой строке (группа
+сделки, тип собственности, район, ближайшее метро и т.п.), хранятся один
+раз в таблице измерения dim_<name> (code SMALLINT, name_en, name_ar),
+а в таблице фактов fact_<table> от пары остается только <подпись>_code.
+Под старым именем таблицы создается представление, которое собирает
+подписи обратно через LEFT JOIN, поэтому модели Transaction, Unit,
+Building и роутеры читают те же колонки, что и раньше. Соединения
+с измерениями, колонки которых запрос не читает, планировщик убирает.
+
+Коды раздаются при загрузке (LabelEncoding.encode): новые пары
+вставляются через INSERT ... ON CONFLICT DO NOTHING по уникальному
+индексу на (coalesce(name_en, ''), coalesce(name_ar, '')), поэтому
+параллельные загрузки таблиц с общим измерением получают одни и те же
+коды. Измерения не пересоздаются полной перезагрузкой, коды стабильны.
+"""
+
+import pandas as pd
+from sqlalchemy import Column, Identity, Index, SmallInteger, Table, Text, func, inspect, literal_column, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.database.partitions import by_year
+
+LANGUAGES = ("en", "ar")
+
+
+def _label_key(value):
+    return "" if value is None else value
+
+
+class Dimension:
+    """Таблица dim_<name>: код → пара подписей, и кэш кодов процесса загрузки"""
+
+    def __init__(self, metadata, name):
+        self.table = Table(
+            f"dim_{name}",
+            metadata,
+            Column("code", SmallInteger, Identity(), primary_key=True),
+            Column("name_en", Text),
+            Column("name_ar", Text),
+        )
+        self.name = self.table.name
+        # '' литералом: выражение ON CONFLICT должно совпасть с выражением индекса
+        empty = literal_column("''")
+        self.label_key = [func.coalesce(self.table.c.name_en, empty), func.coalesce(self.table.c.name_ar, empty)]
+        Index(f"uq_{self.name}_labels", *self.label_key, unique=True)
+        # (name_en, name_ar) → code
+        self.codes = {}
+
+    def load(self, conn):
+        rows = conn.execute(select(self.table.c.code, self.table.c.name_en, self.table.c.name_ar))
+        self.codes = {(name_en, name_ar): code for code, name_en, name_ar in rows}
+
+    def codes_for(self, conn, pairs):
+        """Коды для пар подписей; недостающие пары добавляются в измерение"""
+        missing = {pair for pair in pairs if pair not in self.codes and pair != (None, None)}
+        if missing:
+            # Один порядок вставки во всех процессах - без взаимных блокировок
+            missing = sorted(missing, key=lambda pair: tuple(map(_label_key, pair)))
+            conn.execute(
+                insert(self.table)
+                .values([{"name_en": name_en, "name_ar": name_ar} for name_en, name_ar in missing])
+                .on_conflict_do_nothing(index_elements=self.label_key)
+            )
+            # Коды пар, вставленных здесь или параллельной загрузкой
+            keys = [tuple(map(_label_key, pair)) for pair in missing]
+            rows = conn.execute(
+                select(self.table.c.code, self.table.c.name_en, self.table.c.name_ar)
+                .where(tuple_(*self.label_key).in_(keys))
+            )
+            for code, name_en, name_ar in rows:
+                self.codes[(name_en, name_ar)] = code
+        return self.codes
+
+
+class LabelEncoding:
+    """Хранение модели-представления в таблице фактов с кодами подписей.
+
+    labels - {префикс: Dimension}: колонки <префикс>_en/_ar модели
+    заменяются в таблице фактов колонкой <префикс>_code.
+    partition_by - колонка-дата, по году которой секционируется таблица
+    фактов (app.database.partitions); она добавляется в первичный ключ.
+    """
+
+    def __init__(self, model, name, metadata, labels, indexes=(), partition_by=None):
+        self.model = model
+        self.view = model.__table__
+        self.view_name = self.view.name
+        self.labels = dict(labels)
+        self.label_columns = {
+            f"{prefix}_{lang}": prefix for prefix in self.labels for lang in LANGUAGES
+        }
+
+        columns = []
+        for column in self.view.columns:
+            prefix = self.label_columns.get(column.name)
+            if prefix is None:
+                primary_key = column.primary_key or column.name == partition_by
+                columns.append(Column(column.name, column.type, primary_key=primary_key))
+            elif column.name == f"{prefix}_en":
+                columns.append(Column(self.code_column(prefix), SmallInteger))
+        table_kwargs = by_year(partition_by) if partition_by else {}
+        self.table = Table(name, metadata, *columns, *indexes, **table_kwargs)
+
+    @staticmethod
+    def code_column(prefix):
+        return f"{prefix}_code"
+
+    @property
+    def dimensions(self):
+        return list({dimension.name: dimension for dimension in self.labels.values()}.values())
+
+    def _encoded(self, columns):
+        """Префиксы подписей, хотя бы одна колонка которых есть в columns"""
+        return [
+            prefix for prefix in self.labels
+            if any(f"{prefix}_{lang}" in columns for lang in LANGUAGES)
+        ]
+
+    def storage_columns(self, columns):
+        """Колонки таблицы фактов для порции с колонками модели columns"""
+        kept = [column for column in columns if column not in self.label_columns]
+        return kept + [self.code_column(prefix) for prefix in self._encoded(columns)]
+
+    def prepare(self, engine):
+        """Создать измерения (если их нет) и прочитать их коды"""
+        self.table.metadata.create_all(engine, tables=[dim.table for dim in self.dimensions], checkfirst=True)
+        with engine.connect() as conn:
+            for dimension in self.dimensions:
+                dimension.load(conn)
+
+    def encode(self, engine, df):
+        """Порция с колонками модели → порция с колонками таблицы фактов"""
+        missing = pd.Series([None] * len(df), index=df.index, dtype=object)
+        encoded = df.drop(columns=[column for column in df.columns if column in self.label_columns])
+        with engine.begin() as conn:
+            for prefix in self._encoded(df.columns):
+                pairs = list(zip(*(df.get(f"{prefix}_{lang}", missing) for lang in LANGUAGES)))
+                codes = self.labels[prefix].codes_for(conn, pairs)
+                encoded[self.code_column(prefix)] = pd.Series(
+                    [codes.get(pair) for pair in pairs], index=df.index, dtype=object
+                )
+        return encoded
+
+    def view_select(self, fact=None):
+        """SELECT представления: колонки модели в ее порядке"""
+        fact = self.table if fact is None else fact
+        joined = fact
+        dims = {}
+        for prefix, dimension in self.labels.items():
+            dim = dimension.table.alias(f"{prefix}_dim")
+            dims[prefix] = dim
+            joined = joined.outerjoin(dim, dim.c.code == fact.c[self.code_column(prefix)])
+
+        columns = []
+        for column in self.view.columns:
+            prefix = self.label_columns.get(column.name)
+            if prefix is None:
+                columns.append(fact.c[column.name])
+            else:
+                lang = column.name.rsplit("_", 1)[1]
+                columns.append(dims[prefix].c[f"name_{lang}"].label(column.name))
+        return select(*columns).select_from(joined)
+
+    def _quote(self, conn, name):
+        return conn.dialect.identifier_preparer.quote(name)
+
+    def drop_view(self, conn):
+        """Удалить представление, а таблицу прежней схемы на его месте - вместе с данными"""
+        inspector = inspect(conn)
+        if self.view_name in inspector.get_view_names():
+            conn.execute(text(f"DROP VIEW {self._quote(conn, self.view_name)}"))
+        elif inspector.has_table(self.view_name):
+            print(f"  🗑️  Таблица {self.view_name} прежней схемы заменяется представлением")
+            conn.execute(text(f"DROP TABLE {self._quote(conn, self.view_name)}"))
+
+    def create_view(self, conn):
+        query = self.view_select().compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        conn.execute(text(f"CREATE VIEW {self._quote(conn, self.view_name)} AS {query}"))
+
+    def ensure(self, engine):
+        """Таблица фактов и представление для инкрементальной загрузки в живую таблицу"""
+        with engine.begin() as conn:
+            inspector = inspect(conn)
+            if self.view_name in inspector.get_view_names():
+                return
+            if inspector.has_table(self.view_name):
+                raise ValueError(
+                    f"{self.view_name} еще в прежней схеме без {self.table.name} - "
+                    f"сначала выполните полную загрузку (--mode full)"
+                )
+            self.table.metadata.create_all(conn, tables=[self.table], checkfirst=True)
+            self.create_view(conn)
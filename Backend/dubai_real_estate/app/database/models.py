@@ -1,8 +1,25 @@
-from sqlalchemy import Column, BigInteger, Text, Date, Numeric, Integer, SmallInteger, String, TIMESTAMP, Index
+from sqlalchemy import Column, BigInteger, Text, Date, Numeric, Integer, SmallInteger, String, TIMESTAMP, Index, DDL, event, text
 from sqlalchemy.ext.declarative import declarative_base
 
+from app.database.dimensions import Dimension, LabelEncoding
+from app.database.partitions import by_year
+
 Base = declarative_base()
 
+# Транзакции, юниты и здания хранятся в fact_* с кодами подписей (см. конец файла
+# и app.database.dimensions), а их модели читают одноименные представления.
+# У моделей представлений своя metadata, чтобы create_all не создал вместо них таблицы
+ViewBase = declarative_base()
+
+# Триграммные GIN-индексы (pg_trgm) нужны для ILIKE '%...%' - B-tree их не ускоряет
+TRGM_EXTENSION = DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+event.listen(Base.metadata, "before_create", TRGM_EXTENSION.execute_if(dialect="postgresql"))
+
+
+def trigram_index(name, column):
+    """GIN-индекс pg_trgm для ILIKE '%...%' по column (имя или Column)"""
+    return Index(name, column, postgresql_using="gin", postgresql_ops={getattr(column, "name", column): "gin_trgm_ops"})
+
 
 class LkpArea(Base):
     __tablename__ = "lkp_areas"
@@ -63,7 +80,8 @@ class Valuation(Base):
     area_name_ar = Column(String(200))
     area_name_en = Column(String(200))
     
-    instance_date = Column(Date)  # TIMESTAMP(6) преобразован в Date
+    # TIMESTAMP(6) преобразован в Date; ключ секционирования по годам входит в PK
+    instance_date = Column(Date, primary_key=True)
     
     row_status_code = Column(String(100))
     
@@ -81,16 +99,17 @@ class Valuation(Base):
         Index('idx_valuation_instance_date', 'instance_date'),
         Index('idx_valuation_property_type_id', 'property_type_id'),
         Index('idx_valuation_row_status_code', 'row_status_code'),
+        by_year('instance_date'),
     )
 
 
-class Unit(Base):
+class Unit(ViewBase):
     __tablename__ = "units"
 
     # Все ID поля как NUMERIC для совместимости
-    property_id = Column(Numeric(30, 0), primary_key=True)
-    area_id = Column(Numeric(30, 0))
-    zone_id = Column(Numeric(10, 0))
+    property_id = Column(BigInteger, primary_key=True)
+    area_id = Column(BigInteger)
+    zone_id = Column(Integer)
     area_name_ar = Column(Text)
     area_name_en = Column(Text)
     
@@ -114,20 +133,20 @@ class Unit(Base):
     rooms_en = Column(String(60))
     actual_area = Column(Numeric(18, 2))
     
-    property_type_id = Column(Numeric(10, 0))
+    property_type_id = Column(Integer)
     property_type_ar = Column(String(50))
     property_type_en = Column(String(50))
-    property_sub_type_id = Column(Numeric(10, 0))
+    property_sub_type_id = Column(Integer)
     property_sub_type_ar = Column(String(50))
     property_sub_type_en = Column(String(50))
     
-    parent_property_id = Column(Numeric(30, 0))
-    grandparent_property_id = Column(Numeric(30, 0))
+    parent_property_id = Column(BigInteger)
+    grandparent_property_id = Column(BigInteger)
     creation_date = Column(Date)
     
     munc_zip_code = Column(String(3))
     munc_number = Column(String(10))
-    parcel_id = Column(Numeric(30, 0))
+    parcel_id = Column(BigInteger)
     
     is_free_hold = Column(Numeric(1, 0))
     is_lease_hold = Column(Numeric(1, 0))
@@ -135,32 +154,25 @@ class Unit(Base):
     
     pre_registration_number = Column(String(100))
     
-    master_project_id = Column(Numeric(30, 0))
+    master_project_id = Column(BigInteger)
     master_project_en = Column(Text)
     master_project_ar = Column(Text)
-    project_id = Column(Numeric(30, 0))
+    project_id = Column(BigInteger)
     project_name_ar = Column(String(200))
     project_name_en = Column(String(200))
     
-    land_type_id = Column(Numeric(30, 0))
+    land_type_id = Column(Integer)
     land_type_ar = Column(String(50))
     land_type_en = Column(String(50))
-    
-    # Индексы для улучшения производительности
-    __table_args__ = (
-        Index('idx_units_area_id', 'area_id'),
-        Index('idx_units_project_id', 'project_id'),
-        Index('idx_units_parent_property_id', 'parent_property_id'),
-        Index('idx_units_building_number', 'building_number'),
-    )
 
-class Building(Base):
+
+class Building(ViewBase):
     __tablename__ = "buildings"
 
     # ВСЕ числовые поля как NUMERIC
-    property_id = Column(Numeric(30, 0), primary_key=True)  # Увеличена точность
-    area_id = Column(Numeric(30, 0))
-    zone_id = Column(Numeric(10, 0))
+    property_id = Column(BigInteger, primary_key=True)
+    area_id = Column(BigInteger)
+    zone_id = Column(Integer)
     area_name_ar = Column(Text)
     area_name_en = Column(Text)
     
@@ -185,14 +197,14 @@ class Building(Base):
     
     pre_registration_number = Column(String(100))
     
-    master_project_id = Column(Numeric(30, 0))
+    master_project_id = Column(BigInteger)
     master_project_en = Column(Text)
     master_project_ar = Column(Text)
-    project_id = Column(Numeric(30, 0))
+    project_id = Column(BigInteger)
     project_name_ar = Column(Text)
     project_name_en = Column(Text)
     
-    land_type_id = Column(Numeric(10, 0))
+    land_type_id = Column(Integer)
     land_type_ar = Column(Text)
     land_type_en = Column(Text)
     
@@ -203,41 +215,35 @@ class Building(Base):
     swimming_pools = Column(Numeric(4, 0))
     elevators = Column(Numeric(4, 0))
     
-    property_type_id = Column(Numeric(10, 0))
+    property_type_id = Column(Integer)
     property_type_ar = Column(Text)
     property_type_en = Column(Text)
-    property_sub_type_id = Column(Numeric(10, 0))
+    property_sub_type_id = Column(Integer)
     property_sub_type_ar = Column(Text)
     property_sub_type_en = Column(Text)
     
-    parent_property_id = Column(Numeric(30, 0))
+    parent_property_id = Column(BigInteger)
     creation_date = Column(Date)
-    parcel_id = Column(Numeric(30, 0))
-    
-    __table_args__ = (
-        Index('idx_buildings_area_id', 'area_id'),
-        Index('idx_buildings_project_id', 'project_id'),
-        Index('idx_buildings_property_type_id', 'property_type_id'),
-    )
+    parcel_id = Column(BigInteger)
 
 
 class Project(Base):
     __tablename__ = "projects"
 
     # Первичный ключ
-    project_id = Column(Numeric(10, 0), primary_key=True)
+    project_id = Column(BigInteger, primary_key=True)
     
     # Основная информация
-    project_number = Column(Numeric(10, 0))
+    project_number = Column(BigInteger)
     project_name = Column(String(200))
     
     # Информация о разработчике
-    developer_id = Column(Numeric(10, 0))
+    developer_id = Column(BigInteger)
     developer_number = Column(Numeric(20, 0))
     developer_name = Column(String(200))
     
     # Информация о главном разработчике
-    master_developer_id = Column(Numeric(10, 0))
+    master_developer_id = Column(BigInteger)
     master_developer_number = Column(Numeric(20, 0))
     master_developer_name = Column(String(200))
     
@@ -250,11 +256,11 @@ class Project(Base):
     project_type_ar = Column(String(100))
     
     # Классификация проекта
-    project_classification_id = Column(Numeric(10, 0))
+    project_classification_id = Column(Integer)
     project_classification_ar = Column(String(50))
     
     # Информация о гарантийном агенте
-    escrow_agent_id = Column(Numeric(10, 0))
+    escrow_agent_id = Column(BigInteger)
     escrow_agent_name = Column(String(200))
     
     # Статус проекта
@@ -273,10 +279,10 @@ class Project(Base):
     project_description_en = Column(String(2000))
     
     # Связанная собственность
-    property_id = Column(Numeric(10, 0))
+    property_id = Column(BigInteger)
     
     # Район
-    area_id = Column(Numeric(10, 0))
+    area_id = Column(BigInteger)
     area_name_ar = Column(String(200))
     area_name_en = Column(String(200))
     
@@ -287,10 +293,13 @@ class Project(Base):
         Index('idx_projects_master_developer_id', 'master_developer_id'),
         Index('idx_projects_project_status', 'project_status'),
         Index('idx_projects_project_start_date', 'project_start_date'),
+        trigram_index('idx_projects_project_name_trgm', 'project_name'),
+        trigram_index('idx_projects_developer_name_trgm', 'developer_name'),
+        trigram_index('idx_projects_master_developer_name_trgm', 'master_developer_name'),
     )
 
 
-class Transaction(Base):
+class Transaction(ViewBase):
     __tablename__ = "transactions"
 
     # Первичный ключ - transaction_id как строка
@@ -300,22 +309,22 @@ class Transaction(Base):
     instance_date = Column(Date)
     
     # Транзакционные группы
-    trans_group_id = Column(Numeric(3, 0))
+    trans_group_id = Column(SmallInteger)
     trans_group_en = Column(String(200))
     trans_group_ar = Column(String(200))
     
     # Процедура
-    procedure_id = Column(Numeric(3, 0))
+    procedure_id = Column(SmallInteger)
     procedure_name_en = Column(String(200))
     procedure_name_ar = Column(String(200))
     
     # Тип собственности
-    property_type_id = Column(Numeric(4, 0))
+    property_type_id = Column(Integer)
     property_type_en = Column(String(50))
     property_type_ar = Column(String(50))
     
     # Подтип собственности
-    property_sub_type_id = Column(Numeric(10, 0))
+    property_sub_type_id = Column(Integer)
     property_sub_type_en = Column(String(100))
     property_sub_type_ar = Column(String(100))
     
@@ -324,7 +333,7 @@ class Transaction(Base):
     property_usage_ar = Column(String(100))
     
     # Район
-    area_id = Column(Numeric(10, 0))
+    area_id = Column(BigInteger)
     area_name_en = Column(String(200))
     area_name_ar = Column(String(200))
     
@@ -350,7 +359,7 @@ class Transaction(Base):
     # Проекты
     master_project_en = Column(String(200))
     master_project_ar = Column(String(200))
-    project_number = Column(Numeric(30, 0))
+    project_number = Column(BigInteger)
     project_name_en = Column(String(200))
     project_name_ar = Column(String(200))
     
@@ -373,7 +382,7 @@ class Transaction(Base):
     is_free_hold = Column(Numeric(1, 0))
     
     # Тип регистрации
-    reg_type_id = Column(Numeric(1, 0))
+    reg_type_id = Column(SmallInteger)
     reg_type_en = Column(String(100))
     reg_type_ar = Column(String(100))
     
@@ -389,12 +398,110 @@ class Transaction(Base):
     trans_size_sqm = Column(Numeric(18, 2))
     actual_area_sqft = Column(Numeric(18, 2))
     actual_area_sqm = Column(Numeric(18, 2))
-    
-    # Индексы для улучшения производительности
-    __table_args__ = (
+
+
+# Измерения двуязычных подписей, общие для таблиц фактов
+DIM_AREAS = Dimension(Base.metadata, "areas")
+DIM_PROPERTY_TYPES = Dimension(Base.metadata, "property_types")
+DIM_PROPERTY_SUB_TYPES = Dimension(Base.metadata, "property_sub_types")
+DIM_PROPERTY_USAGES = Dimension(Base.metadata, "property_usages")
+DIM_ROOMS = Dimension(Base.metadata, "rooms")
+DIM_MASTER_PROJECTS = Dimension(Base.metadata, "master_projects")
+DIM_LAND_TYPES = Dimension(Base.metadata, "land_types")
+DIM_PARKING_ALLOCATION_TYPES = Dimension(Base.metadata, "parking_allocation_types")
+DIM_TRANSACTION_GROUPS = Dimension(Base.metadata, "transaction_groups")
+DIM_PROCEDURES = Dimension(Base.metadata, "procedures")
+DIM_PARTY_TYPES = Dimension(Base.metadata, "party_types")
+DIM_REGISTRATION_TYPES = Dimension(Base.metadata, "registration_types")
+DIM_LANDMARKS = Dimension(Base.metadata, "landmarks")
+DIM_METRO_STATIONS = Dimension(Base.metadata, "metro_stations")
+DIM_MALLS = Dimension(Base.metadata, "malls")
+
+UNIT_STORAGE = LabelEncoding(
+    Unit,
+    "fact_units",
+    Base.metadata,
+    {
+        "area_name": DIM_AREAS,
+        "parking_allocation_type": DIM_PARKING_ALLOCATION_TYPES,
+        "rooms": DIM_ROOMS,
+        "property_type": DIM_PROPERTY_TYPES,
+        "property_sub_type": DIM_PROPERTY_SUB_TYPES,
+        "master_project": DIM_MASTER_PROJECTS,
+        "land_type": DIM_LAND_TYPES,
+    },
+    indexes=[
+        Index('idx_units_area_id', 'area_id'),
+        Index('idx_units_project_id', 'project_id'),
+        Index('idx_units_parent_property_id', 'parent_property_id'),
+        Index('idx_units_building_number', 'building_number'),
+        trigram_index('idx_units_building_number_trgm', 'building_number'),
+    ],
+)
+
+BUILDING_STORAGE = LabelEncoding(
+    Building,
+    "fact_buildings",
+    Base.metadata,
+    {
+        "area_name": DIM_AREAS,
+        "rooms": DIM_ROOMS,
+        "master_project": DIM_MASTER_PROJECTS,
+        "land_type": DIM_LAND_TYPES,
+        "property_type": DIM_PROPERTY_TYPES,
+        "property_sub_type": DIM_PROPERTY_SUB_TYPES,
+    },
+    indexes=[
+        Index('idx_buildings_area_id', 'area_id'),
+        Index('idx_buildings_project_id', 'project_id'),
+        Index('idx_buildings_property_type_id', 'property_type_id'),
+    ],
+)
+
+# Условие частичных индексов сравнимых продаж (/units/price-estimate)
+COMPARABLES_WHERE = "meter_sale_price IS NOT NULL AND actual_area_sqm IS NOT NULL"
+COMPARABLES_INCLUDE = ['meter_sale_price', 'actual_area_sqm', 'trans_value', 'transaction_id']
+
+TRANSACTION_STORAGE = LabelEncoding(
+    Transaction,
+    "fact_transactions",
+    Base.metadata,
+    {
+        "trans_group": DIM_TRANSACTION_GROUPS,
+        "procedure_name": DIM_PROCEDURES,
+        "property_type": DIM_PROPERTY_TYPES,
+        "property_sub_type": DIM_PROPERTY_SUB_TYPES,
+        "property_usage": DIM_PROPERTY_USAGES,
+        "area_name": DIM_AREAS,
+        "party_type_role_1": DIM_PARTY_TYPES,
+        "party_type_role_2": DIM_PARTY_TYPES,
+        "master_project": DIM_MASTER_PROJECTS,
+        "rooms": DIM_ROOMS,
+        "nearest_landmark": DIM_LANDMARKS,
+        "nearest_metro": DIM_METRO_STATIONS,
+        "nearest_mall": DIM_MALLS,
+        "reg_type": DIM_REGISTRATION_TYPES,
+    },
+    indexes=[
         Index('idx_transactions_instance_date', 'instance_date'),
         Index('idx_transactions_area_id', 'area_id'),
         Index('idx_transactions_property_type_id', 'property_type_id'),
         Index('idx_transactions_trans_group_id', 'trans_group_id'),
         Index('idx_transactions_procedure_id', 'procedure_id'),
-    )
\ No newline at end of file
+        trigram_index('idx_transactions_building_name_en_trgm', 'building_name_en'),
+        trigram_index('idx_transactions_building_name_ar_trgm', 'building_name_ar'),
+        # Сравнимые продажи: /price-estimate один раз читает коды 'Sales' и типа собственности
+        # из dim_* и фильтрует fact_transactions по ним (коды раздаются при загрузке, поэтому
+        # в условие частичного индекса не входят), INCLUDE дает index-only scan,
+        # B-tree читается и в обратном порядке по instance_date
+        Index(
+            'idx_transactions_comparables', 'area_id', 'property_type_code', 'trans_group_code', 'instance_date',
+            postgresql_include=COMPARABLES_INCLUDE, postgresql_where=text(COMPARABLES_WHERE),
+        ),
+        Index(
+            'idx_transactions_comparables_area', 'area_id', 'trans_group_code', 'instance_date',
+            postgresql_include=COMPARABLES_INCLUDE, postgresql_where=text(COMPARABLES_WHERE),
+        ),
+    ],
+    partition_by='instance_date',
+)
@@ -0,0 +1,97 @@
+"""Секционирование больших таблиц по годам (PARTITION BY RANGE).
+
+fact_transactions и valuation создаются секционированными по году
+instance_date: секция <table>_y<год> хранит строки с датой в
+[1 января, 1 января следующего года). Запросы с условием на
+instance_date (price-trends, price-estimate, market-analysis) читают
+только секции нужных лет (partition pruning).
+
+Ключ секционирования обязан входить в первичный ключ, поэтому PK таких
+таблиц дополнен instance_date, а строки без даты при загрузке
+отбрасываются вместе со строками без PK. Повторы при этом ищутся по
+естественному ключу (PK без instance_date, TableSpec.key_columns):
+transaction_id остается уникальным, а строка с исправленной датой
+при синхронизации переносится в секцию нового года (app.etl.copy_loader).
+
+Секции создаются загрузчиком (create_year_partitions) по годам очередной
+порции, а строки раскладывает по секциям сам PostgreSQL при вставке
+в родительскую таблицу.
+"""
+
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import text
+
+PARTITION_INFO_KEY = "partition_by_year"
+
+
+def by_year(column):
+    """Аргументы Table: PARTITION BY RANGE (column) и пометка для загрузчика"""
+    return {
+        "postgresql_partition_by": f"RANGE ({column})",
+        "info": {PARTITION_INFO_KEY: column},
+    }
+
+
+def partition_column(table):
+    """Колонка-дата, по году которой секционирована таблица (None - не секционирована)"""
+    return table.info.get(PARTITION_INFO_KEY)
+
+
+def partition_name(table_name, year):
+    return f"{table_name}_y{year}"
+
+
+def year_bounds(year):
+    """Границы секции года: [начало, конец)"""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def partition_bounds(year):
+    start, end = year_bounds(year)
+    return f"FOR VALUES FROM ('{start}') TO ('{end}')"
+
+
+def years_in(values):
+    """Годы непустых дат порции"""
+    return set(pd.to_datetime(values).dropna().dt.year.astype(int))
+
+
+def _quote(conn, name):
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def create_year_partitions(conn, table_name, years):
+    """Создать недостающие секции таблицы для years"""
+    for year in sorted(years):
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_quote(conn, partition_name(table_name, year))} "
+            f"PARTITION OF {_quote(conn, table_name)} {partition_bounds(year)}"
+        ))
+
+
+def list_partitions(conn, table_name):
+    """Имена секций таблицы"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": table_name})
+    return [name for name, in rows]
+
+
+def is_partitioned(conn, table_name):
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": table_name}).scalar()
+
+
+def ensure_partitioned(conn, table):
+    """Живая таблица должна быть уже секционированной (после полной загрузки)"""
+    if conn.dialect.name != "postgresql" or partition_column(table) is None:
+        return
+    if not is_partitioned(conn, table.name):
+        raise ValueError(
+            f"{table.name} еще не секционирована по {partition_column(table)} - "
+            f"сначала выполните полную загрузку (--mode full)"
+        )
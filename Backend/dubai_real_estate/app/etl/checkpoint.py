@@ -0,0 +1,122 @@
+"""Чекпоинты потоковой загрузки для продолжения прерванного импорта.
+
+После каждой загруженной порции в таблицу etl_checkpoints записывается
+номер порции, число прочитанных строк и последний первичный ключ.
+Для loader="copy" запись идет в той же транзакции, что и сама порция,
+поэтому чекпоинт никогда не опережает и не отстает от данных.
+При --resume загрузка пропускает уже обработанные порции файла.
+"""
+
+from datetime import date
+
+from sqlalchemy import BigInteger, Column, Float, Integer, MetaData, String, Table, Text, TIMESTAMP, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+
+metadata = MetaData()
+
+etl_checkpoints = Table(
+    "etl_checkpoints",
+    metadata,
+    Column("table_name", String(100), primary_key=True),
+    Column("mode", String(20), nullable=False),
+    Column("file_path", Text, nullable=False),
+    Column("file_size", BigInteger, nullable=False),
+    Column("file_mtime", Float, nullable=False),
+    Column("chunk_rows", Integer, nullable=False),
+    Column("chunk_number", Integer, nullable=False),
+    Column("rows_read", BigInteger, nullable=False),
+    Column("last_pk", Text),
+    Column("watermark", String(50)),
+    Column("updated_at", TIMESTAMP, server_default=func.now(), onupdate=func.now()),
+)
+
+_psycopg2_dialect = postgresql.psycopg2.dialect()
+
+
+class Checkpoint:
+    """Состояние загрузки одной таблицы после последней закоммиченной порции"""
+
+    def __init__(self, table_name, mode, filepath, chunk_rows, chunk_number=0, rows_read=0,
+                 last_pk=None, watermark=None, file_size=None, file_mtime=None):
+        self.table_name = table_name
+        self.mode = mode
+        self.file_path = str(filepath)
+        if file_size is None or file_mtime is None:
+            stat = filepath.stat()
+            file_size, file_mtime = stat.st_size, stat.st_mtime
+        self.file_size = file_size
+        self.file_mtime = file_mtime
+        self.chunk_rows = chunk_rows
+        self.chunk_number = chunk_number
+        self.rows_read = rows_read
+        self.last_pk = last_pk
+        self.watermark = watermark
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row.table_name, row.mode, row.file_path, row.chunk_rows,
+            chunk_number=row.chunk_number,
+            rows_read=row.rows_read,
+            last_pk=row.last_pk,
+            watermark=date.fromisoformat(row.watermark) if row.watermark else None,
+            file_size=row.file_size,
+            file_mtime=row.file_mtime,
+        )
+
+    def matches(self, other):
+        """Тот же файл, режим и размер порции - можно продолжать"""
+        return (
+            self.file_path == other.file_path
+            and self.file_size == other.file_size
+            and self.file_mtime == other.file_mtime
+            and self.mode == other.mode
+            and self.chunk_rows == other.chunk_rows
+        )
+
+    def values(self):
+        return {
+            "table_name": self.table_name,
+            "mode": self.mode,
+            "file_path": self.file_path,
+            "file_size": self.file_size,
+            "file_mtime": self.file_mtime,
+            "chunk_rows": self.chunk_rows,
+            "chunk_number": self.chunk_number,
+            "rows_read": self.rows_read,
+            "last_pk": self.last_pk,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+        }
+
+
+def ensure_checkpoint_table(engine):
+    etl_checkpoints.create(engine, checkfirst=True)
+
+
+def load_checkpoint(engine, table_name):
+    with engine.connect() as conn:
+        row = conn.execute(
+            etl_checkpoints.select().where(etl_checkpoints.c.table_name == table_name)
+        ).first()
+    return Checkpoint.from_row(row) if row else None
+
+
+def clear_checkpoint(engine, table_name):
+    with engine.begin() as conn:
+        conn.execute(etl_checkpoints.delete().where(etl_checkpoints.c.table_name == table_name))
+
+
+def checkpoint_statement(checkpoint):
+    """INSERT ... ON CONFLICT DO UPDATE для записи чекпоинта"""
+    values = checkpoint.values()
+    stmt = insert(etl_checkpoints).values(**values)
+    updates = {key: stmt.excluded[key] for key in values if key != "table_name"}
+    updates["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(index_elements=["table_name"], set_=updates)
+
+
+def write_checkpoint(cursor, checkpoint):
+    """Записать чекпоинт через DBAPI-курсор psycopg2 (в его текущей транзакции)"""
+    compiled = checkpoint_statement(checkpoint).compile(dialect=_psycopg2_dialect)
+    cursor.execute(str(compiled), compiled.params)
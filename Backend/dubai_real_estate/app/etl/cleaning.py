@@ -0,0 +1,226 @@
+"""Общая очистка колонок для миграций CSV → PostgreSQL.
+
+Скалярные convert_float_to_decimal / convert_date_safe задают эталонные
+правила нормализации, а clean_*_series применяют те же правила ко всей
+колонке сразу: строки чистятся векторно через .str, числа проверяются
+pd.to_numeric, даты DD-MM-YYYY разбираются одним pd.to_datetime(format=...).
+Decimal строится только для уникальных значений колонки (pd.factorize),
+после чего результат раскладывается обратно по кодам.
+"""
+
+import math
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from operator import methodcaller
+
+import numpy as np
+import pandas as pd
+
+# Строки, которые считаются пустым значением (сравнение без учета регистра)
+NULL_TOKENS = ['null', 'nan', 'none', 'na', 'n/a']
+
+# Пустые значения текстовых колонок после strip
+TEXT_NULL_TOKENS = ['', 'nan', 'None', 'NULL']
+
+# Символы, которые вырезаются из числовых строк ("1,234" → "1234")
+_NUMBER_JUNK = str.maketrans('', '', '",')
+
+# Основной формат дат в выгрузках DLD
+DLD_DATE_FORMAT = '%d-%m-%Y'
+
+
+def convert_float_to_decimal(value, decimal_places=0):
+    """Конвертирует значение в Decimal с указанной точностью.
+
+    Целые числа, записанные с дробной частью (15802.000), приводятся
+    к целому Decimal; нечисловые и бесконечные значения дают None.
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+
+    if isinstance(value, str):
+        cleaned = value.strip().replace('"', '').replace(',', '')
+        if cleaned == '' or cleaned.lower() in NULL_TOKENS:
+            return None
+
+        try:
+            # Целое число с дробной частью .000...
+            if '.' in cleaned:
+                try:
+                    float_val = float(cleaned)
+                    if float_val.is_integer():
+                        return Decimal(str(int(float_val)))
+                except (ValueError, OverflowError):
+                    pass
+
+            dec_value = Decimal(cleaned)
+            if not dec_value.is_finite():
+                return None
+            if decimal_places > 0:
+                return round(dec_value, decimal_places)
+            return dec_value
+        except InvalidOperation:
+            return None
+
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        if float(value).is_integer():
+            return Decimal(str(int(value)))
+        dec_value = Decimal(str(value))
+        if decimal_places > 0:
+            return round(dec_value, decimal_places)
+        return dec_value
+
+    if isinstance(value, (int, np.integer, Decimal)):
+        return Decimal(str(value))
+
+    return None
+
+
+def convert_date_safe(value, dayfirst_timestamps=True):
+    """Безопасное преобразование даты (DD-MM-YYYY и варианты).
+
+    dayfirst_timestamps=False - значения со временем ("2020-01-05 00:00:00")
+    разбираются без dayfirst, как это делает выгрузка Valuation.
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+
+    if isinstance(value, str):
+        value_str = value.strip().replace('"', '')
+        if value_str == '':
+            return None
+
+        dayfirst = dayfirst_timestamps or ' ' not in value_str
+        parsed = pd.to_datetime(value_str, dayfirst=dayfirst, errors='coerce')
+        if pd.isna(parsed):
+            return None
+        return parsed.date()
+
+    return None
+
+
+def _strip_quotes(series):
+    """Удаление кавычек + strip; пустые строки становятся NaN"""
+    stripped = series.astype(object).where(series.notna(), None)
+    stripped = stripped.str.replace('"', '', regex=False).str.strip()
+    return stripped.mask(stripped == '')
+
+
+def _map_unique(series, converter):
+    """Применить converter к уникальным значениям и разложить результат по колонке"""
+    codes, uniques = pd.factorize(series)
+    converted = _object_array([converter(value) for value in uniques] + [None])
+    # NaN получает код -1 и попадает на последний элемент (None)
+    return pd.Series(converted[codes], index=series.index, dtype=object)
+
+
+def _round_decimal(value, exponent):
+    """round(Decimal, n) без исключения при переполнении точности"""
+    try:
+        return value.quantize(exponent)
+    except InvalidOperation:
+        return None
+
+
+def _object_array(values):
+    """list → object ndarray без медленного разбора элементов numpy"""
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _unique_decimals(uniques, decimal_places):
+    """Decimal для массива уникальных строк по правилам convert_float_to_decimal"""
+    original = strings = np.asarray(uniques, dtype=object)
+    numeric = pd.to_numeric(strings, errors='coerce').astype(float)
+
+    # Кавычки и разделители тысяч чистим только там, где число не разобралось сразу
+    retry = np.flatnonzero(~np.isfinite(numeric))
+    if len(retry):
+        strings = strings.copy()
+        strings[retry] = _object_array([value.translate(_NUMBER_JUNK).strip() for value in strings[retry]])
+        numeric[retry] = pd.to_numeric(strings[retry], errors='coerce').astype(float)
+
+    # pd.to_numeric отсекает пустые токены (null, n/a, ...), мусор и inf, но и то, что
+    # принимают Decimal()/float() ('1_000', арабско-индийские цифры): остаток - поячеечно
+    valid = np.isfinite(numeric)
+    result = np.full(len(uniques), None, dtype=object)
+    rest = np.flatnonzero(~valid)
+    if len(rest):
+        result[rest] = _object_array([convert_float_to_decimal(value, decimal_places) for value in original[rest]])
+    strings = strings[valid]
+    numeric = numeric[valid]
+
+    try:
+        decimals = list(map(Decimal, strings))
+    except InvalidOperation:
+        decimals = [convert_float_to_decimal(value, decimal_places) for value in strings]
+        result[valid] = _object_array(decimals)
+        return result
+
+    if decimal_places > 0:
+        exponent = Decimal(1).scaleb(-decimal_places)
+        try:
+            decimals = list(map(methodcaller('quantize', exponent), decimals))
+        except InvalidOperation:
+            decimals = [_round_decimal(value, exponent) for value in decimals]
+
+    # Целые числа с дробной частью (15802.000) → целый Decimal через float, как в
+    # convert_float_to_decimal (за пределами 2**53 значение округляется так же)
+    has_dot = np.fromiter(('.' in value for value in strings), dtype=bool, count=len(strings))
+    for position in np.flatnonzero(has_dot & (np.floor(numeric) == numeric)):
+        decimals[position] = Decimal(str(int(float(strings[position]))))
+
+    result[valid] = _object_array(decimals)
+    return result
+
+
+def clean_decimal_series(series, decimal_places=0):
+    """Векторная версия convert_float_to_decimal для строковой колонки"""
+    codes, uniques = pd.factorize(series)
+    converted = np.append(_unique_decimals(uniques, decimal_places), None)
+    # NaN получает код -1 и попадает на последний элемент (None)
+    return pd.Series(converted[codes], index=series.index, dtype=object)
+
+
+def clean_integer_series(series, bound):
+    """Decimal-колонка (после clean_decimal_series) → целые для INTEGER/BIGINT колонок.
+
+    Дробные значения округляются как при записи в NUMERIC(n, 0)
+    (ROUND_HALF_UP), значения вне [-bound, bound) становятся None.
+    Возвращает (колонка, сколько значений отброшено).
+    """
+    def to_integer(value):
+        if value is None:
+            return None
+        integer = int(value.to_integral_value(rounding=ROUND_HALF_UP))
+        return Decimal(integer) if -bound <= integer < bound else None
+
+    result = _map_unique(series, to_integer)
+    dropped = int((series.notna() & result.isna()).sum())
+    return result, dropped
+
+
+def clean_date_series(series, date_format=DLD_DATE_FORMAT, dayfirst_timestamps=True):
+    """Векторная версия convert_date_safe: сначала строгий формат, затем разбор остатка"""
+    cleaned = _strip_quotes(series)
+    parsed = pd.to_datetime(cleaned, format=date_format, errors='coerce')
+
+    result = pd.Series(parsed.dt.date, index=series.index, dtype=object)
+    result = result.where(parsed.notna(), None)
+
+    # Значения в другом формате (с временем, ISO и т.п.) разбираем как раньше
+    rest = cleaned[parsed.isna() & cleaned.notna()]
+    if not rest.empty:
+        fallback = _map_unique(rest, lambda v: convert_date_safe(v, dayfirst_timestamps))
+        result.loc[rest.index] = fallback
+
+    return result
+
+
+def clean_text_series(series, max_len=None):
+    """strip, обрезка до max_len и пустые значения → None"""
+    cleaned = series.fillna('').astype(str).str.strip()
+    if max_len:
+        cleaned = cleaned.str[:max_len]
+    cleaned = cleaned.mask(cleaned.isin(TEXT_NULL_TOKENS))
+    return cleaned.astype(object).where(cleaned.notna(), None)
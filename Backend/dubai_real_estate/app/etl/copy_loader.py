@@ -0,0 +1,251 @@
+"""Быстрая загрузка DataFrame в PostgreSQL через COPY ... FROM STDIN.
+
+Данные сначала потоково копируются во временную staging-таблицу той же
+структуры, что и целевая, а затем переносятся одним запросом
+INSERT ... SELECT ... ON CONFLICT DO NOTHING (или DO UPDATE для
+инкрементальной синхронизации). Строки, которые PostgreSQL
+не принимает (переполнение типа, слишком длинная строка и т.п.),
+отсеиваются делением порции пополам, без построчных коммитов.
+
+Если первичный ключ шире естественного ключа строки (PK секционированной
+таблицы дополнен колонкой секционирования, app.database.partitions),
+повторы ищутся по естественному ключу: при полной загрузке остается
+первая строка, а при синхронизации строка с изменившейся датой
+удаляется из старой секции и вставляется в новую.
+"""
+
+import csv
+import io
+
+import psycopg2
+from psycopg2 import sql
+
+# Маркер NULL в CSV-потоке для COPY
+NULL_MARKER = "\\N"
+
+# Сколько строк DataFrame уходит в один COPY и один коммит
+DEFAULT_CHUNK_ROWS = 50000
+
+
+def _frame_to_buffer(df):
+    """Сериализовать порцию DataFrame в CSV-буфер для COPY"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False, na_rep=NULL_MARKER, quoting=csv.QUOTE_MINIMAL)
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_rows(cursor, copy_sql, df, pk_columns):
+    """COPY порции в staging; при ошибке делим порцию пополам и ищем битые строки.
+
+    Возвращает список отклоненных записей вида {<pk>: value, 'error': msg}.
+    """
+    cursor.execute("SAVEPOINT copy_part")
+    try:
+        cursor.copy_expert(copy_sql, _frame_to_buffer(df))
+        cursor.execute("RELEASE SAVEPOINT copy_part")
+        return []
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT copy_part")
+        cursor.execute("RELEASE SAVEPOINT copy_part")
+        if len(df) == 1:
+            record = {col: df.iloc[0][col] for col in pk_columns}
+            record['error'] = str(e).strip()[:100]
+            return [record]
+
+    middle = len(df) // 2
+    return (
+        _copy_rows(cursor, copy_sql, df.iloc[:middle], pk_columns)
+        + _copy_rows(cursor, copy_sql, df.iloc[middle:], pk_columns)
+    )
+
+
+def _upsert_sql(table, staging, columns, pk_columns):
+    """INSERT ... ON CONFLICT DO UPDATE, который не трогает неизмененные строки"""
+    data_columns = [col for col in columns if col not in pk_columns]
+    column_list = sql.SQL(", ").join(sql.Identifier(col) for col in columns)
+    pk_list = sql.SQL(", ").join(sql.Identifier(col) for col in pk_columns)
+
+    if not data_columns:
+        return sql.SQL(
+            "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+            "ON CONFLICT ({pk}) DO NOTHING RETURNING true"
+        ).format(table=table, columns=column_list, staging=staging, pk=pk_list)
+
+    assignments = sql.SQL(", ").join(
+        sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(col)) for col in data_columns
+    )
+    current = sql.SQL(", ").join(
+        sql.SQL("{table}.{col}").format(table=table, col=sql.Identifier(col)) for col in data_columns
+    )
+    incoming = sql.SQL(", ").join(
+        sql.SQL("EXCLUDED.{col}").format(col=sql.Identifier(col)) for col in data_columns
+    )
+    # ROW(...) нужен, чтобы сравнение работало и для одной колонки
+    return sql.SQL(
+        "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+        "ON CONFLICT ({pk}) DO UPDATE SET {assignments} "
+        "WHERE ROW({current}) IS DISTINCT FROM ROW({incoming}) "
+        "RETURNING (xmax = 0)"
+    ).format(
+        table=table, columns=column_list, staging=staging, pk=pk_list,
+        assignments=assignments, current=current, incoming=incoming,
+    )
+
+
+def _relocate_sql(table, staging, key_columns, pk_columns, upsert):
+    """Строки staging, естественный ключ которых уже есть в таблице.
+
+    upsert=False - строка уже загружена (возможно, с другой датой):
+    удаляется из staging, в таблице остается первая.
+    upsert=True - у строки изменились колонки PK вне естественного ключа
+    (колонка секционирования): старая строка удаляется из таблицы,
+    а новую вставляет следующий INSERT ... ON CONFLICT.
+    """
+    live, staged = sql.Identifier("t"), sql.Identifier("s")
+    match = sql.SQL(" AND ").join(
+        sql.SQL("{t}.{col} = {s}.{col}").format(t=live, s=staged, col=sql.Identifier(col))
+        for col in key_columns
+    )
+    if not upsert:
+        return sql.SQL("DELETE FROM {staging} AS {s} USING {table} AS {t} WHERE {match}").format(
+            staging=staging, table=table, s=staged, t=live, match=match,
+        )
+    moved = [col for col in pk_columns if col not in key_columns]
+    current = sql.SQL(", ").join(sql.SQL("{t}.{col}").format(t=live, col=sql.Identifier(col)) for col in moved)
+    incoming = sql.SQL(", ").join(sql.SQL("{s}.{col}").format(s=staged, col=sql.Identifier(col)) for col in moved)
+    return sql.SQL(
+        "DELETE FROM {table} AS {t} USING {staging} AS {s} "
+        "WHERE {match} AND ROW({current}) IS DISTINCT FROM ROW({incoming})"
+    ).format(
+        table=table, staging=staging, t=live, s=staged, match=match, current=current, incoming=incoming,
+    )
+
+
+class CopyMerger:
+    """COPY-загрузка порций DataFrame через одну временную staging-таблицу.
+
+    Staging создается один раз и переиспользуется всеми порциями, поэтому
+    файл можно загружать потоково: merge() вызывается для каждого чанка
+    read_csv, а конфликт по первичному ключу отсекает повторы между чанками.
+
+    upsert=True - существующие строки обновляются (ON CONFLICT DO UPDATE),
+    причем только те, у которых действительно изменились значения.
+    key_columns - естественный ключ строки, если он короче pk_columns.
+    """
+
+    def __init__(self, connection, table_name, columns, pk_columns, upsert=False, key_columns=None):
+        self.connection = connection
+        self.columns = list(columns)
+        self.pk_columns = list(pk_columns)
+        self.key_columns = list(key_columns or pk_columns)
+
+        table = sql.Identifier(table_name)
+        self._staging = sql.Identifier(f"_stg_{table_name}")
+        column_list = sql.SQL(", ").join(sql.Identifier(col) for col in self.columns)
+        pk_list = sql.SQL(", ").join(sql.Identifier(col) for col in self.pk_columns)
+
+        self._create_sql = sql.SQL(
+            "CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table} INCLUDING DEFAULTS)"
+        ).format(staging=self._staging, table=table)
+        self._copy_sql = sql.SQL(
+            "COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv, NULL {null})"
+        ).format(staging=self._staging, columns=column_list, null=sql.Literal(NULL_MARKER))
+        self.upsert = upsert
+        if upsert:
+            self._merge_sql = _upsert_sql(table, self._staging, self.columns, self.pk_columns)
+        else:
+            self._merge_sql = sql.SQL(
+                "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+                "ON CONFLICT ({pk}) DO NOTHING"
+            ).format(table=table, columns=column_list, staging=self._staging, pk=pk_list)
+        self._relocate_sql = None
+        if self.key_columns != self.pk_columns:
+            self._relocate_sql = _relocate_sql(table, self._staging, self.key_columns, self.pk_columns, upsert)
+
+        self.inserted = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.rejected = []
+
+        with connection.cursor() as cursor:
+            cursor.execute(self._create_sql)
+            self._copy_sql = self._copy_sql.as_string(cursor)
+        connection.commit()
+
+    def merge(self, df, before_commit=None):
+        """Загрузить одну порцию (колонки в порядке self.columns) и закоммитить ее.
+
+        before_commit - необязательный callback(cursor), который выполняется
+        в той же транзакции перед коммитом (например, запись чекпоинта).
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql.SQL("TRUNCATE {staging}").format(staging=self._staging))
+            chunk_rejected = _copy_rows(cursor, self._copy_sql, df[self.columns], self.pk_columns)
+            staged = len(df) - len(chunk_rejected)
+
+            relocated = 0
+            if self._relocate_sql is not None:
+                cursor.execute(self._relocate_sql)
+                relocated = cursor.rowcount
+
+            cursor.execute(self._merge_sql)
+            if self.upsert:
+                # xmax = 0 у только что вставленных строк, иначе строка обновлена
+                flags = [row[0] for row in cursor.fetchall()]
+                # Строка, перенесенная в другую секцию, вставлена заново, но это обновление
+                chunk_inserted = sum(flags) - relocated
+                chunk_updated = len(flags) - chunk_inserted
+            else:
+                chunk_inserted = cursor.rowcount
+                chunk_updated = 0
+
+            if before_commit:
+                before_commit(cursor)
+        self.connection.commit()
+
+        self.inserted += chunk_inserted
+        self.updated += chunk_updated
+        # В режиме upsert сюда попадают строки без изменений
+        self.duplicates += staged - chunk_inserted - chunk_updated
+        self.rejected.extend(chunk_rejected)
+        return chunk_inserted
+
+    def close(self):
+        """Удалить staging-таблицу"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP TABLE IF EXISTS {staging}").format(staging=self._staging))
+        self.connection.commit()
+
+    def result(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
+
+
+def copy_merge(connection, df, table_name, pk_columns, chunk_rows=DEFAULT_CHUNK_ROWS, progress=None):
+    """Загрузить DataFrame в таблицу через COPY во временную таблицу и merge.
+
+    connection - DBAPI-соединение psycopg2 (engine.raw_connection()).
+    Колонки DataFrame должны совпадать с именами колонок таблицы.
+    progress - необязательный callback(processed, inserted) после каждой порции.
+
+    Возвращает словарь со счетчиками:
+        inserted   - сколько строк реально вставлено;
+        duplicates - сколько строк пропущено из-за конфликта по первичному ключу;
+        rejected   - список строк, отклоненных PostgreSQL (с текстом ошибки).
+    """
+    merger = CopyMerger(connection, table_name, df.columns, pk_columns)
+
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        merger.merge(chunk)
+
+        if progress:
+            progress(start + len(chunk), merger.inserted)
+
+    merger.close()
+    return merger.result()
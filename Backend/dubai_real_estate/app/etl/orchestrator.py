@@ -0,0 +1,201 @@
+"""Параллельная загрузка всех CSV-выгрузок DLD.
+
+Таблицы загружаются этапами по графу зависимостей: сначала справочники
+lkp_*, затем независимые большие таблицы. Таблицы одного этапа идут
+параллельно в отдельных процессах, у каждого процесса свой engine и свое
+соединение, поэтому полная перезагрузка упирается в самую большую
+таблицу, а не в сумму всех.
+"""
+
+import contextlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.database.partitions import partition_column
+from app.etl.pipeline import DEFAULT_CHUNK_ROWS, run_migration
+from app.etl.specs import SPECS
+
+LOOKUP_TABLES = [
+    "lkp_areas",
+    "lkp_market_types",
+    "lkp_transaction_groups",
+    "lkp_transaction_procedures",
+]
+
+# Таблица → таблицы, которые должны быть загружены раньше нее
+DEPENDENCIES = {
+    "lkp_areas": [],
+    "lkp_market_types": [],
+    "lkp_transaction_groups": [],
+    "lkp_transaction_procedures": [],
+    "valuation": LOOKUP_TABLES,
+    "units": LOOKUP_TABLES,
+    "buildings": LOOKUP_TABLES,
+    "projects": LOOKUP_TABLES,
+    "transactions": LOOKUP_TABLES,
+}
+
+
+def plan_stages(tables):
+    """Разбить выбранные таблицы на этапы по DEPENDENCIES.
+
+    Зависимости, не попавшие в выборку, считаются уже загруженными.
+    """
+    unknown = [table for table in tables if table not in DEPENDENCIES]
+    if unknown:
+        raise ValueError(f"Неизвестные таблицы: {unknown}. Доступны: {list(DEPENDENCIES)}")
+
+    remaining = {table: set(DEPENDENCIES[table]) & set(tables) for table in tables}
+    stages = []
+    while remaining:
+        ready = [table for table, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Циклическая зависимость между таблицами: {list(remaining)}")
+        stages.append(ready)
+        for table in ready:
+            del remaining[table]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return stages
+
+
+def check_year_reload(tables, mode, year):
+    """Перезагрузка года (year) возможна только для mode="full" и таблиц, секционированных по году"""
+    if year is None:
+        return
+    if mode != "full":
+        raise ValueError("Перезагрузка года поддерживается только для --mode full")
+    unpartitioned = [table for table in tables if partition_column(SPECS[table].table) is None]
+    if unpartitioned:
+        partitioned = [table for table in DEPENDENCIES if partition_column(SPECS[table].table) is not None]
+        raise ValueError(
+            f"Таблицы {unpartitioned} не секционированы по году, "
+            f"перезагрузка года возможна только для {partitioned} (--tables)"
+        )
+
+
+class _PrefixedStream:
+    """stdout, который помечает каждую строку именем таблицы"""
+
+    def __init__(self, stream, prefix):
+        self.stream = stream
+        self.prefix = prefix
+        self._buffer = ""
+
+    def write(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self.stream.write(f"[{self.prefix}] {line}\n")
+        self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self.stream.write(f"[{self.prefix}] {self._buffer}\n")
+            self._buffer = ""
+        self.stream.flush()
+
+
+def migrate_table(table, db_uri, data_folder, loader="copy", chunk_rows=DEFAULT_CHUNK_ROWS,
+                  mode="full", use_watermark=True, resume=False, use_cache=True, year=None):
+    """Загрузить одну таблицу в текущем процессе со своим соединением"""
+    # Пул между процессами не делится, каждому воркеру хватает одного соединения
+    engine = create_engine(db_uri, poolclass=NullPool)
+    stream = _PrefixedStream(sys.stdout, table)
+    try:
+        with contextlib.redirect_stdout(stream):
+            return run_migration(
+                SPECS[table], engine, data_folder,
+                loader=loader, chunk_rows=chunk_rows, mode=mode,
+                use_watermark=use_watermark, resume=resume, use_cache=use_cache, year=year,
+            )
+    finally:
+        stream.flush()
+        engine.dispose()
+
+
+def print_report(summaries, elapsed):
+    print(f"\n{'=' * 100}")
+    print("📊 Сводный отчет")
+    print(f"{'таблица':<28}{'статус':<10}{'строк CSV':>12}{'вставлено':>12}"
+          f"{'обновлено':>12}{'ошибок':>9}{'время, с':>11}")
+    for summary in summaries:
+        print(f"{summary['table']:<28}{summary['status']:<10}{summary['rows']:>12}"
+              f"{summary['inserted']:>12}{summary['updated']:>12}{summary['rejected']:>9}"
+              f"{summary['elapsed']:>11.1f}")
+    sequential = sum(summary["elapsed"] for summary in summaries)
+    print(f"\n⏱️  Общее время: {elapsed:.1f} сек (последовательно было бы ~{sequential:.1f} сек)")
+    print("=" * 100)
+
+
+def run_all(db_uri, data_folder, tables=None, workers=None, loader="copy",
+            chunk_rows=DEFAULT_CHUNK_ROWS, mode="full", use_watermark=True, resume=False,
+            use_cache=True, year=None):
+    """Загрузить выбранные таблицы (по умолчанию все) с учетом зависимостей.
+
+    workers - сколько таблиц загружать одновременно (по умолчанию число ядер).
+    Если таблица не загрузилась, зависящие от нее таблицы пропускаются.
+    resume=True - каждая таблица продолжается со своего чекпоинта.
+    year - перезагрузить только секцию этого года (таблицы, секционированные по году).
+    Возвращает список итогов run_migration по каждой таблице.
+    """
+    tables = list(tables or DEPENDENCIES)
+    workers = workers or os.cpu_count() or 1
+    stages = plan_stages(tables)
+    # До запуска воркеров: иначе справочники падают, а зависящие от них таблицы пропускаются
+    check_year_reload(tables, mode, year)
+
+    start_time = time.time()
+    summaries = []
+    failed = set()
+
+    for number, stage in enumerate(stages, start=1):
+        print(f"\n🚀 Этап {number}/{len(stages)}: {', '.join(stage)}")
+
+        runnable = []
+        for table in stage:
+            broken = failed & set(DEPENDENCIES[table])
+            if broken:
+                print(f"⏭️  {table}: пропущена, не загружены зависимости {sorted(broken)}")
+                failed.add(table)
+                summaries.append({
+                    "table": table, "status": "skipped", "rows": 0, "inserted": 0,
+                    "updated": 0, "duplicates": 0, "rejected": 0, "elapsed": 0.0,
+                })
+            else:
+                runnable.append(table)
+
+        if not runnable:
+            continue
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(runnable))) as executor:
+            futures = {
+                executor.submit(
+                    migrate_table, table, db_uri, data_folder,
+                    loader, chunk_rows, mode, use_watermark, resume, use_cache, year,
+                ): table
+                for table in runnable
+            }
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    print(f"❌ {table}: воркер завершился с ошибкой: {e}")
+                    summary = {
+                        "table": table, "status": "failed", "rows": 0, "inserted": 0,
+                        "updated": 0, "duplicates": 0, "rejected": 0, "elapsed": 0.0,
+                    }
+                if summary["status"] != "ok":
+                    failed.add(table)
+                print(f"🏁 {table}: {summary['status']} за {summary['elapsed']:.1f} сек")
+                summaries.append(summary)
+
+    print_report(summaries, time.time() - start_time)
+    return summaries
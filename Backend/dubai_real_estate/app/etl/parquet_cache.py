@@ -0,0 +1,209 @@
+"""Кэш очищенных выгрузок DLD в Parquet.
+
+CSV разбирается и чистится один раз: каждая порция read_csv после
+clean_chunk пишется в отдельный part-NNNNN.parquet с типами колонок
+таблицы (decimal, date, string). Рядом лежит manifest.json с размером,
+mtime и sha256 исходного файла и отпечатком правил очистки, поэтому
+повторная загрузка того же файла сразу читает колоночный Parquet.
+
+Структура каталога:
+    <DATA_FOLDER>/.parquet_cache/<table>/manifest.json
+    <DATA_FOLDER>/.parquet_cache/<table>/part-00000.parquet
+"""
+
+import decimal
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Integer, Numeric
+
+# Увеличить при изменении правил в app.etl.cleaning, чтобы кэш пересобрался
+CACHE_VERSION = 1
+
+CACHE_DIR_NAME = ".parquet_cache"
+MANIFEST_NAME = "manifest.json"
+
+# Точность decimal в Parquet и контекст округления как у PostgreSQL numeric
+_DECIMAL_PRECISION = 38
+_DECIMAL_CONTEXT = decimal.Context(prec=_DECIMAL_PRECISION, rounding=decimal.ROUND_HALF_UP)
+
+
+def cache_dir(spec, data_folder):
+    return Path(data_folder) / CACHE_DIR_NAME / spec.name
+
+
+def file_sha256(filepath, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def spec_fingerprint(spec):
+    """Хэш правил очистки spec: при их изменении кэш считается устаревшим"""
+    rules = {
+        "version": CACHE_VERSION,
+        "columns": spec.columns,
+        "numeric": spec.numeric_fields,
+        "integers": spec.integer_bounds,
+        "dates": spec.date_fields,
+        "text": spec.text_fields,
+        "dayfirst_timestamps": spec.dayfirst_timestamps,
+    }
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+def _column_scale(spec, name):
+    """Сколько знаков после запятой хранит колонка в БД"""
+    column_type = spec.table.c[name].type
+    if isinstance(column_type, Numeric):
+        return column_type.scale or 0
+    if isinstance(column_type, Integer):
+        return 0
+    return spec.numeric_fields[name]
+
+
+def arrow_schema(spec, columns):
+    fields = []
+    for name in columns:
+        if name in spec.numeric_fields:
+            arrow_type = pa.decimal128(_DECIMAL_PRECISION, _column_scale(spec, name))
+        elif name in spec.date_fields:
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _quantize_series(series, scale):
+    """Привести Decimal к scale колонки так же, как это сделал бы PostgreSQL"""
+    exponent = decimal.Decimal(1).scaleb(-scale)
+
+    def quantize(value):
+        try:
+            return _DECIMAL_CONTEXT.quantize(value, exponent)
+        except decimal.InvalidOperation:
+            return None
+
+    codes, uniques = pd.factorize(series)
+    converted = pd.Series([quantize(value) for value in uniques] + [None], dtype=object).to_numpy()
+    return pd.Series(converted[codes], index=series.index, dtype=object)
+
+
+def frame_to_table(spec, df, schema):
+    """Очищенная порция (object-колонки) → pyarrow.Table со схемой таблицы"""
+    arrays = []
+    for field in schema:
+        values = df[field.name]
+        if pa.types.is_decimal(field.type):
+            values = _quantize_series(values, field.type.scale)
+        arrays.append(pa.array(values, type=field.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def read_manifest(directory):
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(directory, manifest):
+    path = Path(directory) / MANIFEST_NAME
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+
+
+def is_fresh(manifest, spec, filepath):
+    """Кэш собран из этого же файла по текущим правилам очистки.
+
+    Если совпали размер и mtime, файл не перечитывается. Если mtime
+    изменился (файл скопировали заново), сверяется sha256 содержимого.
+    """
+    if not manifest or manifest.get("spec") != spec_fingerprint(spec):
+        return False
+
+    stat = Path(filepath).stat()
+    if manifest["size"] != stat.st_size:
+        return False
+    if manifest["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if manifest["sha256"] != file_sha256(filepath):
+        return False
+
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+class ParquetSource:
+    """Чтение очищенных порций из кэша: по одному part-файлу за раз"""
+
+    def __init__(self, directory, manifest):
+        self.directory = Path(directory)
+        self.manifest = manifest
+        self.columns = manifest["columns"]
+        self.chunk_rows = manifest["chunk_rows"]
+
+    def chunks(self, skip=0):
+        """Порции из part-файлов; первые skip файлов не читаются вовсе"""
+        for part in self.manifest["parts"][skip:]:
+            table = pq.read_table(self.directory / part)
+            df = table.to_pandas(date_as_object=True)
+            yield df.astype(object).where(pd.notna(df), None)
+
+
+def build_cache(spec, filepath, directory, csv_source):
+    """Прочитать CSV через csv_source и записать очищенные порции в Parquet"""
+    directory = Path(directory)
+    if directory.exists():
+        shutil.rmtree(directory)
+    directory.mkdir(parents=True)
+
+    stat = Path(filepath).stat()
+    schema = arrow_schema(spec, csv_source.columns)
+    parts = []
+    rows = 0
+    for number, df in enumerate(csv_source.chunks()):
+        part = f"part-{number:05d}.parquet"
+        pq.write_table(frame_to_table(spec, df, schema), directory / part)
+        parts.append(part)
+        rows += len(df)
+        print(f"  📦 {part}: {len(df)} строк")
+
+    manifest = {
+        "source": str(filepath),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(filepath),
+        "spec": spec_fingerprint(spec),
+        "chunk_rows": csv_source.chunk_rows,
+        "columns": csv_source.columns,
+        "rows": rows,
+        "parts": parts,
+    }
+    # Манифест пишется последним: без него недособранный кэш не используется
+    _write_manifest(directory, manifest)
+    return manifest
+
+
+def open_cached(spec, filepath, data_folder, csv_source):
+    """ParquetSource для файла; кэш пересобирается, если он устарел"""
+    directory = cache_dir(spec, data_folder)
+    manifest = read_manifest(directory)
+    if is_fresh(manifest, spec, filepath):
+        _write_manifest(directory, manifest)
+        print(f"📦 Используем Parquet-кэш {directory} ({manifest['rows']} строк)")
+    else:
+        print(f"📦 Собираем Parquet-кэш {directory}...")
+        manifest = build_cache(spec, filepath, directory, csv_source)
+    return ParquetSource(directory, manifest)
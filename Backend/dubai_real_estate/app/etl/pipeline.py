@@ -0,0 +1,580 @@
+"""Потоковая миграция CSV-выгрузок DLD в PostgreSQL.
+
+Файл читается чанками через pd.read_csv(chunksize=...), каждый чанк
+очищается и сразу загружается в таблицу, поэтому пиковая память
+определяется размером чанка (chunk_rows), а не размером файла.
+Дубликаты по первичному ключу отсекаются внутри чанка drop_duplicates,
+а между чанками - конфликтом ON CONFLICT DO NOTHING (loader="copy")
+или множеством уже загруженных ключей (loader="orm").
+
+use_cache=True читает порции из Parquet-кэша очищенных данных
+(app.etl.parquet_cache), который собирается при первой загрузке файла.
+
+mode="full" строит таблицу заново в теневой копии <table>_new и подменяет
+ею живую таблицу только после загрузки, индексов и ANALYZE (app.etl.shadow).
+
+Для выгрузок с spec.encoding подписи *_en/*_ar каждой порции заменяются
+кодами измерений dim_* перед загрузкой в таблицу фактов fact_<table>
+(app.database.dimensions); API читает ее через представление <table>.
+
+Для таблиц, секционированных по году (app.database.partitions), перед
+загрузкой порции создаются секции недостающих лет. year=... перезагружает
+только секцию одного года: строки остальных лет пропускаются, а секция
+подменяется через DETACH / ATTACH PARTITION (app.etl.shadow).
+
+После загрузки, изменившей таблицу, поднимается ее версия в
+dataset_versions (app.database.dataset_versions) - по ней API
+инвалидирует HTTP-кэш.
+
+mode="sync" не пересоздает таблицу: строки CSV сливаются с живой таблицей
+через INSERT ... ON CONFLICT DO UPDATE, а обновляются только строки,
+значения которых изменились. Для выгрузок с watermark_column строки
+старше максимальной даты в таблице отбрасываются еще до загрузки.
+"""
+
+import time
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from app.database.dataset_versions import bump_dataset_version
+from app.database.partitions import create_year_partitions, ensure_partitioned, partition_column, partition_name, years_in
+from app.etl.cleaning import clean_decimal_series, clean_date_series, clean_integer_series, clean_text_series
+from app.etl.checkpoint import (
+    Checkpoint,
+    checkpoint_statement,
+    clear_checkpoint,
+    ensure_checkpoint_table,
+    load_checkpoint,
+    write_checkpoint,
+)
+from app.etl.copy_loader import CopyMerger
+from app.etl.parquet_cache import open_cached
+from app.etl.shadow import build_shadow_table, create_shadow, drop_shadow, publish_shadow, shadow_exists
+
+# Сколько строк CSV читается и очищается за один раз
+DEFAULT_CHUNK_ROWS = 100000
+
+# Значения, которые read_csv считает пустыми
+CSV_NA_VALUES = ['', 'NULL', 'null', 'Null', 'N/A', 'n/a', 'NaN', 'nan']
+
+LOADERS = ("copy", "orm")
+
+# full - перестроить таблицу через теневую копию, sync - инкрементально обновить живую таблицу
+MODES = ("full", "sync")
+
+
+def find_csv(spec, data_folder):
+    """Найти файл выгрузки по возможным именам из spec.file_names"""
+    for name in spec.file_names:
+        path = Path(data_folder) / name
+        if path.exists():
+            return path
+    return None
+
+
+def read_csv_chunks(filepath, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Итератор по чанкам CSV; все значения читаются как строки"""
+    return pd.read_csv(
+        filepath,
+        encoding='utf-8-sig',
+        dtype=str,
+        keep_default_na=False,
+        na_values=CSV_NA_VALUES,
+        on_bad_lines='skip',
+        chunksize=chunk_rows,
+    )
+
+
+def resolve_columns(spec, csv_columns):
+    """Сопоставить колонки CSV (в нижнем регистре) с целевыми колонками таблицы.
+
+    Возвращает (rename, available): rename - {колонка CSV: целевая колонка},
+    available - целевые колонки, найденные в файле, в порядке spec.columns.
+    """
+    rename = {}
+    for target_col, candidates in spec.columns.items():
+        for candidate in candidates:
+            if candidate in csv_columns:
+                rename[candidate] = target_col
+                break
+    available = [col for col in spec.columns if col in rename.values()]
+    return rename, available
+
+
+def clean_chunk(spec, chunk, rename, available):
+    """Переименовать, отфильтровать и очистить один чанк CSV"""
+    chunk.columns = [col.strip().lower() for col in chunk.columns]
+    df = chunk.rename(columns=rename)[available]
+
+    for col, decimal_places in spec.numeric_fields.items():
+        if col in df.columns:
+            df[col] = clean_decimal_series(df[col], decimal_places)
+
+    for col, bound in spec.integer_bounds.items():
+        if col in df.columns:
+            df[col], dropped = clean_integer_series(df[col], bound)
+            if dropped:
+                print(f"  ⚠️  {spec.name}.{col}: {dropped} значений вне диапазона целого типа → NULL")
+
+    for col in spec.date_fields:
+        if col in df.columns:
+            df[col] = clean_date_series(df[col], dayfirst_timestamps=spec.dayfirst_timestamps)
+
+    for col, max_len in spec.text_fields.items():
+        if col in df.columns:
+            df[col] = clean_text_series(df[col], max_len)
+
+    return df.astype(object).where(pd.notna(df), None)
+
+
+class CsvSource:
+    """Очищенные порции, прочитанные напрямую из CSV"""
+
+    def __init__(self, spec, filepath, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.spec = spec
+        self.filepath = filepath
+        self.chunk_rows = chunk_rows
+        header = pd.read_csv(filepath, encoding='utf-8-sig', nrows=0)
+        csv_columns = [col.strip().lower() for col in header.columns]
+        self.rename, self.columns = resolve_columns(spec, csv_columns)
+
+    def chunks(self, skip=0):
+        """Порции после clean_chunk; первые skip порций только читаются"""
+        for number, chunk in enumerate(read_csv_chunks(self.filepath, self.chunk_rows)):
+            if number < skip:
+                continue
+            yield clean_chunk(self.spec, chunk, self.rename, self.columns)
+
+
+class CopyLoader:
+    """Загрузка чанков через COPY в staging и INSERT ... ON CONFLICT DO NOTHING"""
+
+    def __init__(self, engine, spec, table, columns, upsert=False):
+        self.raw_connection = engine.raw_connection()
+        self.merger = CopyMerger(
+            self.raw_connection, table.name, columns, spec.pk_columns, upsert=upsert, key_columns=spec.key_columns
+        )
+
+    def load(self, df, checkpoint=None):
+        """Загрузить порцию; чекпоинт пишется в той же транзакции"""
+        before_commit = None
+        if checkpoint is not None:
+            before_commit = lambda cursor: write_checkpoint(cursor, checkpoint)
+        return self.merger.merge(df, before_commit=before_commit)
+
+    def close(self):
+        try:
+            self.merger.close()
+        finally:
+            self.raw_connection.close()
+
+    def result(self):
+        return self.merger.result()
+
+
+class OrmLoader:
+    """Загрузка чанков пакетным INSERT через сессию с построчным fallback.
+
+    Ключи уже загруженных строк хранятся в множестве, чтобы повторы
+    из следующих чанков не доходили до базы.
+    """
+
+    def __init__(self, engine, spec, table, columns, upsert=False):
+        if upsert:
+            raise ValueError("Режим sync поддерживается только для loader=copy")
+        self.spec = spec
+        self.insert = table.insert()
+        self.session = sessionmaker(bind=engine)()
+        self.seen_keys = set()
+        self.inserted = 0
+        self.duplicates = 0
+        self.rejected = []
+
+    def _key(self, record):
+        return tuple(record[col] for col in self.spec.key_columns)
+
+    def load(self, df, checkpoint=None):
+        """Загрузить порцию пакетами; чекпоинт пишется после последнего пакета"""
+        records = []
+        for record in df.to_dict('records'):
+            key = self._key(record)
+            if key in self.seen_keys:
+                self.duplicates += 1
+                continue
+            self.seen_keys.add(key)
+            records.append(record)
+
+        inserted_before = self.inserted
+        batch_size = self.spec.orm_batch_size
+        for i in range(0, len(records), batch_size):
+            self._insert_batch(records[i:i + batch_size])
+
+        if checkpoint is not None:
+            self.session.execute(checkpoint_statement(checkpoint))
+            self.session.commit()
+        return self.inserted - inserted_before
+
+    def _insert_batch(self, batch):
+        try:
+            self.session.execute(self.insert, batch)
+            self.session.commit()
+            self.inserted += len(batch)
+            return
+        except Exception as e:
+            self.session.rollback()
+            print(f"  ❌ Ошибка при вставке batch: {str(e)[:200]}")
+
+        # Вставляем построчно, чтобы найти проблемные записи
+        for record in batch:
+            try:
+                self.session.execute(self.insert, record)
+                self.session.commit()
+                self.inserted += 1
+            except Exception as e:
+                self.session.rollback()
+                error_msg = str(e)[:100]
+                if "duplicate key" in error_msg.lower() or "unique violation" in error_msg.lower():
+                    self.duplicates += 1
+                    continue
+                failed = {col: record.get(col) for col in self.spec.pk_columns}
+                failed['error'] = error_msg
+                self.rejected.append(failed)
+
+    def close(self):
+        self.session.close()
+
+    def result(self):
+        return {
+            "inserted": self.inserted,
+            "updated": 0,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+        }
+
+
+def read_watermark(spec, session):
+    """Максимальное значение watermark_column в таблице (None, если таблица пуста)"""
+    column = getattr(spec.model, spec.watermark_column)
+    return session.query(func.max(column)).scalar()
+
+
+def filter_by_watermark(df, column, watermark):
+    """Оставить строки не старше watermark; строки без даты сохраняются"""
+    dates = pd.to_datetime(df[column])
+    return df[dates.isna() | (dates >= pd.Timestamp(watermark))]
+
+
+def filter_by_year(df, column, year):
+    """Оставить строки, дата которых приходится на year"""
+    return df[pd.to_datetime(df[column]).dt.year == year]
+
+
+def _print_sample(spec, df, limit=3):
+    print("\n🔍 Проверка примеров данных:")
+    for i in range(min(limit, len(df))):
+        print(f"\nЗапись {i+1}:")
+        row = df.iloc[i]
+        for col in spec.sample_columns:
+            if col in df.columns:
+                val = row[col]
+                if val is not None:
+                    print(f"  {col}: {val} (тип: {type(val).__name__})")
+                else:
+                    print(f"  {col}: None")
+
+
+def _print_db_sample(spec, session, limit=3):
+    model = spec.model
+    count = session.query(model).count()
+    print(f"\n📊 Всего записей в таблице {spec.name}: {count:,}")
+
+    print("\n🔍 Проверка данных в БД:")
+    if count == 0:
+        print("  ❌ В таблице нет записей")
+        return
+
+    order_by = [getattr(model, col) for col in spec.pk_columns]
+    for rec in session.query(model).order_by(*order_by).limit(limit).all():
+        print()
+        for col in spec.sample_columns:
+            val = getattr(rec, col)
+            print(f"  {col}: {val} (тип: {type(val).__name__})")
+
+
+def run_migration(spec, engine, data_folder, loader="copy", chunk_rows=DEFAULT_CHUNK_ROWS,
+                  mode="full", use_watermark=True, resume=False, use_cache=True, year=None):
+    """Потоково загрузить CSV-выгрузку в таблицу spec.
+
+    loader="copy" - COPY через staging-таблицу (быстро),
+    loader="orm" - пакетная вставка через сессию SQLAlchemy.
+    chunk_rows - сколько строк CSV держать в памяти одновременно.
+    mode="full" - собрать таблицу заново в <table>_new и атомарно подменить
+    ею живую таблицу, mode="sync" - применить только
+    новые и измененные строки к живой таблице (только loader="copy").
+    use_watermark - в режиме sync пропускать строки старше максимальной
+    даты spec.watermark_column в таблице.
+    resume - продолжить прерванную загрузку с последнего чекпоинта
+    (тот же файл, режим и chunk_rows), пропустив уже загруженные порции.
+    use_cache - читать очищенные порции из Parquet-кэша (собирается при
+    первом запуске или изменении файла) вместо повторного разбора CSV.
+    year - только для mode="full" и таблиц, секционированных по году:
+    перезагрузить одну секцию года, не трогая остальные.
+
+    Возвращает словарь с итогами загрузки (status, rows, inserted, updated,
+    duplicates, rejected, elapsed) для сводного отчета оркестратора.
+    """
+    if loader not in LOADERS:
+        raise ValueError(f"Неизвестный loader: {loader}")
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим: {mode}")
+    if mode == "sync" and loader != "copy":
+        raise ValueError("Режим sync поддерживается только для loader=copy")
+    partition_by = partition_column(spec.table)
+    if year is not None and (partition_by is None or mode != "full"):
+        raise ValueError("Перезагрузка года поддерживается только для mode=full и таблиц, секционированных по году")
+
+    summary = {
+        "table": spec.name,
+        "status": "failed",
+        "rows": 0,
+        "inserted": 0,
+        "updated": 0,
+        "duplicates": 0,
+        "rejected": 0,
+        "elapsed": 0.0,
+    }
+
+    filepath = find_csv(spec, data_folder)
+    if not filepath:
+        print(f"❌ Файл {spec.name} не найден в {data_folder}")
+        print("Искали файлы:", spec.file_names)
+        summary["status"] = "missing"
+        return summary
+    print(f"📁 Найден файл: {filepath}")
+
+    source = CsvSource(spec, filepath, chunk_rows)
+    available = source.columns
+    print(f"📊 Найдено {len(available)} колонок из {len(spec.columns)} ожидаемых")
+
+    missing = set(spec.columns) - set(available)
+    if missing:
+        print(f"⚠️ Отсутствуют колонки: {missing}")
+    missing_pk = set(spec.pk_columns) - set(available)
+    if missing_pk:
+        print(f"❌ Критическая ошибка: отсутствуют колонки первичного ключа {missing_pk}!")
+        return summary
+
+    if use_cache:
+        source = open_cached(spec, filepath, data_folder, source)
+
+    ensure_checkpoint_table(engine)
+    # Перезагрузка года ведет свой чекпоинт и не сбивает чекпоинт всей таблицы
+    checkpoint_name = spec.name if year is None else partition_name(spec.name, year)
+    # Для кэша размер порции задан при его сборке
+    state = Checkpoint(checkpoint_name, mode, filepath, source.chunk_rows)
+    checkpoint = load_checkpoint(engine, checkpoint_name) if resume else None
+    if checkpoint is not None and not checkpoint.matches(state):
+        print("⚠️ Чекпоинт относится к другому файлу, режиму или chunk_rows - загрузка с начала")
+        checkpoint = None
+    if checkpoint is not None and mode == "full" and not shadow_exists(engine, spec, year):
+        print("⚠️ Теневая таблица прошлого запуска не найдена - загрузка с начала")
+        checkpoint = None
+    if checkpoint is None:
+        if resume:
+            print("ℹ️ Чекпоинт не найден, загрузка с начала")
+        clear_checkpoint(engine, checkpoint_name)
+    else:
+        print(f"♻️ Продолжаем с порции {checkpoint.chunk_number + 1} "
+              f"(прочитано {checkpoint.rows_read} строк, последний PK: {checkpoint.last_pk})")
+        state = checkpoint
+
+    if year is not None:
+        # Секцию можно подменить только в уже секционированной живой таблице
+        with engine.connect() as conn:
+            ensure_partitioned(conn, spec.table)
+    if mode == "full":
+        # Живая таблица остается доступной API до самой подмены
+        if checkpoint is not None:
+            target = build_shadow_table(spec, year)
+        else:
+            target = create_shadow(engine, spec, year)
+        print(f"🔄 Загрузка в теневую таблицу {target.name}...")
+    else:
+        print(f"🔁 Инкрементальная синхронизация таблицы {spec.name}...")
+        if spec.encoding is not None:
+            spec.encoding.ensure(engine)
+        else:
+            spec.table.metadata.create_all(engine, tables=[spec.table], checkfirst=True)
+        with engine.connect() as conn:
+            ensure_partitioned(conn, spec.table)
+        target = spec.table
+
+    # Секции по годам создает загрузчик; PostgreSQL раскладывает строки по ним сам
+    partitioned_target = partition_column(target) if engine.dialect.name == "postgresql" else None
+    partitioned_years = set()
+
+    # Колонки, которые уходят в таблицу: подписи заменяются кодами измерений
+    storage_columns = available
+    if spec.encoding is not None:
+        spec.encoding.prepare(engine)
+        storage_columns = spec.encoding.storage_columns(available)
+
+    print(f"📖 Чтение файла порциями по {source.chunk_rows} строк: {filepath}")
+    print(f"📥 Вставка данных в БД (loader={loader})...")
+    start_time = time.time()
+
+    total_rows = state.rows_read
+    removed_no_pk = 0
+    removed_duplicates = 0
+    skipped_by_watermark = 0
+    skipped_other_years = 0
+    non_null_counts = {}
+    db_loader = None
+    published = False
+    committed_chunk = state.chunk_number
+    session = sessionmaker(bind=engine)()
+
+    try:
+        watermark = None
+        if mode == "sync" and use_watermark and spec.watermark_column:
+            # При продолжении берем watermark первого запуска, а не уже дозагруженной таблицы
+            watermark = state.watermark if checkpoint is not None else read_watermark(spec, session)
+            state.watermark = watermark
+            session.commit()
+            print(f"📅 Watermark {spec.watermark_column}: {watermark}")
+
+        loader_class = CopyLoader if loader == "copy" else OrmLoader
+        db_loader = loader_class(engine, spec, target, storage_columns, upsert=(mode == "sync"))
+
+        # Порции, загруженные до сбоя, пропускаются
+        skip = committed_chunk
+        for chunk_number, df in enumerate(source.chunks(skip=skip), start=skip + 1):
+            total_rows += len(df)
+
+            for col in available:
+                non_null_counts[col] = non_null_counts.get(col, 0) + int(df[col].notna().sum())
+
+            rows = len(df)
+            df = df.dropna(subset=spec.pk_columns, how='any')
+            removed_no_pk += rows - len(df)
+
+            rows = len(df)
+            df = df.drop_duplicates(subset=spec.key_columns, keep='first')
+            removed_duplicates += rows - len(df)
+
+            if watermark is not None and spec.watermark_column in df.columns:
+                rows = len(df)
+                df = filter_by_watermark(df, spec.watermark_column, watermark)
+                skipped_by_watermark += rows - len(df)
+
+            if year is not None:
+                rows = len(df)
+                df = filter_by_year(df, partition_by, year)
+                skipped_other_years += rows - len(df)
+
+            if chunk_number == 1 and len(df) > 0:
+                _print_sample(spec, df)
+
+            state.chunk_number = chunk_number
+            state.rows_read = total_rows
+            if len(df) > 0:
+                state.last_pk = ",".join(str(df.iloc[-1][col]) for col in spec.pk_columns)
+
+            if partitioned_target is not None:
+                years = years_in(df[partitioned_target]) - partitioned_years
+                if years:
+                    with engine.begin() as conn:
+                        create_year_partitions(conn, target.name, years)
+                    partitioned_years |= years
+
+            if spec.encoding is not None:
+                df = spec.encoding.encode(engine, df)
+
+            db_loader.load(df, checkpoint=state)
+            committed_chunk = chunk_number
+            print(f"  ✅ Порция {chunk_number}: прочитано {total_rows} строк, "
+                  f"вставлено {db_loader.result()['inserted']}")
+
+        if total_rows == 0:
+            print("❌ Файл пуст")
+            summary["status"] = "empty"
+            return summary
+
+        result = db_loader.result()
+        db_loader.close()
+        db_loader = None
+
+        if mode == "full":
+            publish_shadow(engine, spec, target, year)
+            published = True
+        clear_checkpoint(engine, checkpoint_name)
+        if mode == "full" or result["inserted"] or result["updated"]:
+            # Новая версия набора данных - ETag ответов API по этой таблице меняются
+            bump_dataset_version(engine, spec.name)
+
+        print("\n🧹 Непустых значений после очистки:")
+        for col, non_null in non_null_counts.items():
+            print(f"  {col}: {non_null}")
+
+        print(f"\n📊 Результат миграции:")
+        print(f"  ✅ Успешно вставлено: {result['inserted']} записей")
+        if checkpoint is not None:
+            print(f"  ♻️ Пропущено порций из прошлого запуска: {checkpoint.chunk_number}")
+        print(f"  📊 Удалено без PK: {removed_no_pk}")
+        if year is not None:
+            print(f"  📊 Пропущено строк других лет: {skipped_other_years}")
+        if mode == "sync":
+            print(f"  🔁 Обновлено: {result['updated']} записей")
+            print(f"  📊 Без изменений: {result['duplicates']}")
+            print(f"  📊 Удалено дубликатов: {removed_duplicates}")
+            if watermark is not None:
+                print(f"  📊 Пропущено по watermark: {skipped_by_watermark}")
+        else:
+            print(f"  📊 Удалено дубликатов: {removed_duplicates + result['duplicates']}")
+        print(f"  📊 Всего обработано: {total_rows} записей в CSV")
+
+        failed_records = result['rejected']
+        if failed_records:
+            print(f"  ❌ Ошибок (не дубликаты): {len(failed_records)}")
+            for err in failed_records[:10]:
+                pk = ",".join(str(err[col]) for col in spec.pk_columns)
+                print(f"    {'/'.join(spec.pk_columns)}=({pk}): {err['error']}")
+
+        summary.update(
+            status="ok",
+            rows=total_rows,
+            inserted=result["inserted"],
+            updated=result["updated"],
+            duplicates=removed_duplicates + result["duplicates"],
+            rejected=len(failed_records),
+        )
+
+        _print_db_sample(spec, session)
+
+    except Exception as e:
+        print(f"❌ Критическая ошибка: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        session.rollback()
+
+    finally:
+        if db_loader is not None:
+            db_loader.close()
+        session.close()
+        if mode == "full" and not published:
+            if committed_chunk > 0:
+                print(f"💾 Теневая таблица {target.name} сохранена после порции {committed_chunk}, "
+                      f"продолжить загрузку: --resume")
+            else:
+                print(f"🧹 Удаляем теневую таблицу {target.name}, {spec.name} не изменена")
+                drop_shadow(engine, target)
+        elif mode == "sync" and committed_chunk > 0 and summary["status"] != "ok":
+            print(f"💾 Чекпоинт сохранен после порции {committed_chunk}, продолжить загрузку: --resume")
+
+        summary["elapsed"] = time.time() - start_time
+        print(f"\n⏱️  Время выполнения: {summary['elapsed']:.2f} сек")
+
+    return summary
@@ -0,0 +1,201 @@
+"""Полная перезагрузка таблицы через теневую копию и атомарную подмену.
+
+Данные загружаются в <table>_new, у которой есть только первичный ключ
+(он нужен для ON CONFLICT). Вторичные индексы строятся одним проходом
+уже после загрузки, затем выполняется VACUUM (ANALYZE), и в одной транзакции
+живая таблица удаляется, а теневая переименовывается на ее место.
+Для таблиц фактов (app.database.dimensions) в той же транзакции
+пересоздается представление, через которое их читает API.
+API все это время читает старую таблицу, а не наполовину заполненную.
+
+Секционированную по годам таблицу (app.database.partitions) можно
+перезагрузить за один год (year=...): строки года грузятся в отдельную
+таблицу <table>_y<год>_new с CHECK на границы года, после индексов и
+VACUUM (ANALYZE) старая секция отсоединяется (DETACH) и удаляется,
+а новая присоединяется (ATTACH) на ее место. Остальные годы не трогаются.
+"""
+
+from sqlalchemy import CheckConstraint, Index, MetaData, inspect, text
+
+from app.database.models import TRGM_EXTENSION
+from app.database.partitions import (
+    PARTITION_INFO_KEY,
+    list_partitions,
+    partition_bounds,
+    partition_column,
+    partition_name,
+    year_bounds,
+)
+
+SHADOW_SUFFIX = "_new"
+
+
+def _quote(engine, name):
+    return engine.dialect.identifier_preparer.quote(name)
+
+
+def _live_name(spec, year=None):
+    """Имя таблицы (или секции года), которую заменит теневая"""
+    return spec.table.name if year is None else partition_name(spec.table.name, year)
+
+
+def build_shadow_table(spec, year=None):
+    """Копия таблицы spec с именем <table>_new без вторичных индексов.
+
+    С year - обычная (не секционированная) таблица <table>_y<год>_new
+    для одной секции, с CHECK на границы года: ATTACH PARTITION по нему
+    не перечитывает таблицу для проверки.
+    """
+    shadow = spec.table.to_metadata(MetaData(), name=f"{_live_name(spec, year)}{SHADOW_SUFFIX}")
+    shadow.indexes.clear()
+    if year is not None:
+        column = partition_column(spec.table)
+        start, end = year_bounds(year)
+        shadow.dialect_kwargs["postgresql_partition_by"] = None
+        shadow.info.pop(PARTITION_INFO_KEY)
+        shadow.append_constraint(CheckConstraint(
+            f"{column} >= '{start}' AND {column} < '{end}'", name=_range_check_name(shadow)
+        ))
+    return shadow
+
+
+def _range_check_name(shadow):
+    return f"{shadow.name}_range"
+
+
+def create_shadow(engine, spec, year=None):
+    """Создать пустую теневую таблицу (остатки прошлого запуска удаляются)"""
+    shadow = build_shadow_table(spec, year)
+    shadow.drop(engine, checkfirst=True)
+    shadow.create(engine)
+    return shadow
+
+
+def shadow_exists(engine, spec, year=None):
+    return inspect(engine).has_table(f"{_live_name(spec, year)}{SHADOW_SUFFIX}")
+
+
+def drop_shadow(engine, shadow):
+    shadow.drop(engine, checkfirst=True)
+
+
+def _shadow_indexes(spec, shadow, year=None):
+    """Пары (индекс теневой таблицы, имя индекса после подмены)"""
+    # Индексы секции года получают суффикс _y<год>: имена индексов общие на схему
+    live_suffix = "" if year is None else f"_y{year}"
+    pairs = []
+    for index in sorted(spec.table.indexes, key=lambda idx: idx.name):
+        columns = [shadow.c[col.name] for col in index.columns]
+        # dialect_kwargs переносят USING gin и классы операторов (gin_trgm_ops)
+        shadow_index = Index(
+            f"{index.name}{live_suffix}{SHADOW_SUFFIX}", *columns, unique=index.unique, **index.dialect_kwargs
+        )
+        pairs.append((shadow_index, f"{index.name}{live_suffix}"))
+    return pairs
+
+
+def build_indexes(engine, spec, shadow, year=None):
+    """Построить вторичные индексы и собрать статистику по загруженной таблице.
+
+    Индексы на секционированной таблице создаются и на всех ее секциях.
+    """
+    indexes = _shadow_indexes(spec, shadow, year)
+    if any(index.dialect_options["postgresql"]["ops"] for index, _ in indexes):
+        with engine.begin() as conn:
+            conn.execute(TRGM_EXTENSION)
+    for index, _ in indexes:
+        print(f"  🏗️  Индекс {index.name}...")
+        index.create(engine)
+
+    if engine.dialect.name == "postgresql":
+        # VACUUM заполняет карту видимости: без нее index-only scan по INCLUDE-индексам
+        # (idx_transactions_comparables) все равно читает строки из таблицы.
+        # VACUUM нельзя выполнять внутри транзакции
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"VACUUM (ANALYZE) {_quote(engine, shadow.name)}"))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {_quote(engine, shadow.name)}"))
+    return indexes
+
+
+def swap_shadow(engine, spec, shadow, indexes):
+    """Подменить живую таблицу теневой в одной транзакции.
+
+    Представление над таблицей фактов (spec.encoding) пересоздается в той же транзакции.
+    """
+    table = _quote(engine, spec.table.name)
+    with engine.begin() as conn:
+        if spec.encoding is not None:
+            spec.encoding.drop_view(conn)
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"ALTER TABLE {_quote(engine, shadow.name)} RENAME TO {table}"))
+        conn.execute(text(
+            f"ALTER TABLE {table} RENAME CONSTRAINT "
+            f"{_quote(engine, shadow.name + '_pkey')} TO {_quote(engine, spec.table.name + '_pkey')}"
+        ))
+        _rename_indexes(conn, indexes)
+        if partition_column(spec.table) is not None and engine.dialect.name == "postgresql":
+            # Секции <table>_new_y<год> → <table>_y<год>, чтобы следующая загрузка не споткнулась об имена
+            prefix = f"{shadow.name}_"
+            for name in list_partitions(conn, spec.table.name):
+                if name.startswith(prefix):
+                    live_name = f"{spec.table.name}_{name[len(prefix):]}"
+                    conn.execute(text(f"ALTER TABLE {_quote(engine, name)} RENAME TO {_quote(engine, live_name)}"))
+        if spec.encoding is not None:
+            spec.encoding.create_view(conn)
+
+
+def _rename_indexes(conn, indexes):
+    for index, live_name in indexes:
+        conn.execute(text(
+            f"ALTER INDEX {_quote(conn, index.name)} RENAME TO {_quote(conn, live_name)}"
+        ))
+
+
+def swap_partition(engine, spec, shadow, indexes, year):
+    """Заменить секцию года таблицей shadow в одной транзакции (DETACH → DROP → ATTACH).
+
+    Строки других лет с тем же естественным ключом удаляются: в CSV
+    у них исправлена дата. Индексы shadow совпадают с индексами
+    родительской таблицы, поэтому ATTACH подключает их, а не строит
+    заново; CHECK на границы года избавляет ATTACH от проверочного
+    чтения всей секции.
+    """
+    table = _quote(engine, spec.table.name)
+    partition = partition_name(spec.table.name, year)
+    with engine.begin() as conn:
+        if partition in list_partitions(conn, spec.table.name):
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {_quote(engine, partition)}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {_quote(engine, partition)}"))
+        # Строки, дата которых перешла в этот год, уходят из секций других лет:
+        # естественный ключ (spec.key_columns) остается уникальным во всей таблице
+        match = " AND ".join(f"t.{_quote(engine, col)} = s.{_quote(engine, col)}" for col in spec.key_columns)
+        moved = conn.execute(text(
+            f"DELETE FROM {table} AS t USING {_quote(engine, shadow.name)} AS s WHERE {match}"
+        )).rowcount
+        if moved:
+            print(f"  🔀 {moved} строк перенесены в {partition} из секций других лет")
+        conn.execute(text(f"ALTER TABLE {_quote(engine, shadow.name)} RENAME TO {_quote(engine, partition)}"))
+        conn.execute(text(
+            f"ALTER TABLE {_quote(engine, partition)} RENAME CONSTRAINT "
+            f"{_quote(engine, shadow.name + '_pkey')} TO {_quote(engine, partition + '_pkey')}"
+        ))
+        _rename_indexes(conn, indexes)
+        conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {_quote(engine, partition)} {partition_bounds(year)}"))
+        # После ATTACH ограничение секции проверяет сама таблица, CHECK больше не нужен
+        conn.execute(text(
+            f"ALTER TABLE {_quote(engine, partition)} DROP CONSTRAINT {_quote(engine, _range_check_name(shadow))}"
+        ))
+
+
+def publish_shadow(engine, spec, shadow, year=None):
+    """Индексы + ANALYZE на теневой таблице, затем атомарная подмена (таблицы или секции года)"""
+    print(f"🏗️  Создаем индексы и ANALYZE для {shadow.name}...")
+    indexes = build_indexes(engine, spec, shadow, year)
+    if year is None:
+        print(f"🔀 Подменяем {spec.table.name} таблицей {shadow.name}...")
+        swap_shadow(engine, spec, shadow, indexes)
+    else:
+        print(f"🔀 Подменяем секцию {partition_name(spec.table.name, year)} таблицей {shadow.name}...")
+        swap_partition(engine, spec, shadow, indexes, year)
@@ -0,0 +1,629 @@
+"""Описания CSV-выгрузок DLD: файлы, колонки, типы и первичные ключи.
+
+Каждая выгрузка описывается одним TableSpec, по которому общий
+конвейер (app.etl.pipeline) читает, чистит и загружает файл.
+"""
+
+from sqlalchemy import BigInteger, Date, Integer, Numeric, SmallInteger, String
+
+from app.database.partitions import partition_column
+
+from app.database.models import (
+    LkpArea,
+    LkpMarketType,
+    LkpTransactionGroup,
+    LkpTransactionProcedure,
+    Valuation,
+    Unit,
+    Building,
+    Project,
+    Transaction,
+    BUILDING_STORAGE,
+    TRANSACTION_STORAGE,
+    UNIT_STORAGE,
+)
+
+
+class TableSpec:
+    """Правила загрузки одной CSV-выгрузки в таблицу"""
+
+    def __init__(
+        self,
+        model,
+        file_names,
+        columns,
+        numeric_fields=None,
+        date_fields=(),
+        text_fields=None,
+        sample_columns=(),
+        dayfirst_timestamps=True,
+        orm_batch_size=500,
+        watermark_column=None,
+        encoding=None,
+    ):
+        self.model = model
+        # Таблица фактов с кодами подписей (app.database.dimensions), если модель - представление
+        self.encoding = encoding
+        self.table = encoding.table if encoding is not None else model.__table__
+        self.name = model.__tablename__
+        # Возможные имена файла в DATA_FOLDER
+        self.file_names = list(file_names)
+        # Целевая колонка → варианты ее названия в CSV
+        self.columns = columns
+        # Колонка → количество знаков после запятой
+        self.numeric_fields = numeric_fields or {}
+        self.date_fields = list(date_fields)
+        # Колонка → максимальная длина строки
+        self.text_fields = text_fields or {}
+        self.pk_columns = [col.name for col in self.table.primary_key.columns]
+        # Естественный ключ строки: PK без колонки секционирования, по нему ищутся повторы
+        self.key_columns = [col for col in self.pk_columns if col != partition_column(self.table)]
+        # Колонки для контрольного вывода примеров
+        self.sample_columns = list(sample_columns)
+        self.dayfirst_timestamps = dayfirst_timestamps
+        self.orm_batch_size = orm_batch_size
+        # Колонка-дата, по максимуму которой sync пропускает старые строки
+        self.watermark_column = watermark_column
+        # Числовая колонка целого типа → граница диапазона (значения в [-bound, bound))
+        self.integer_bounds = {
+            name: integer_bound(self.table.c[name].type)
+            for name in self.numeric_fields
+            if name in self.table.c and isinstance(self.table.c[name].type, Integer)
+        }
+
+
+def integer_bound(column_type):
+    """Граница диапазона SMALLINT / INTEGER / BIGINT"""
+    if isinstance(column_type, SmallInteger):
+        return 2 ** 15
+    if isinstance(column_type, BigInteger):
+        return 2 ** 63
+    return 2 ** 31
+
+
+def spec_from_model(model, file_names, **kwargs):
+    """TableSpec для выгрузки, колонки которой совпадают с колонками модели.
+
+    Правила очистки выводятся из типов колонок: Numeric/Integer - числа
+    с точностью scale, Date - даты, String/Text - строки с обрезкой до length.
+    """
+    columns = {}
+    numeric_fields = {}
+    date_fields = []
+    text_fields = {}
+    for column in model.__table__.columns:
+        columns[column.name] = [column.name]
+        if isinstance(column.type, Numeric):
+            numeric_fields[column.name] = column.type.scale or 0
+        elif isinstance(column.type, Integer):
+            numeric_fields[column.name] = 0
+        elif isinstance(column.type, Date):
+            date_fields.append(column.name)
+        elif isinstance(column.type, String):
+            text_fields[column.name] = column.type.length
+    return TableSpec(
+        model,
+        file_names=file_names,
+        columns=columns,
+        numeric_fields=numeric_fields,
+        date_fields=date_fields,
+        text_fields=text_fields,
+        **kwargs,
+    )
+
+
+TRANSACTION_COLUMNS = {
+    # Основные поля
+    'transaction_id': ['transaction_id', 'transactionid', 'trans_id'],
+    'instance_date': ['instance_date', 'instancedate', 'date', 'transaction_date'],
+    
+    # Группа транзакции
+    'trans_group_id': ['trans_group_id', 'transgroupid', 'group_id'],
+    'trans_group_en': ['trans_group_en', 'transgroup_en', 'group_en'],
+    'trans_group_ar': ['trans_group_ar', 'transgroup_ar', 'group_ar'],
+    
+    # Процедура
+    'procedure_id': ['procedure_id', 'procedureid'],
+    'procedure_name_en': ['procedure_name_en', 'procedurename_en', 'procname_en'],
+    'procedure_name_ar': ['procedure_name_ar', 'procedurename_ar', 'procname_ar'],
+    
+    # Тип собственности
+    'property_type_id': ['property_type_id', 'propertytypeid'],
+    'property_type_en': ['property_type_en', 'propertytype_en'],
+    'property_type_ar': ['property_type_ar', 'propertytype_ar'],
+    
+    # Подтип собственности
+    'property_sub_type_id': ['property_sub_type_id', 'propertysubtypeid'],
+    'property_sub_type_en': ['property_sub_type_en', 'propertysubtype_en'],
+    'property_sub_type_ar': ['property_sub_type_ar', 'propertysubtype_ar'],
+    
+    # Использование
+    'property_usage_en': ['property_usage_en', 'propertyusage_en'],
+    'property_usage_ar': ['property_usage_ar', 'propertyusage_ar'],
+    
+    # Район
+    'area_id': ['area_id', 'areaid'],
+    'area_name_en': ['area_name_en', 'areaname_en'],
+    'area_name_ar': ['area_name_ar', 'areaname_ar'],
+    
+    # Финансовые
+    'trans_value': ['trans_value', 'transvalue', 'transaction_value'],
+    'meter_sale_price': ['meter_sale_price', 'metersaleprice'],
+    'actual_worth': ['actual_worth', 'actualworth'],
+    'rent_value': ['rent_value', 'rentvalue'],
+    'meter_rent_price': ['meter_rent_price', 'meterrentprice'],
+    
+    # Стороны сделки
+    'no_of_parties_role_1': ['no_of_parties_role_1', 'nopartiesrole1'],
+    'party_type_role_1_en': ['party_type_role_1_en', 'partytyperole1_en'],
+    'party_type_role_1_ar': ['party_type_role_1_ar', 'partytyperole1_ar'],
+    
+    'no_of_parties_role_2': ['no_of_parties_role_2', 'nopartiesrole2'],
+    'party_type_role_2_en': ['party_type_role_2_en', 'partytyperole2_en'],
+    'party_type_role_2_ar': ['party_type_role_2_ar', 'partytyperole2_ar'],
+    
+    'no_of_parties_role_3': ['no_of_parties_role_3', 'nopartiesrole3'],
+    
+    # Проекты
+    'master_project_en': ['master_project_en', 'masterproject_en'],
+    'master_project_ar': ['master_project_ar', 'masterproject_ar'],
+    'project_number': ['project_number', 'projectnumber'],
+    'project_name_en': ['project_name_en', 'projectname_en'],
+    'project_name_ar': ['project_name_ar', 'projectname_ar'],
+    
+    # Комнаты
+    'rooms_en': ['rooms_en', 'rooms_en'],
+    'rooms_ar': ['rooms_ar', 'rooms_ar'],
+    
+    # Парковка (обрабатываем оба варианта)
+    'has_parking': ['has_parking', 'hasparking', 'parking'],
+    
+    # Ближайшие объекты
+    'nearest_landmark_en': ['nearest_landmark_en', 'nearestlandmark_en'],
+    'nearest_landmark_ar': ['nearest_landmark_ar', 'nearestlandmark_ar'],
+    'nearest_metro_en': ['nearest_metro_en', 'nearestmetro_en'],
+    'nearest_metro_ar': ['nearest_metro_ar', 'nearestmetro_ar'],
+    'nearest_mall_en': ['nearest_mall_en', 'nearestmall_en'],
+    'nearest_mall_ar': ['nearest_mall_ar', 'nearestmall_ar'],
+    
+    # Права
+    'is_free_hold': ['is_free_hold', 'isfreehold'],
+    
+    # Регистрация
+    'reg_type_id': ['reg_type_id', 'regtypeid'],
+    'reg_type_en': ['reg_type_en', 'regtype_en'],
+    'reg_type_ar': ['reg_type_ar', 'regtype_ar'],
+    
+    # Площади
+    'procedure_area': ['procedure_area', 'procedurearea'],
+    'building_name_en': ['building_name_en', 'buildingname_en'],
+    'building_name_ar': ['building_name_ar', 'buildingname_ar'],
+    
+    # Старые поля для совместимости
+    'trans_size_sqft': ['trans_size_sqft', 'transsizesqft'],
+    'trans_size_sqm': ['trans_size_sqm', 'transsizesqm'],
+    'actual_area_sqft': ['actual_area_sqft', 'actualareasqft'],
+    'actual_area_sqm': ['actual_area_sqm', 'actualareasqm'],
+}
+
+TRANSACTION_NUMERIC_FIELDS = {
+    # ID
+    'trans_group_id': 0,
+    'procedure_id': 0,
+    'property_type_id': 0,
+    'property_sub_type_id': 0,
+    'area_id': 0,
+    
+    # Количественные
+    'no_of_parties_role_1': 0,
+    'no_of_parties_role_2': 0,
+    'no_of_parties_role_3': 0,
+    'project_number': 0,
+    
+    # Флаги
+    'has_parking': 0,
+    'is_free_hold': 0,
+    'reg_type_id': 0,
+    
+    # Денежные значения
+    'trans_value': 2,
+    'meter_sale_price': 2,
+    'actual_worth': 2,
+    'rent_value': 2,
+    'meter_rent_price': 2,
+    
+    # Площади
+    'procedure_area': 2,
+    'trans_size_sqft': 2,
+    'trans_size_sqm': 2,
+    'actual_area_sqft': 2,
+    'actual_area_sqm': 2,
+}
+
+TRANSACTION_TEXT_FIELDS = {
+    'transaction_id': 100,
+    'trans_group_en': 200,
+    'trans_group_ar': 200,
+    'procedure_name_en': 200,
+    'procedure_name_ar': 200,
+    'property_type_en': 50,
+    'property_type_ar': 50,
+    'property_sub_type_en': 100,
+    'property_sub_type_ar': 100,
+    'property_usage_en': 100,
+    'property_usage_ar': 100,
+    'area_name_en': 200,
+    'area_name_ar': 200,
+    'party_type_role_1_en': 100,
+    'party_type_role_1_ar': 100,
+    'party_type_role_2_en': 100,
+    'party_type_role_2_ar': 100,
+    'master_project_en': 200,
+    'master_project_ar': 200,
+    'project_name_en': 200,
+    'project_name_ar': 200,
+    'rooms_en': 200,
+    'rooms_ar': 200,
+    'nearest_landmark_en': 200,
+    'nearest_landmark_ar': 200,
+    'nearest_metro_en': 201,
+    'nearest_metro_ar': 200,
+    'nearest_mall_en': 203,
+    'nearest_mall_ar': 202,
+    'reg_type_en': 100,
+    'reg_type_ar': 100,
+    'building_name_en': 200,
+    'building_name_ar': 200,
+}
+
+
+PROJECT_COLUMNS = {
+    # Основные поля
+    'project_id': ['project_id', 'projectid'],
+    'project_number': ['project_number', 'projectnumber'],
+    'project_name': ['project_name', 'projectname'],
+    
+    # Информация о разработчике
+    'developer_id': ['developer_id', 'developerid'],
+    'developer_number': ['developer_number', 'developernumber'],
+    'developer_name': ['developer_name', 'developername'],
+    
+    # Информация о главном разработчике
+    'master_developer_id': ['master_developer_id', 'masterdeveloperid'],
+    'master_developer_number': ['master_developer_number', 'masterdevelopernumber'],
+    'master_developer_name': ['master_developer_name', 'masterdevelopername'],
+    
+    # Даты проекта
+    'project_start_date': ['project_start_date', 'projectstartdate', 'start_date'],
+    'project_end_date': ['project_end_date', 'projectenddate', 'end_date'],
+    
+    # Тип проекта
+    'project_type_id': ['project_type_id', 'projecttypeid'],
+    'project_type_ar': ['project_type_ar', 'projecttype_ar'],
+    
+    # Классификация проекта
+    'project_classification_id': ['project_classification_id', 'projectclassificationid'],
+    'project_classification_ar': ['project_classification_ar', 'projectclassification_ar'],
+    
+    # Информация о гарантийном агенте
+    'escrow_agent_id': ['escrow_agent_id', 'escrowagentid'],
+    'escrow_agent_name': ['escrow_agent_name', 'escrowagentname'],
+    
+    # Статус проекта
+    'project_status': ['project_status', 'projectstatus'],
+    'project_status_ar': ['project_status_ar', 'projectstatus_ar'],
+    
+    # Процент завершения
+    'percent_completed': ['percent_completed', 'percentcompleted', 'completion_percentage'],
+    
+    # Дополнительные даты
+    'completion_date': ['completion_date', 'completiondate'],
+    'cancellation_date': ['cancellation_date', 'cancellationdate'],
+    
+    # Описание проекта
+    'project_description_ar': ['project_description_ar', 'projectdescription_ar'],
+    'project_description_en': ['project_description_en', 'projectdescription_en'],
+    
+    # Связанная собственность
+    'property_id': ['property_id', 'propertyid'],
+    
+    # Район
+    'area_id': ['area_id', 'areaid'],
+    'area_name_ar': ['area_name_ar', 'areaname_ar'],
+    'area_name_en': ['area_name_en', 'areaname_en'],
+}
+
+PROJECT_NUMERIC_FIELDS = {
+    # ID
+    'project_id': 0,
+    'project_number': 0,
+    'developer_id': 0,
+    'developer_number': 0,
+    'master_developer_id': 0,
+    'master_developer_number': 0,
+    'project_type_id': 0,
+    'project_classification_id': 0,
+    'escrow_agent_id': 0,
+    'property_id': 0,
+    'area_id': 0,
+    
+    # Процент завершения
+    'percent_completed': 3,
+}
+
+PROJECT_TEXT_FIELDS = {
+    'project_name': 200,
+    'developer_name': 200,
+    'master_developer_name': 200,
+    'project_type_ar': 100,
+    'project_classification_ar': 50,
+    'escrow_agent_name': 200,
+    'project_status': 200,
+    'project_status_ar': 100,
+    'project_description_ar': 2000,
+    'project_description_en': 2000,
+    'area_name_ar': 200,
+    'area_name_en': 200,
+}
+
+
+VALUATION_COLUMNS = {
+    'procedure_id': ['procedure_id', 'procedureid', 'proc_id'],
+    'procedure_year': ['procedure_year', 'proceduryear', 'proc_year', 'year'],
+    'procedure_number': ['procedure_number', 'procedurenumber', 'proc_number', 'procno'],
+    'property_total_value': ['property_total_value', 'propertytotalvalue', 'total_value'],
+    'procedure_name_ar': ['procedure_name_ar', 'procedurename_ar', 'procname_ar'],
+    'procedure_name_en': ['procedure_name_en', 'procedurename_en', 'procname_en'],
+    'area_id': ['area_id', 'areaid'],
+    'area_name_ar': ['area_name_ar', 'areaname_ar', 'area_ar'],
+    'area_name_en': ['area_name_en', 'areaname_en', 'area_en'],
+    'actual_area': ['actual_area', 'actualarea'],
+    'instance_date': ['instance_date', 'instancedate', 'date'],
+    'actual_worth': ['actual_worth', 'actualworth'],
+    'row_status_code': ['row_status_code', 'rowstatuscode', 'status'],
+    'procedure_area': ['procedure_area', 'procedurearea'],
+    'property_type_id': ['property_type_id', 'propertytypeid'],
+    'property_type_ar': ['property_type_ar', 'propertytype_ar'],
+    'property_type_en': ['property_type_en', 'propertytype_en'],
+    'property_sub_type_id': ['property_sub_type_id', 'propertysubtypeid'],
+    'property_sub_type_ar': ['property_sub_type_ar', 'propertysubtype_ar'],
+    'property_sub_type_en': ['property_sub_type_en', 'propertysubtype_en'],
+}
+
+VALUATION_NUMERIC_FIELDS = {
+    # Первичные ключи
+    'procedure_id': 0,  # SMALLINT
+    'procedure_year': 0,  # INTEGER
+    'procedure_number': 0,  # BIGINT
+    
+    # Денежные значения
+    'property_total_value': 2,
+    'actual_worth': 2,
+    
+    # Площади
+    'actual_area': 2,
+    'procedure_area': 2,
+    
+    # ID
+    'area_id': 0,  # BIGINT
+    'property_type_id': 0,  # INTEGER (NUMBER(4))
+    'property_sub_type_id': 0,  # INTEGER (NUMBER(4))
+}
+
+VALUATION_TEXT_FIELDS = {
+    'procedure_name_ar': 100,
+    'procedure_name_en': 100,
+    'area_name_ar': 200,
+    'area_name_en': 200,
+    'row_status_code': 100,
+    'property_type_ar': 50,
+    'property_type_en': 50,
+    'property_sub_type_ar': 50,
+    'property_sub_type_en': 50,
+}
+
+
+UNIT_COLUMNS = {
+    'property_id': ['property_id'],
+    'area_id': ['area_id'],
+    'zone_id': ['zone_id'],
+    'area_name_ar': ['area_name_ar'],
+    'area_name_en': ['area_name_en'],
+    'land_number': ['land_number'],
+    'land_sub_number': ['land_sub_number'],
+    'building_number': ['building_number'],
+    'unit_number': ['unit_number'],
+    'unit_balcony_area': ['unit_balcony_area'],
+    'unit_parking_number': ['unit_parking_number'],
+    'parking_allocation_type': ['parking_allocation_type'],
+    'parking_allocation_type_ar': ['parking_allocation_type_ar'],
+    'parking_allocation_type_en': ['parking_allocation_type_en'],
+    'common_area': ['common_area'],
+    'actual_common_area': ['actual_common_area'],
+    'floor': ['floor'],
+    'rooms': ['rooms'],
+    'rooms_ar': ['rooms_ar'],
+    'rooms_en': ['rooms_en'],
+    'actual_area': ['actual_area'],
+    'property_type_id': ['property_type_id'],
+    'property_type_ar': ['property_type_ar'],
+    'property_type_en': ['property_type_en'],
+    'property_sub_type_id': ['property_sub_type_id'],
+    'property_sub_type_ar': ['property_sub_type_ar'],
+    'property_sub_type_en': ['property_sub_type_en'],
+    'parent_property_id': ['parent_property_id'],
+    'grandparent_property_id': ['grandparent_property_id'],
+    'creation_date': ['creation_date'],
+    'munc_zip_code': ['munc_zip_code'],
+    'munc_number': ['munc_number'],
+    'parcel_id': ['parcel_id'],
+    'is_free_hold': ['is_free_hold'],
+    'is_lease_hold': ['is_lease_hold'],
+    'is_registered': ['is_registered'],
+    'pre_registration_number': ['pre_registration_number'],
+    'master_project_id': ['master_project_id'],
+    'master_project_en': ['master_project_en'],
+    'master_project_ar': ['master_project_ar'],
+    'project_id': ['project_id'],
+    'project_name_ar': ['project_name_ar'],
+    'project_name_en': ['project_name_en'],
+    'land_type_id': ['land_type_id'],
+    'land_type_ar': ['land_type_ar'],
+    'land_type_en': ['land_type_en'],
+}
+
+UNIT_NUMERIC_FIELDS = {
+    # Большие целые числа (ID)
+    'property_id': 0,
+    'area_id': 0,
+    'zone_id': 0,
+    'land_sub_number': 0,
+    'parking_allocation_type': 0,
+    'property_type_id': 0,
+    'property_sub_type_id': 0,
+    'parent_property_id': 0,
+    'grandparent_property_id': 0,
+    'parcel_id': 0,
+    'master_project_id': 0,
+    'project_id': 0,
+    'land_type_id': 0,
+    
+    # Количественные характеристики
+    'rooms': 0,
+    
+    # Площади с плавающей точкой
+    'unit_balcony_area': 2,
+    'common_area': 4,
+    'actual_common_area': 0,  # NUMBER без указания точности
+    'actual_area': 2,
+    
+    # Флаги (0 или 1)
+    'is_free_hold': 0,
+    'is_lease_hold': 0,
+    'is_registered': 0,
+}
+
+UNIT_TEXT_FIELDS = {
+    'area_name_ar': 200,
+    'area_name_en': 200,
+    'land_number': 100,
+    'building_number': 100,
+    'unit_number': 100,
+    'unit_parking_number': 1000,
+    'parking_allocation_type_ar': 100,
+    'parking_allocation_type_en': 100,
+    'floor': 40,
+    'rooms_ar': 60,
+    'rooms_en': 60,
+    'property_type_ar': 50,
+    'property_type_en': 50,
+    'property_sub_type_ar': 50,
+    'property_sub_type_en': 50,
+    'munc_zip_code': 3,
+    'munc_number': 10,
+    'pre_registration_number': 100,
+    'master_project_en': 250,
+    'master_project_ar': 250,
+    'project_name_ar': 200,
+    'project_name_en': 200,
+    'land_type_ar': 50,
+    'land_type_en': 50,
+}
+
+
+TRANSACTIONS = TableSpec(
+    Transaction,
+    file_names=["Transactions.csv", "transactions.csv", "DLD_Transactions.csv",
+                "dld_transactions.csv", "TRANSACTIONS.CSV", "Transaction.csv", "transaction.csv"],
+    columns=TRANSACTION_COLUMNS,
+    numeric_fields=TRANSACTION_NUMERIC_FIELDS,
+    date_fields=['instance_date'],
+    text_fields=TRANSACTION_TEXT_FIELDS,
+    sample_columns=['transaction_id', 'instance_date', 'trans_group_en', 'property_type_en', 'trans_value'],
+    watermark_column='instance_date',
+    encoding=TRANSACTION_STORAGE,
+)
+
+PROJECTS = TableSpec(
+    Project,
+    file_names=["Projects.csv", "projects.csv", "DLD_Projects.csv",
+                "dld_projects.csv", "PROJECTS.CSV", "Project.csv", "project.csv"],
+    columns=PROJECT_COLUMNS,
+    numeric_fields=PROJECT_NUMERIC_FIELDS,
+    date_fields=['project_start_date', 'project_end_date', 'completion_date', 'cancellation_date'],
+    text_fields=PROJECT_TEXT_FIELDS,
+    sample_columns=['project_id', 'project_name', 'developer_name', 'project_start_date', 'percent_completed'],
+)
+
+VALUATION = TableSpec(
+    Valuation,
+    file_names=["Valuation.csv", "valuation.csv", "DLD_Valuation.csv", "dld_valuation.csv", "VALUATION.CSV"],
+    columns=VALUATION_COLUMNS,
+    numeric_fields=VALUATION_NUMERIC_FIELDS,
+    date_fields=['instance_date'],
+    text_fields=VALUATION_TEXT_FIELDS,
+    sample_columns=['procedure_id', 'procedure_year', 'procedure_number', 'procedure_name_en', 'instance_date'],
+    # В Valuation даты со временем записаны в формате YYYY-MM-DD HH:MM:SS
+    dayfirst_timestamps=False,
+    orm_batch_size=1000,
+    watermark_column='instance_date',
+)
+
+UNITS = TableSpec(
+    Unit,
+    file_names=["Units.csv", "units.csv", "DLD_Units.csv", "dld_units.csv"],
+    columns=UNIT_COLUMNS,
+    numeric_fields=UNIT_NUMERIC_FIELDS,
+    date_fields=['creation_date'],
+    text_fields=UNIT_TEXT_FIELDS,
+    sample_columns=['property_id', 'unit_number', 'building_number', 'area_name_en', 'creation_date'],
+    encoding=UNIT_STORAGE,
+)
+
+LKP_AREAS = spec_from_model(
+    LkpArea,
+    file_names=["Lkp_Areas.csv", "lkp_areas.csv", "LKP_AREAS.CSV"],
+    sample_columns=['area_id', 'name_en', 'municipality_number'],
+)
+
+LKP_MARKET_TYPES = spec_from_model(
+    LkpMarketType,
+    file_names=["Lkp_Market_Types.csv", "lkp_market_types.csv", "LKP_MARKET_TYPES.CSV"],
+    sample_columns=['market_type_id', 'name_en'],
+)
+
+LKP_TRANSACTION_GROUPS = spec_from_model(
+    LkpTransactionGroup,
+    file_names=["Lkp_Transaction_Groups.csv", "lkp_transaction_groups.csv", "LKP_TRANSACTION_GROUPS.CSV"],
+    sample_columns=['group_id', 'name_en'],
+)
+
+LKP_TRANSACTION_PROCEDURES = spec_from_model(
+    LkpTransactionProcedure,
+    file_names=["Lkp_Transaction_Procedures.csv", "lkp_transaction_procedures.csv",
+                "LKP_TRANSACTION_PROCEDURES.CSV"],
+    sample_columns=['group_id', 'procedure_id', 'name_en'],
+)
+
+BUILDINGS = spec_from_model(
+    Building,
+    file_names=["Buildings.csv", "buildings.csv", "DLD_Buildings.csv", "dld_buildings.csv"],
+    sample_columns=['property_id', 'building_number', 'area_name_en', 'project_name_en', 'creation_date'],
+    encoding=BUILDING_STORAGE,
+)
+
+# Все выгрузки по имени таблицы
+SPECS = {
+    spec.name: spec
+    for spec in (
+        LKP_AREAS,
+        LKP_MARKET_TYPES,
+        LKP_TRANSACTION_GROUPS,
+        LKP_TRANSACTION_PROCEDURES,
+        VALUATION,
+        UNITS,
+        BUILDINGS,
+        PROJECTS,
+        TRANSACTIONS,
+    )
+}
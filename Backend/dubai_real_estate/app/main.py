@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 
+from app.api.http_cache import http_cache_middleware
+from app.api.lookups import lookups
+from app.api.response_cache import analytics_cache
 from app.config import settings
-from app.database.connection import engine, Base
+from app.database.connection import engine, async_engine, Base, pool_stats
 
 # Импортируем все роуты
 from app.api.v1 import (
@@ -17,6 +22,8 @@ from app.api.v1 import (
     transactions,
 )
 
+QUERY_CANCELED_SQLSTATE = "57014"
+
 # Создаем приложение
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -26,6 +33,25 @@ app = FastAPI(
     openapi_url="/openapi.json"
 )
 
+# Запрос отменен PostgreSQL по statement_timeout (SQLSTATE 57014) → 504.
+# psycopg2 отдает QueryCanceled как OperationalError, а asyncpg-диалект
+# SQLAlchemy 2.0 - как базовый DBAPIError, поэтому решает SQLSTATE (pgcode
+# есть у обоих драйверов). Обработчик исключений перехватил бы все ошибки
+# класса, поэтому это middleware: прочие ошибки БД уходят дальше как есть
+async def statement_timeout_middleware(request: Request, call_next):
+    try:
+        return await call_next(request)
+    except DBAPIError as exc:
+        if getattr(exc.orig, "pgcode", None) != QUERY_CANCELED_SQLSTATE:
+            raise
+        return JSONResponse(status_code=504, content={"detail": "Запрос к БД превысил допустимое время выполнения"})
+
+app.middleware("http")(statement_timeout_middleware)
+
+# ETag и Cache-Control по версиям наборов данных (добавлен раньше CORS,
+# чтобы ответы 304 тоже получали CORS-заголовки)
+app.middleware("http")(http_cache_middleware)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +69,22 @@ async def startup_event():
         print("✅ Database tables created successfully")
     except Exception as e:
         print(f"❌ Error creating database tables: {e}")
+    try:
+        await lookups.refresh()
+        print("✅ Lookup tables loaded into memory")
+    except Exception as e:
+        # Справочники будут загружены при первом обращении
+        print(f"❌ Error loading lookup tables: {e}")
+
+# Закрываем соединения асинхронного пула при остановке
+@app.on_event("shutdown")
+async def shutdown_event():
+    await async_engine.dispose()
+
+# Нет свободного соединения в пуле за DB_POOL_TIMEOUT
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(status_code=503, content={"detail": "Нет свободных соединений с БД, повторите запрос позже"})
 
 # Подключаем роуты
 app.include_router(
@@ -110,3 +152,11 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/db-pool")
+def db_pool_status():
+    return pool_stats()
+
+@app.get("/health/cache")
+def analytics_cache_status():
+    return analytics_cache.stats()
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class ORMModel(BaseModel):
+    """Базовая схема ответа: читается из ORM-объектов и строк select()"""
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,59 @@
+from datetime import date
+from typing import List, Optional
+
+from app.schemas.base import ORMModel
+
+
+class BuildingResponse(ORMModel):
+    """Здание. Все поля необязательны: при fields= в ответе только запрошенные"""
+
+    property_id: Optional[int] = None
+    area_id: Optional[int] = None
+    zone_id: Optional[int] = None
+    area_name_ar: Optional[str] = None
+    area_name_en: Optional[str] = None
+    land_number: Optional[str] = None
+    land_sub_number: Optional[int] = None
+    building_number: Optional[str] = None
+    common_area: Optional[float] = None
+    actual_common_area: Optional[float] = None
+    built_up_area: Optional[float] = None
+    actual_area: Optional[float] = None
+    floors: Optional[str] = None
+    rooms: Optional[int] = None
+    rooms_ar: Optional[str] = None
+    rooms_en: Optional[str] = None
+    car_parks: Optional[int] = None
+    is_lease_hold: Optional[int] = None
+    is_registered: Optional[int] = None
+    is_free_hold: Optional[int] = None
+    pre_registration_number: Optional[str] = None
+    master_project_id: Optional[int] = None
+    master_project_en: Optional[str] = None
+    master_project_ar: Optional[str] = None
+    project_id: Optional[int] = None
+    project_name_ar: Optional[str] = None
+    project_name_en: Optional[str] = None
+    land_type_id: Optional[int] = None
+    land_type_ar: Optional[str] = None
+    land_type_en: Optional[str] = None
+    bld_levels: Optional[int] = None
+    shops: Optional[int] = None
+    flats: Optional[int] = None
+    offices: Optional[int] = None
+    swimming_pools: Optional[int] = None
+    elevators: Optional[int] = None
+    property_type_id: Optional[int] = None
+    property_type_ar: Optional[str] = None
+    property_type_en: Optional[str] = None
+    property_sub_type_id: Optional[int] = None
+    property_sub_type_ar: Optional[str] = None
+    property_sub_type_en: Optional[str] = None
+    parent_property_id: Optional[int] = None
+    creation_date: Optional[date] = None
+    parcel_id: Optional[int] = None
+
+
+class BuildingListResponse(ORMModel):
+    total: int
+    buildings: List[BuildingResponse]
@@ -0,0 +1,15 @@
+from typing import List, Optional
+
+from app.schemas.base import ORMModel
+
+
+class LkpAreaResponse(ORMModel):
+    area_id: int
+    name_en: Optional[str] = None
+    name_ar: Optional[str] = None
+    municipality_number: Optional[str] = None
+
+
+class LkpAreaListResponse(ORMModel):
+    total: int
+    areas: List[LkpAreaResponse]
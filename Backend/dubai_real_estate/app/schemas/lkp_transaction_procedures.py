@@ -0,0 +1,16 @@
+from typing import List, Optional
+
+from app.schemas.base import ORMModel
+
+
+class LkpTransactionProcedureResponse(ORMModel):
+    group_id: int
+    procedure_id: int
+    is_pre_registration: Optional[int] = None
+    name_ar: Optional[str] = None
+    name_en: Optional[str] = None
+
+
+class LkpTransactionProcedureListResponse(ORMModel):
+    total: int
+    transaction_procedures: List[LkpTransactionProcedureResponse]
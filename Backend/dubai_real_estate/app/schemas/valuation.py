@@ -0,0 +1,68 @@
+from datetime import date
+from typing import List, Optional
+
+from app.schemas.base import ORMModel
+
+
+class ValuationResponse(ORMModel):
+    """Оценка. Все поля необязательны: при fields= в ответе только запрошенные"""
+
+    procedure_id: Optional[int] = None
+    procedure_year: Optional[int] = None
+    procedure_number: Optional[int] = None
+    property_total_value: Optional[float] = None
+    actual_worth: Optional[float] = None
+    actual_area: Optional[float] = None
+    procedure_area: Optional[float] = None
+    procedure_name_ar: Optional[str] = None
+    procedure_name_en: Optional[str] = None
+    area_id: Optional[int] = None
+    area_name_ar: Optional[str] = None
+    area_name_en: Optional[str] = None
+    instance_date: Optional[date] = None
+    row_status_code: Optional[str] = None
+    property_type_id: Optional[int] = None
+    property_type_ar: Optional[str] = None
+    property_type_en: Optional[str] = None
+    property_sub_type_id: Optional[int] = None
+    property_sub_type_ar: Optional[str] = None
+    property_sub_type_en: Optional[str] = None
+
+
+class ValuationListResponse(ORMModel):
+    total: int
+    total_count: Optional[int] = None
+    next_cursor: Optional[str] = None
+    valuations: List[ValuationResponse]
+
+
+class ValuationsByProjectResponse(ValuationListResponse):
+    project_id: int
+
+
+class ValuationsByAreaResponse(ValuationListResponse):
+    area_id: int
+
+
+class ValuationsByPropertyTypeResponse(ValuationListResponse):
+    property_type_id: int
+
+
+class ValuationAggregateBucket(ORMModel):
+    """Цена за кв.м (property_total_value / actual_area) в группе month или property_type"""
+
+    month: Optional[str] = None
+    property_type_id: Optional[int] = None
+    property_type_en: Optional[str] = None
+    count: int
+    median_price_per_sqm: Optional[float] = None
+    p10_price_per_sqm: Optional[float] = None
+    p90_price_per_sqm: Optional[float] = None
+
+
+class ValuationAggregateResponse(ORMModel):
+    aggregate: str
+    project_id: Optional[int] = None
+    area_id: Optional[int] = None
+    property_type_id: Optional[int] = None
+    buckets: List[ValuationAggregateBucket]
@@ -0,0 +1,56 @@
+import sys
+import os
+import argparse
+
+# Добавляем корень проекта для импорта app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+from app.config import settings
+from app.database.models import Base, TRGM_EXTENSION
+from app.database.partitions import is_partitioned
+
+
+def trigram_indexes():
+    """Все индексы моделей с gin_trgm_ops"""
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda idx: idx.name):
+            if index.dialect_options["postgresql"]["ops"]:
+                yield index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Создать триграммные GIN-индексы в уже загруженной БД (CREATE INDEX CONCURRENTLY, без блокировки записи)"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="только напечатать SQL")
+    args = parser.parse_args()
+
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    engine = create_engine(settings.DATABASE_URL, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        existing = set(inspect(conn).get_table_names())
+        statements = [str(TRGM_EXTENSION.compile(dialect=engine.dialect))]
+        for index in trigram_indexes():
+            if index.table.name not in existing:
+                # fact_* появляются после полной загрузки и получают индексы при ней
+                print(f"⏭️  {index.name}: таблицы {index.table.name} еще нет")
+                continue
+            ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            if is_partitioned(conn, index.table.name):
+                # CONCURRENTLY на секционированной таблице не поддерживается: индекс
+                # строится на всех секциях сразу и блокирует запись (чтение API не ждет)
+                print(f"⚠️  {index.name}: {index.table.name} секционирована, индекс без CONCURRENTLY")
+                statements.append(ddl)
+                continue
+            statements.append(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+        tables = {index.table.name for index in trigram_indexes()} & existing
+        statements += [f"ANALYZE {table}" for table in sorted(tables)]
+
+        for statement in statements:
+            print(f"🏗️  {statement}")
+            if not args.dry_run:
+                conn.execute(text(statement))
+    print("✅ Готово" if not args.dry_run else "ℹ️ --dry-run: ничего не выполнено")
@@ -0,0 +1,168 @@
+"""Перевод идентификаторов NUMERIC(n, 0) → SMALLINT / INTEGER / BIGINT в уже загруженной БД.
+
+Целевые типы берутся из моделей (app.database.models): колонка
+переводится, если в модели она целого типа, а в БД еще numeric.
+Перед изменением проверяется, что все значения целые и помещаются
+в новый тип, иначе скрипт останавливается и ничего не меняет.
+
+ALTER TABLE ... TYPE переписывает таблицу и индексы под ACCESS EXCLUSIVE
+блокировкой - API ждет до конца перезаписи. Без простоя те же типы
+получаются полной перезагрузкой (migrateAll.py --mode full): теневая
+таблица создается уже по новым моделям.
+
+--measure до и после изменения печатает размеры индексов и медиану
+времени выполнения типовых JOIN по идентификаторам (EXPLAIN ANALYZE).
+"""
+
+import sys
+import os
+import argparse
+import statistics
+
+# Добавляем корень проекта для импорта app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Integer, create_engine, inspect, text
+from sqlalchemy.types import NUMERIC
+
+from app.config import settings
+from app.database.dataset_versions import bump_dataset_version
+from app.database.models import Base, ViewBase
+from app.etl.specs import integer_bound
+
+TABLES = ["units", "buildings", "projects", "transactions"]
+
+# Типовые соединения по идентификаторам из роутов API
+JOIN_QUERIES = {
+    "units ⋈ projects (project_id)":
+        "SELECT count(*) FROM units u JOIN projects p ON p.project_id = u.project_id",
+    "transactions ⋈ units (project_number = project_id)":
+        "SELECT count(*) FROM transactions t JOIN (SELECT DISTINCT project_id FROM units) u "
+        "ON t.project_number = u.project_id",
+    "units ⋈ buildings (parent_property_id)":
+        "SELECT count(*) FROM units u JOIN buildings b ON b.property_id = u.parent_property_id",
+    "transactions ⋈ lkp_areas (area_id)":
+        "SELECT count(*) FROM transactions t JOIN lkp_areas a ON a.area_id = t.area_id",
+}
+
+
+def pending_columns(engine, table_name):
+    """[(колонка, целевой SQL-тип)] - numeric в БД, целые в модели"""
+    # units, buildings и transactions до перехода на fact_* - таблицы моделей-представлений
+    table = {**ViewBase.metadata.tables, **Base.metadata.tables}[table_name]
+    current = {column["name"]: column["type"] for column in inspect(engine).get_columns(table_name)}
+    pending = []
+    for column in table.columns:
+        if not isinstance(column.type, Integer) or not isinstance(current.get(column.name), NUMERIC):
+            continue
+        pending.append((column, column.type.compile(dialect=engine.dialect)))
+    return pending
+
+
+def out_of_range(conn, table_name, column):
+    """Сколько значений колонки дробные или не помещаются в целевой тип"""
+    bound = integer_bound(column.type)
+    return conn.execute(text(
+        f'SELECT count(*) FROM "{table_name}" WHERE "{column.name}" <> trunc("{column.name}") '
+        f'OR "{column.name}" < {-bound} OR "{column.name}" >= {bound}'
+    )).scalar()
+
+
+def index_sizes(conn, tables):
+    rows = conn.execute(text(
+        "SELECT relname, indexrelname, pg_relation_size(indexrelid) "
+        "FROM pg_stat_user_indexes WHERE relname = ANY(:tables) ORDER BY relname, indexrelname"
+    ), {"tables": list(tables)}).all()
+    return {(table, index): size for table, index, size in rows}
+
+
+def join_latency(conn, runs):
+    """Медиана Execution Time (мс) каждого JOIN_QUERIES"""
+    latency = {}
+    for name, query in JOIN_QUERIES.items():
+        timings = []
+        for _ in range(runs):
+            plan = conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")).scalar()
+            timings.append(plan[0]["Execution Time"])
+        latency[name] = statistics.median(timings)
+    return latency
+
+
+def measure(engine, tables, runs):
+    with engine.connect() as conn:
+        return index_sizes(conn, tables), join_latency(conn, runs)
+
+
+def report(before, after):
+    sizes_before, latency_before = before
+    sizes_after, latency_after = after
+    print("\n📦 Размер индексов (МБ):")
+    for key in sorted(sizes_before):
+        old, new = sizes_before[key], sizes_after.get(key, 0)
+        print(f"   {key[0]}.{key[1]:<45} {old / 2**20:>9.1f} → {new / 2**20:>9.1f}  ({(new - old) / old * 100 if old else 0:+.0f}%)")
+    total_before, total_after = sum(sizes_before.values()), sum(sizes_after.values())
+    print(f"   {'итого':<56} {total_before / 2**20:>9.1f} → {total_after / 2**20:>9.1f}")
+    print("\n⏱️  JOIN по идентификаторам (медиана, мс):")
+    for name in JOIN_QUERIES:
+        print(f"   {name:<52} {latency_before[name]:>9.1f} → {latency_after[name]:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NUMERIC(n, 0) идентификаторы → SMALLINT/INTEGER/BIGINT по моделям")
+    parser.add_argument("--db-uri", default=settings.DATABASE_URL, help="строка подключения (по умолчанию из настроек)")
+    parser.add_argument("--tables", nargs="+", choices=TABLES, default=TABLES, metavar="TABLE",
+                        help=f"какие таблицы переводить: {', '.join(TABLES)}")
+    parser.add_argument("--dry-run", action="store_true", help="только проверить данные и напечатать SQL")
+    parser.add_argument("--measure", action="store_true", help="замерить индексы и JOIN до и после")
+    parser.add_argument("--runs", type=int, default=5, help="сколько раз выполнять каждый JOIN при замере")
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_uri)
+
+    plan = {table: pending_columns(engine, table) for table in args.tables}
+    plan = {table: columns for table, columns in plan.items() if columns}
+    if not plan:
+        print("✅ Все идентификаторы уже целых типов")
+        sys.exit(0)
+
+    print("🔎 Проверяем значения...")
+    failed = False
+    with engine.connect() as conn:
+        for table, columns in plan.items():
+            for column, sql_type in columns:
+                bad = out_of_range(conn, table, column)
+                if bad:
+                    failed = True
+                    print(f"   ❌ {table}.{column.name}: {bad} значений не помещаются в {sql_type}")
+    if failed:
+        print("❌ Ничего не изменено: исправьте данные или тип в модели")
+        sys.exit(1)
+
+    statements = {
+        table: f'ALTER TABLE "{table}" ' + ", ".join(
+            f'ALTER COLUMN "{column.name}" TYPE {sql_type} USING "{column.name}"::{sql_type}'
+            for column, sql_type in columns
+        )
+        for table, columns in plan.items()
+    }
+    for statement in statements.values():
+        print(f"🏗️  {statement}")
+    if args.dry_run:
+        print("ℹ️ --dry-run: ничего не выполнено")
+        sys.exit(0)
+
+    before = measure(engine, TABLES, args.runs) if args.measure else None
+
+    for table, statement in statements.items():
+        print(f"🔄 {table}: перезапись таблицы и индексов...")
+        with engine.begin() as conn:
+            conn.execute(text(statement))
+        # Карта видимости и статистика по новой таблице (см. app.etl.shadow.build_indexes)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f'VACUUM (ANALYZE) "{table}"'))
+        # Ответы API меняются (1 вместо 1.0) - сбрасываем HTTP-кэш и кэш аналитики
+        bump_dataset_version(engine, table)
+
+    if args.measure:
+        report(before, measure(engine, TABLES, args.runs))
+    print("✅ Готово")
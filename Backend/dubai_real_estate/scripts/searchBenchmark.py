@@ -0,0 +1,120 @@
+import sys
+import os
+import argparse
+import random
+import statistics
+import time
+
+# Добавляем корень проекта для импорта app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, create_engine, or_, select, text
+from sqlalchemy.schema import CreateTable
+
+from app.api.dependencies import ilike_contains
+from app.config import settings
+from app.database.models import TRGM_EXTENSION, trigram_index
+
+# Слова для синтетических названий зданий - похожи на building_name_en из выгрузки DLD
+WORDS = [
+    "Marina", "Creek", "Palm", "Tower", "Residence", "Heights", "Gate", "Park", "Bay", "Hills",
+    "Downtown", "Vista", "Oasis", "Golf", "Harbour", "Sky", "Garden", "Boulevard", "Royal", "Crystal",
+]
+
+metadata = MetaData()
+
+bench = Table(
+    "bench_building_search",
+    metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("building_name_en", String(200)),
+    Column("building_name_ar", String(200)),
+)
+
+TRIGRAM_INDEXES = [
+    trigram_index("idx_bench_building_name_en_trgm", bench.c.building_name_en),
+    trigram_index("idx_bench_building_name_ar_trgm", bench.c.building_name_ar),
+]
+
+
+def fill(conn, rows):
+    """rows строк вида '<слово> <слово> <номер>' средствами generate_series"""
+    words = "ARRAY[" + ",".join(f"'{word}'" for word in WORDS) + "]"
+    conn.execute(text(f"""
+        INSERT INTO bench_building_search (id, building_name_en, building_name_ar)
+        SELECT g,
+               w[1 + (g * 7) % {len(WORDS)}] || ' ' || w[1 + (g * 13 / 5) % {len(WORDS)}] || ' ' || (g % 5000),
+               'برج ' || (g % 5000)
+        FROM generate_series(1, {int(rows)}) AS g, (SELECT {words} AS w) AS words
+    """))
+    conn.execute(text("ANALYZE bench_building_search"))
+
+
+def search_terms(count):
+    rng = random.Random(42)
+    terms = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            terms.append(f"{rng.choice(WORDS)} {rng.choice(WORDS)}")
+        elif kind < 0.8:
+            terms.append(f"{rng.choice(WORDS)[1:]} {rng.randint(0, 4999)}")
+        else:
+            terms.append(str(rng.randint(100, 4999)))
+    return terms
+
+
+def run(conn, terms):
+    """Время (мс) запроса формы /transactions/by-property для каждого терма"""
+    timings = []
+    for term in terms:
+        query = select(bench.c.id).where(or_(
+            ilike_contains(bench.c.building_name_en, term),
+            ilike_contains(bench.c.building_name_ar, term),
+        )).order_by(bench.c.id.desc()).limit(100)
+        started = time.perf_counter()
+        conn.execute(query).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label, timings):
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(f"   {label:<12} p50 {statistics.median(timings):>9.1f} мс   p95 {p95:>9.1f} мс")
+    return p95
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ILIKE '%...%' по названию здания: p95 без и с pg_trgm GIN-индексом")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="сколько строк в тестовой таблице (transactions ~ миллионы)")
+    parser.add_argument("--queries", type=int, default=100, help="сколько поисковых запросов в каждом прогоне")
+    parser.add_argument("--keep", action="store_true", help="не удалять тестовую таблицу после прогона")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    terms = search_terms(args.queries)
+    try:
+        with engine.begin() as conn:
+            bench.drop(conn, checkfirst=True)
+            # Только таблица: индексы создаются после прогона без них
+            conn.execute(CreateTable(bench))
+            print(f"📥 Заполняем {bench.name}: {args.rows} строк...")
+            fill(conn, args.rows)
+
+        print(f"📊 {args.queries} запросов, таблица {args.rows} строк")
+        with engine.connect() as conn:
+            before = report("без индекса", run(conn, terms))
+
+        with engine.begin() as conn:
+            print("🏗️  Создаем pg_trgm GIN-индексы...")
+            conn.execute(TRGM_EXTENSION)
+            for index in TRIGRAM_INDEXES:
+                index.create(conn)
+            conn.execute(text("ANALYZE bench_building_search"))
+
+        with engine.connect() as conn:
+            after = report("pg_trgm GIN", run(conn, terms))
+        print(f"   p95 быстрее в {before / after:.1f} раза")
+    finally:
+        if not args.keep:
+            bench.drop(engine, checkfirst=True)
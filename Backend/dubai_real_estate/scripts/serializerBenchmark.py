@@ -0,0 +1,93 @@
+import sys
+import os
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Добавляем корень проекта для импорта app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api.serializers import dumps, rows_to_dicts
+from app.database.models import Transaction
+
+FIELDS = [column.key for column in Transaction.__table__.columns]
+
+
+def make_rows(count):
+    """Транзиентные Transaction со значениями всех типов колонок"""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        values = {}
+        for column in Transaction.__table__.columns:
+            python_type = column.type.python_type
+            if python_type is Decimal:
+                values[column.key] = Decimal(rng.randint(10_000, 10_000_000)) / 100
+            elif python_type is date:
+                values[column.key] = date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))
+            elif python_type is datetime:
+                values[column.key] = datetime(2020, 1, 1) + timedelta(minutes=rng.randint(0, 10**6))
+            elif python_type is int:
+                values[column.key] = rng.randint(0, 10**6)
+            else:
+                values[column.key] = f"{column.key}-{i}"
+        rows.append(Transaction(**values))
+    return rows
+
+
+def _serialize_value(v):
+    """Старая поэлементная сериализация из роутеров"""
+    if v is None:
+        return None
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return float(v)
+    return v
+
+
+def before(rows):
+    """dict через _serialize_value + jsonable_encoder + JSONResponse.render"""
+    content = {"transactions": [
+        {key: _serialize_value(getattr(t, key, None)) for key in FIELDS if hasattr(t, key)}
+        for t in rows
+    ]}
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def after(rows):
+    """rows_to_dicts + orjson (FastJSONResponse.render)"""
+    return dumps({"transactions": rows_to_dicts(rows, FIELDS)})
+
+
+def measure(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(rows) / best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Сериализация строк ответа: строк в секунду до и после orjson")
+    parser.add_argument("--rows", type=int, default=10_000, help="сколько строк Transaction сериализовать")
+    parser.add_argument("--repeat", type=int, default=5, help="сколько повторов (берется лучший)")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(before(rows)) == json.loads(after(rows)), "результаты сериализации расходятся"
+
+    before_rate = measure(before, rows, args.repeat)
+    after_rate = measure(after, rows, args.repeat)
+    print(f"📊 {args.rows} строк x {len(FIELDS)} колонок, лучший из {args.repeat}")
+    print(f"   до:    {before_rate:>12,.0f} строк/с")
+    print(f"   после: {after_rate:>12,.0f} строк/с  (x{after_rate / before_rate:.1f})")
@@ -0,0 +1,50 @@
+"""Размеры таблиц БД: строки, heap, индексы и средняя ширина строки.
+
+Запуск до и после перехода на fact_* / dim_* (полная перезагрузка
+transactions, units и buildings) показывает, насколько сжалась таблица.
+"""
+
+import sys
+import os
+import argparse
+
+# Добавляем корень проекта для импорта app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+
+SIZES_SQL = text("""
+    SELECT c.relname,
+           c.reltuples::bigint AS row_estimate,
+           pg_relation_size(c.oid) AS heap_bytes,
+           pg_indexes_size(c.oid) AS index_bytes,
+           pg_total_relation_size(c.oid) AS total_bytes
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.relkind = 'r' AND n.nspname = current_schema()
+      AND (c.relname LIKE 'fact\\_%' OR c.relname LIKE 'dim\\_%' OR c.relname = ANY(:tables))
+    ORDER BY total_bytes DESC
+""")
+
+
+def megabytes(size):
+    return f"{size / 2**20:>10.1f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Размеры таблиц фактов, измерений и таблиц прежней схемы")
+    parser.add_argument("--db-uri", default=settings.DATABASE_URL, help="строка подключения (по умолчанию из настроек)")
+    parser.add_argument("--tables", nargs="+", default=["transactions", "units", "buildings"],
+                        help="дополнительные таблицы (прежняя схема до перезагрузки)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.db_uri)
+    with engine.connect() as conn:
+        rows = conn.execute(SIZES_SQL, {"tables": args.tables}).all()
+
+    print(f"{'таблица':<36}{'строк':>14}{'heap, МБ':>11}{'индексы, МБ':>13}{'всего, МБ':>11}{'байт/строку':>13}")
+    for name, row_estimate, heap_bytes, index_bytes, total_bytes in rows:
+        width = heap_bytes / row_estimate if row_estimate > 0 else 0
+        print(f"{name:<36}{row_estimate:>14}{megabytes(heap_bytes)} {megabytes(index_bytes)}  {megabytes(total_bytes)}{width:>13.0f}")
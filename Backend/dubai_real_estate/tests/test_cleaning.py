@@ -0,0 +1,208 @@
+"""clean_*_series против поячеечных конвертеров.
+
+Векторные clean_*_series должны давать ровно то же, что скалярные
+convert_float_to_decimal / convert_date_safe, а те - то же, что копии
+конвертеров из скриптов миграции до app.etl.cleaning (legacy_* ниже),
+кроме задокументированных исправлений: ветка 'X.0' с rstrip('.0')
+и бесконечные значения.
+"""
+
+import math
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.etl.cleaning import (
+    clean_date_series,
+    clean_decimal_series,
+    clean_integer_series,
+    clean_text_series,
+    convert_date_safe,
+    convert_float_to_decimal,
+)
+
+
+# Конвертеры из transactionsMigration.py / unitMigration.py / projectsMigration.py до переноса в app.etl.cleaning
+def legacy_convert_float_to_decimal(value, decimal_places=2):
+    if pd.isna(value) or value is None:
+        return None
+
+    if isinstance(value, str):
+        cleaned = value.strip().replace('"', '').replace(',', '')
+        if cleaned == '' or cleaned.lower() in ['null', 'nan', 'none', 'na', 'n/a']:
+            return None
+
+        if cleaned.endswith('.0'):
+            try:
+                return Decimal(cleaned.rstrip('.0'))
+            except Exception:
+                return None
+
+        try:
+            if '.' in cleaned:
+                try:
+                    float_val = float(cleaned)
+                    if float_val.is_integer():
+                        return Decimal(str(int(float_val)))
+                except Exception:
+                    pass
+
+            dec_value = Decimal(cleaned)
+            if decimal_places > 0:
+                return round(dec_value, decimal_places)
+            return dec_value
+        except Exception:
+            return None
+
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        if value.is_integer():
+            return Decimal(str(int(value)))
+        dec_value = Decimal(str(value))
+        if decimal_places > 0:
+            return round(dec_value, decimal_places)
+        return dec_value
+
+    if isinstance(value, (int, Decimal)):
+        return Decimal(str(value))
+
+    return None
+
+
+def legacy_convert_date_safe(value):
+    if pd.isna(value) or value is None:
+        return None
+
+    if isinstance(value, str):
+        value_str = value.strip().replace('"', '')
+        if value_str == '':
+            return None
+        try:
+            return pd.to_datetime(value_str, dayfirst=True, errors='coerce').date()
+        except Exception:
+            return None
+
+    return None
+
+
+def legacy_clean_text(series, max_len):
+    cleaned = series.fillna('').astype(str).str.strip()
+    if max_len:
+        cleaned = cleaned.str[:max_len]
+    cleaned = cleaned.replace({'': None, 'nan': None, 'None': None, 'NULL': None})
+    return cleaned.where(pd.notna(cleaned), None)
+
+
+NUMERIC_INPUTS = [
+    '15802', '15802.000', '15802.5', ' 42 ', '-7',
+    '"1,234.56"', '1,234', '"250000"', '12,345,678.9',
+    '0.005', '0.015', '2.675', '-0.125', '12.345', '1.00005', '1e3',
+    'NULL', 'null', 'N/A', 'na', 'nan', 'None', '', '   ', None,
+    'abc', '12abc', '1.2.3', '--5',
+    '1.0', '100.0', '10.0', '0.0',
+    'inf',
+    '99999999999999999999999.5',
+    # pd.to_numeric их не разбирает, Decimal()/float() - разбирают
+    '1_000', '٣٤', '٣٤.٥', '"1_000.50"',
+]
+
+# rstrip('.0') съедал нули целой части: вход → (старый результат, новый результат)
+RSTRIP_FIX = {
+    '100.0': (Decimal('1'), Decimal('100')),
+    '10.0': (Decimal('1'), Decimal('10')),
+    '0.0': (None, Decimal('0')),
+}
+
+LEGACY_DIFFERENCES = {
+    # Decimal('Infinity') не помещается в NUMERIC; с округлением старый round() падал и давал None
+    0: {**RSTRIP_FIX, 'inf': ('Infinity', None)},
+    2: RSTRIP_FIX,
+}
+
+DATE_INPUTS = [
+    '05-01-2020', '"05-01-2020"', ' 31-12-2023 ', '01-02-2021', '29-02-2020',
+    '05-01-2020 13:45:00', '2020-01-05 00:00:00', '2020-01-05', '05/01/2020',
+    '31-02-2020', '2020-13-45', 'garbage', 'NULL', '', '  ', None,
+]
+
+TEXT_INPUTS = [' abc ', 'abcdefgh', '"quoted"', 'nan', 'None', 'NULL', 'null', '', '   ', None, np.nan, 'دبي مارينا']
+
+
+def as_strings(values):
+    """Сравнение с точностью до записи: Decimal('1.50') и Decimal('1.5') различаются"""
+    return [None if value is None else str(value) for value in values]
+
+
+def series(values):
+    return pd.Series(values, dtype=object)
+
+
+@pytest.mark.parametrize("decimal_places", [0, 2, 4])
+def test_decimal_series_matches_scalar_converter(decimal_places):
+    result = clean_decimal_series(series(NUMERIC_INPUTS), decimal_places)
+
+    expected = [convert_float_to_decimal(value, decimal_places) for value in NUMERIC_INPUTS]
+    assert as_strings(result) == as_strings(expected)
+
+
+@pytest.mark.parametrize("decimal_places", [0, 2])
+def test_scalar_converter_matches_legacy_except_documented_fixes(decimal_places):
+    differences = LEGACY_DIFFERENCES[decimal_places]
+    for value in NUMERIC_INPUTS:
+        new = convert_float_to_decimal(value, decimal_places)
+        old = legacy_convert_float_to_decimal(value, decimal_places)
+        if value in differences:
+            expected_old, expected_new = differences[value]
+            assert as_strings([old, new]) == as_strings([expected_old, expected_new]), value
+        else:
+            assert as_strings([new]) == as_strings([old]), value
+
+
+def test_decimal_half_values_round_like_scalar_converter():
+    values = ['0.125', '0.135', '-0.125', '2.5', '3.5']
+    assert as_strings(clean_decimal_series(series(values), 2)) == ['0.12', '0.14', '-0.12', '2.50', '3.50']
+    assert as_strings(clean_decimal_series(series(values), 2)) == as_strings(
+        convert_float_to_decimal(value, 2) for value in values
+    )
+
+
+def test_integer_series_rounds_half_up_and_drops_out_of_range():
+    values = series([Decimal('2.5'), Decimal('-2.5'), Decimal('3.49'), Decimal('32767'), Decimal('32768'),
+                     Decimal('-32768'), Decimal('-32769'), None])
+
+    result, dropped = clean_integer_series(values, 2 ** 15)
+
+    assert as_strings(result) == ['3', '-3', '3', '32767', None, '-32768', None, None]
+    assert dropped == 2
+
+
+@pytest.mark.parametrize("dayfirst_timestamps", [True, False])
+def test_date_series_matches_scalar_converter(dayfirst_timestamps):
+    result = clean_date_series(series(DATE_INPUTS), dayfirst_timestamps=dayfirst_timestamps)
+
+    expected = [convert_date_safe(value, dayfirst_timestamps) for value in DATE_INPUTS]
+    assert list(result) == expected
+
+
+def test_date_scalar_converter_matches_legacy():
+    for value in DATE_INPUTS:
+        old = legacy_convert_date_safe(value)
+        # Старый конвертер возвращал NaT, который затем заменялся на None при загрузке
+        old = None if old is pd.NaT else old
+        assert convert_date_safe(value) == old, value
+
+
+def test_date_series_parses_day_first():
+    result = clean_date_series(series(['05-01-2020', '05-01-2020 13:45:00', '31-02-2020']))
+    assert list(result) == [date(2020, 1, 5), date(2020, 1, 5), None]
+
+
+@pytest.mark.parametrize("max_len", [None, 5])
+def test_text_series_matches_legacy_block(max_len):
+    result = clean_text_series(series(TEXT_INPUTS), max_len)
+
+    assert list(result) == list(legacy_clean_text(series(TEXT_INPUTS), max_len))
@@ -0,0 +1,31 @@
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.units import COMPARABLES_FACT, code_condition, comparables_query
+
+
+def compiled(query):
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_comparables_read_only_fact_table_by_codes():
+    query = comparables_query(date(2024, 1, 1), date(2024, 12, 31), 80, 120, 5, [3]).where(
+        code_condition(COMPARABLES_FACT.c.property_type_code, [7, 9], "Unit")
+    )
+
+    sql = compiled(query)
+
+    assert "FROM fact_transactions" in sql
+    assert "JOIN" not in sql and "dim_" not in sql
+    assert "fact_transactions.trans_group_code IN (3)" in sql
+    assert "fact_transactions.property_type_code IN (7, 9)" in sql
+    # Условие частичных индексов idx_transactions_comparables*
+    assert "fact_transactions.meter_sale_price IS NOT NULL" in sql
+    assert "fact_transactions.actual_area_sqm IS NOT NULL" in sql
+
+
+def test_missing_property_type_matches_rows_without_code():
+    sql = compiled(COMPARABLES_FACT.select().where(code_condition(COMPARABLES_FACT.c.property_type_code, [4], None)))
+
+    assert "fact_transactions.property_type_code IS NULL OR fact_transactions.property_type_code IN (4)" in sql
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pyarrow as pa
+from sqlalchemy import Column, Date, DateTime, Integer, MetaData, Numeric, Table, Text
+
+from app.api.export import ArrowEncoder, NdjsonEncoder
+
+TABLE = Table(
+    "export_sample",
+    MetaData(),
+    Column("id", Integer),
+    Column("price", Numeric(15, 2)),
+    Column("ratio", Numeric),
+    Column("instance_date", Date),
+    Column("loaded_at", DateTime),
+    Column("name", Text),
+)
+
+ROWS = [
+    (1, Decimal("1500000.50"), Decimal("0.1234567890123456789012"), date(2024, 2, 29), datetime(2024, 3, 1, 12, 30), "دبي مارينا"),
+    (2, None, None, None, None, None),
+    (3, Decimal("7"), Decimal("42"), date(2020, 1, 5), datetime(2020, 1, 5), "JVC"),
+]
+
+
+def test_arrow_encoder_round_trips_decimal_date_and_null():
+    encoder = ArrowEncoder(list(TABLE.columns))
+    body = encoder.header() + encoder.encode(ROWS[:2]) + encoder.encode(ROWS[2:]) + encoder.footer()
+
+    result = pa.ipc.open_stream(body).read_all()
+
+    assert result.schema.field("price").type == pa.decimal128(38, 2)
+    # NUMERIC без масштаба - Decimal приводится к float64
+    assert result.schema.field("ratio").type == pa.float64()
+    assert result.column("price").to_pylist() == [Decimal("1500000.50"), None, Decimal("7.00")]
+    assert result.column("ratio").to_pylist() == [float(ROWS[0][2]), None, 42.0]
+    assert result.column("instance_date").to_pylist() == [date(2024, 2, 29), None, date(2020, 1, 5)]
+    assert result.column("loaded_at").to_pylist() == [datetime(2024, 3, 1, 12, 30), None, datetime(2020, 1, 5)]
+    assert result.column("name").to_pylist() == ["دبي مارينا", None, "JVC"]
+
+
+def test_ndjson_encoder_serializes_decimal_date_and_null():
+    encoder = NdjsonEncoder(list(TABLE.columns))
+
+    lines = encoder.encode(ROWS[:2]).decode().splitlines()
+
+    assert json.loads(lines[0]) == {
+        "id": 1, "price": 1500000.5, "ratio": float(ROWS[0][2]), "instance_date": "2024-02-29",
+        "loaded_at": "2024-03-01T12:30:00", "name": "دبي مارينا",
+    }
+    assert json.loads(lines[1]) == {"id": 2, **dict.fromkeys(["price", "ratio", "instance_date", "loaded_at", "name"])}
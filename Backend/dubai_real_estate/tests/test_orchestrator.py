@@ -0,0 +1,19 @@
+import pytest
+
+from app.etl.orchestrator import DEPENDENCIES, check_year_reload
+
+
+def test_year_reload_allowed_for_partitioned_tables_in_full_mode():
+    check_year_reload(["transactions", "valuation"], "full", 2024)
+    check_year_reload(list(DEPENDENCIES), "sync", None)
+
+
+@pytest.mark.parametrize("tables", [list(DEPENDENCIES), ["transactions", "units"], ["lkp_areas"]])
+def test_year_reload_rejects_unpartitioned_tables(tables):
+    with pytest.raises(ValueError, match="не секционированы"):
+        check_year_reload(tables, "full", 2024)
+
+
+def test_year_reload_rejects_sync_mode():
+    with pytest.raises(ValueError, match="--mode full"):
+        check_year_reload(["transactions"], "sync", 2024)
@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+
+from app.api.pagination import decode_cursor, encode_cursor, estimate_sql
+from app.api.v1.transactions import TRANSACTIONS_KEYSET, transaction_filters
+from app.api.v1.valuation import VALUATIONS_KEYSET
+from app.database.models import Transaction
+
+
+def connected_dialect():
+    """Диалект API после подключения к серверу с standard_conforming_strings=on"""
+    dialect = asyncpg_dialect()
+    dialect._backslash_escapes = False
+    return dialect
+
+
+def test_estimate_sql_keeps_like_escape_single_character():
+    query = select(Transaction).where(*transaction_filters(building_name="50%"))
+
+    sql = estimate_sql(query, connected_dialect())
+
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+    assert "transactions.building_name_en ILIKE '%50\\%%' ESCAPE '\\'" in sql
+    assert "transactions.building_name_ar ILIKE '%50\\%%' ESCAPE '\\'" in sql
+    assert "%%" not in sql.replace("\\%%", "")
+
+
+def raw_cursor(values):
+    payload = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    values = [date(2024, 5, 1), 3, 2024, 123456789]
+    assert decode_cursor(encode_cursor(values), VALUATIONS_KEYSET.columns) == values
+    assert decode_cursor(encode_cursor([None, "t-1"]), TRANSACTIONS_KEYSET.columns) == [None, "t-1"]
+
+
+def test_cursor_decimal_tag_decodes_for_numeric_column():
+    column = Transaction.__table__.c.trans_value
+    assert decode_cursor(encode_cursor([Decimal("1.50")]), [column]) == [Decimal("1.50")]
+
+
+@pytest.mark.parametrize("values", [
+    [{"n": "x"}, "t-1"],
+    [{}, "t-1"],
+    [{"unknown": "2024-01-01"}, "t-1"],
+    [{"d": 20240101}, "t-1"],
+    [{"d": "2024-13-01"}, "t-1"],
+    ["2024-01-01", "t-1"],
+    [{"d": "2024-01-01"}, 5],
+    [{"d": "2024-01-01"}, ["t-1"]],
+    [{"d": "2024-01-01"}],
+])
+def test_crafted_transaction_cursor_is_rejected(values):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(raw_cursor(values), TRANSACTIONS_KEYSET.columns)
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("values", [
+    [{"d": "2024-01-01"}, "3", 2024, 1],
+    [{"d": "2024-01-01"}, 3, True, 1],
+    [{"d": "2024-01-01"}, 3, 2024, 1.5],
+    [{"d": "2024-01-01"}, 3, 2024, {"n": "1"}],
+])
+def test_crafted_valuation_cursor_is_rejected(values):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(raw_cursor(values), VALUATIONS_KEYSET.columns)
+    assert error.value.status_code == 400
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("не base64", TRANSACTIONS_KEYSET.columns)
+    assert error.value.status_code == 400
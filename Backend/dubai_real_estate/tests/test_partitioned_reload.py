@@ -0,0 +1,110 @@
+"""Перезагрузка строки, у которой в новой выгрузке изменилась instance_date.
+
+PK секционированных таблиц включает instance_date, но повторы ищутся
+по естественному ключу (TableSpec.key_columns). Проверка синхронизации
+через COPY требует PostgreSQL: укажите TEST_DATABASE_URL.
+"""
+
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+from sqlalchemy import MetaData, create_engine, select
+
+from app.database.partitions import create_year_partitions, partition_name
+from app.etl.copy_loader import CopyMerger
+from app.etl.pipeline import OrmLoader
+from app.etl.specs import TRANSACTIONS, VALUATION
+
+COLUMNS = ["transaction_id", "instance_date", "trans_value"]
+
+
+def chunk(*rows):
+    return pd.DataFrame(rows, columns=COLUMNS, dtype=object)
+
+
+def load_chunks(merger, *chunks):
+    try:
+        for df in chunks:
+            merger.merge(df)
+        return merger.result()
+    finally:
+        merger.close()
+        merger.connection.close()
+
+
+def test_key_columns_exclude_partition_column():
+    assert TRANSACTIONS.pk_columns == ["transaction_id", "instance_date"]
+    assert TRANSACTIONS.key_columns == ["transaction_id"]
+    assert VALUATION.key_columns == ["procedure_id", "procedure_year", "procedure_number"]
+
+
+def test_full_load_keeps_first_row_when_date_changes():
+    engine = create_engine("sqlite://")
+    table = TRANSACTIONS.table
+    table.metadata.create_all(engine, tables=[table])
+
+    loader = OrmLoader(engine, TRANSACTIONS, table, COLUMNS)
+    loader.load(chunk(("t-1", date(2023, 12, 31), 100), ("t-2", date(2024, 1, 5), 200)))
+    loader.load(chunk(("t-1", date(2024, 1, 2), 150)))
+    loader.close()
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(table.c.transaction_id, table.c.instance_date).order_by(table.c.transaction_id)
+        ).all()
+    assert rows == [("t-1", date(2023, 12, 31)), ("t-2", date(2024, 1, 5))]
+    assert loader.result()["duplicates"] == 1
+
+
+@pytest.fixture
+def partitioned_table():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL не задан")
+    engine = create_engine(url)
+    table = TRANSACTIONS.table.to_metadata(MetaData(), name="test_fact_transactions")
+    table.indexes.clear()
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    with engine.begin() as conn:
+        create_year_partitions(conn, table.name, [2023, 2024])
+    yield engine, table
+    table.drop(engine, checkfirst=True)
+    engine.dispose()
+
+
+def merger(engine, table, upsert):
+    return CopyMerger(
+        engine.raw_connection(), table.name, COLUMNS, TRANSACTIONS.pk_columns,
+        upsert=upsert, key_columns=TRANSACTIONS.key_columns,
+    )
+
+
+def test_copy_full_load_keeps_first_row_when_date_changes(partitioned_table):
+    engine, table = partitioned_table
+    result = load_chunks(
+        merger(engine, table, upsert=False),
+        chunk(("t-1", date(2023, 12, 31), 100)),
+        chunk(("t-1", date(2024, 1, 2), 150)),
+    )
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(table.c.transaction_id, table.c.instance_date)).all()
+    assert rows == [("t-1", date(2023, 12, 31))]
+    assert (result["inserted"], result["duplicates"]) == (1, 1)
+
+
+def test_sync_moves_row_to_partition_of_new_date(partitioned_table):
+    engine, table = partitioned_table
+    load_chunks(merger(engine, table, upsert=False), chunk(("t-1", date(2023, 12, 31), 100)))
+
+    result = load_chunks(merger(engine, table, upsert=True), chunk(("t-1", date(2024, 1, 2), 150)))
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(table.c.transaction_id, table.c.instance_date, table.c.trans_value)).all()
+        old_year = conn.exec_driver_sql(f"SELECT count(*) FROM {partition_name(table.name, 2023)}").scalar()
+    assert rows == [("t-1", date(2024, 1, 2), 150)]
+    assert old_year == 0
+    assert (result["inserted"], result["updated"]) == (0, 1)
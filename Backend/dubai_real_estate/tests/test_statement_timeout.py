@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from app.main import statement_timeout_middleware
+
+
+class DriverError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+def run_raising(error):
+    async def call_next(request):
+        raise error
+
+    return asyncio.run(statement_timeout_middleware(None, call_next))
+
+
+@pytest.mark.parametrize("error_class", [DBAPIError, OperationalError])
+def test_canceled_statement_returns_504(error_class):
+    # asyncpg-диалект дает DBAPIError, psycopg2 - OperationalError
+    response = run_raising(error_class("SELECT 1", {}, DriverError("57014")))
+
+    assert response.status_code == 504
+
+
+def test_other_database_errors_propagate_unchanged():
+    error = OperationalError("SELECT 1", {}, DriverError("08006"))
+
+    with pytest.raises(OperationalError) as raised:
+        run_raising(error)
+
+    assert raised.value is error
@@ -1,8 +1,13 @@
+import json
 import pandas as pd
+import pyarrow.parquet as pq
 from pathlib import Path
 
 folder = r"C:\Users\User\Desktop\DubaiProject\datasets"
 
+# Parquet-кэш очищенных данных, который собирают миграции (app/etl/parquet_cache.py)
+cache_folder = Path(folder) / ".parquet_cache"
+
 csv_files = [
     "Lkp_Areas.csv",
     "Valuation.csv",
@@ -16,6 +21,42 @@ csv_files = [
     "Lkp_Market_Types.csv"
 ]
 
+
+def find_cache(filepath):
+    """Каталог и manifest актуального Parquet-кэша для файла (или None)"""
+    if not cache_folder.exists():
+        return None
+
+    stat = filepath.stat()
+    for manifest_path in cache_folder.glob("*/manifest.json"):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if Path(manifest["source"]).name != filepath.name:
+            continue
+        # Файл изменился после сборки кэша - читаем CSV
+        if manifest["size"] != stat.st_size or manifest["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        return manifest_path.parent, manifest
+    return None
+
+
+def show_cached(filename, cache_dir, manifest):
+    # Первые 10 строк - только из первой row group первого part-файла
+    first_part = pq.ParquetFile(cache_dir / manifest["parts"][0])
+    df = first_part.read_row_group(0).slice(0, 10).to_pandas()
+
+    print(f"\n{'='*100}")
+    print(f"📄 ФАЙЛ: {filename} (Parquet-кэш {cache_dir.name}, очищенные данные)")
+    print(f"Всего строк в файле: {manifest['rows']:,}")
+    print(f"Колонок: {len(manifest['columns'])}")
+    print(f"Колонки: {manifest['columns']}")
+    print(f"\nПервые 10 строк:")
+    print(df.to_string(index=False))
+    print(f"\nТипы колонок (Parquet):")
+    print(first_part.schema_arrow)
+    print(f"{'='*100}")
+
+
 for filename in csv_files:
     filepath = Path(folder) / filename
     if not filepath.exists():
@@ -23,9 +64,14 @@ for filename in csv_files:
         continue
 
     try:
+        cached = find_cache(filepath)
+        if cached:
+            show_cached(filename, *cached)
+            continue
+
         # Читаем только первые 10 строк
         df = pd.read_csv(filepath, nrows=10, low_memory=False)
-        
+
         print(f"\n{'='*100}")
         print(f"📄 ФАЙЛ: {filename}")
         print(f"Всего строк в файле: {pd.read_csv(filepath, usecols=[0]).shape[0]:,}")
@@ -37,4 +83,4 @@ for filename in csv_files:
         print(df.dtypes)
         print(f"{'='*100}")
     except Exception as e:
-        print(f"Ошибка чтения {filename}: {e}")
\ No newline at end of file
+        print(f"Ошибка чтения {filename}: {e}")